@@ -0,0 +1,249 @@
+"""Per-user trends, category shares, burn rate and a spending forecast, computed with NumPy.
+
+`load()` reads a user's dated transactions (hot table and archive) as column arrays: days
+since 1970-01-01, amounts in cents, an income flag and a category code; `load_many()` does
+the same for a chunk of users with the same number of queries. It selects raw column
+values, so no Transaction objects are built. `compute()` works only on whole arrays:
+- monthly income/expense series come from np.bincount over month numbers;
+- rolling means come from cumulative sums;
+- category totals come from another bincount;
+- the forecast is a least-squares line per series.
+Python only loops over the months and categories of the output.
+
+Amounts are summed in cents as float64, which is exact well past any realistic total, and
+reported in currency units rounded to 2 decimals, like the summary endpoint.
+"""
+from collections import namedtuple
+from datetime import date as date_cls
+import numpy as np
+from sqlalchemy import BigInteger, SmallInteger, String, func, select, type_coerce
+from app import db
+from models import Category, Transaction, TransactionType
+import archive
+
+# query parameter: (default, minimum, maximum)
+PARAMS = {
+    "months": (12, 1, 120),   # months of history in the series and the forecast fit
+    "window": (3, 1, 12),     # months per rolling average
+    "horizon": (3, 0, 24),    # months to forecast
+}
+BURN_DAYS = 90
+EPOCH_ORDINAL = date_cls(1970, 1, 1).toordinal()
+INCOME = TransactionType.CODES["income"]
+
+Columns = namedtuple("Columns", "day cents income category names")
+
+
+def _empty():
+    return Columns(
+        np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, bool), np.empty(0, np.int64), []
+    )
+
+
+def load(user_id):
+    """The user's dated transactions, hot and archived, as a Columns of equal-length arrays.
+
+    `category` indexes into `names` (-1 for uncategorised).
+    """
+    return load_many([user_id])[user_id]
+
+
+def load_many(user_ids):
+    """load() for many users with one query per table: {user_id: Columns} for every id given."""
+    user_ids = sorted(set(user_ids))
+    categories = (
+        db.session.query(Category.id, Category.user_id, Category.name)
+        .filter(Category.user_id.in_(user_ids))
+        .all()
+    )
+    # type_coerce skips the per-row Cents/TransactionType/Date conversions; numpy parses the
+    # dates (ISO strings on SQLite, date objects on PostgreSQL) in one call
+    rows = db.session.execute(
+        select(
+            Transaction.user_id,
+            type_coerce(Transaction.date, String),
+            type_coerce(Transaction.amount, BigInteger),
+            type_coerce(Transaction.type, SmallInteger),
+            func.coalesce(Transaction.category_id, -1),
+        )
+        .where(Transaction.user_id.in_(user_ids), Transaction.date.is_not(None))
+        .order_by(Transaction.user_id)
+    ).all()
+
+    parts = {user_id: [] for user_id in user_ids}
+    code_of = {user_id: {} for user_id in user_ids}
+    if rows:
+        owners, dates, cents, types, category_ids = zip(*rows)
+        owners = np.array(owners, np.int64)
+        day = np.array(dates, "datetime64[D]").astype(np.int64)
+        cents = np.array(cents, np.int64)
+        income = np.array(types, np.int64) == INCOME
+        category_ids = np.array(category_ids, np.int64)
+        # category ids are global, codes are per user; the last slot answers id -1
+        lookup = np.full(max((c[0] for c in categories), default=0) + 2, -1, np.int64)
+        for category_id, owner, name in categories:
+            codes = code_of[owner]
+            lookup[category_id] = codes.setdefault(name, len(codes))
+        # rows are sorted by user, so each user's rows are one slice
+        bounds = np.searchsorted(owners, user_ids + [user_ids[-1] + 1])
+        for user_id, start, stop in zip(user_ids, bounds[:-1], bounds[1:]):
+            if stop > start:
+                parts[user_id].append((day[start:stop], cents[start:stop], income[start:stop],
+                                       lookup[category_ids[start:stop]]))
+
+    for user_id, columns in archive.segment_columns(user_ids):
+        codes = code_of[user_id]
+        segment_codes = np.array(
+            [codes.setdefault(name, len(codes)) for name in columns["categories"]] + [-1], np.int64
+        )
+        parts[user_id].append((
+            np.array(columns["day"], np.int64) + (columns["base"] - EPOCH_ORDINAL),
+            np.array(columns["cents"], np.int64),
+            np.array(columns["type"], np.int64) == INCOME,
+            segment_codes[np.array(columns["category"], np.int64)],  # -1 picks the trailing -1
+        ))
+
+    loaded = {}
+    for user_id in user_ids:
+        if not parts[user_id]:
+            loaded[user_id] = _empty()
+            continue
+        day, cents, income, category = (np.concatenate(column) for column in zip(*parts[user_id]))
+        loaded[user_id] = Columns(day, cents, income, category, list(code_of[user_id]))
+    return loaded
+
+
+def month_key(month_number):
+    year, month = divmod(int(month_number), 12)
+    return f"{1970 + year:04d}-{month + 1:02d}", date_cls(1970 + year, month + 1, 1).strftime("%b/%Y")
+
+
+def _money(values):
+    return [round(float(v) / 100, 2) for v in values]
+
+
+def _optional(values, scale=100, digits=2):
+    return [None if np.isnan(v) else round(float(v) / scale, digits) for v in values]
+
+
+def rolling_mean(values, window):
+    """Trailing mean over `window` points; NaN until a full window is available."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        out[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return out
+
+
+def changes(values):
+    """Month-over-month (absolute, percent) change; NaN for the first month and after a zero."""
+    delta = np.full(len(values), np.nan)
+    pct = np.full(len(values), np.nan)
+    if len(values) > 1:
+        delta[1:] = values[1:] - values[:-1]
+        previous = values[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct[1:] = np.where(previous != 0, delta[1:] / previous * 100, np.nan)
+    return delta, pct
+
+
+def linear_forecast(values, horizon):
+    """Least-squares line through `values`, extended `horizon` points (never below zero)."""
+    if horizon == 0 or len(values) == 0:
+        return np.zeros(horizon)
+    if len(values) == 1:
+        return np.full(horizon, values[0])
+    x = np.arange(len(values))
+    slope, intercept = np.polyfit(x, values, 1)
+    return np.clip(intercept + slope * np.arange(len(values), len(values) + horizon), 0, None)
+
+
+def compute(columns, months=12, window=3, horizon=3):
+    """The analytics payload for a Columns (see the module docstring)."""
+    params = {"months": months, "window": window, "horizon": horizon}
+    if len(columns.day) == 0:
+        return {"as_of": None, "params": params, "months": [], "categories": [],
+                "burn_rate": None, "forecast": []}
+
+    day, cents, income = columns.day, columns.cents.astype(np.float64), columns.income
+    month_number = day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    first, last = int(month_number.min()), int(month_number.max())
+    span = last - first + 1
+    offset = month_number - first
+
+    # every month from the first transaction to the last, empty months included
+    income_by_month = np.bincount(offset, weights=np.where(income, cents, 0.0), minlength=span)
+    expenses_by_month = np.bincount(offset, weights=np.where(income, 0.0, cents), minlength=span)
+    count_by_month = np.bincount(offset, minlength=span)
+
+    # rolling means and changes use the months before the shown range too
+    income_avg, expenses_avg = rolling_mean(income_by_month, window), rolling_mean(expenses_by_month, window)
+    income_delta, income_pct = changes(income_by_month)
+    expenses_delta, expenses_pct = changes(expenses_by_month)
+
+    shown = slice(max(0, span - months), span)
+    series = {
+        "income": _money(income_by_month[shown]),
+        "expenses": _money(expenses_by_month[shown]),
+        "net": _money(income_by_month[shown] - expenses_by_month[shown]),
+        "income_avg": _optional(income_avg[shown]),
+        "expenses_avg": _optional(expenses_avg[shown]),
+        "income_change": _optional(income_delta[shown]),
+        "expenses_change": _optional(expenses_delta[shown]),
+        "income_change_pct": _optional(income_pct[shown], 1, 1),
+        "expenses_change_pct": _optional(expenses_pct[shown], 1, 1),
+    }
+    month_rows = []
+    for i, number in enumerate(range(first + shown.start, last + 1)):
+        key, label = month_key(number)
+        month_rows.append({"key": key, "month": label, "count": int(count_by_month[shown][i]),
+                           **{name: values[i] for name, values in series.items()}})
+
+    # category share of expenses over the shown months
+    in_range = (offset >= shown.start) & ~income
+    codes = columns.category[in_range]
+    totals = np.bincount(codes + 1, weights=cents[in_range], minlength=len(columns.names) + 1)
+    total_expenses = totals.sum()
+    order = np.argsort(-totals, kind="stable")
+    categories = [
+        {
+            "category": columns.names[code - 1] if code else None,
+            "total": round(float(totals[code]) / 100, 2),
+            "share": round(float(totals[code] / total_expenses) * 100, 2),
+        }
+        for code in order if totals[code] > 0
+    ]
+
+    # burn rate over the BURN_DAYS days up to the latest transaction
+    as_of = int(day.max())
+    recent = day > as_of - BURN_DAYS
+    spent = float(cents[recent & ~income].sum())
+    earned = float(cents[recent & income].sum())
+    burn_rate = {
+        "days": BURN_DAYS,
+        "daily": round(spent / BURN_DAYS / 100, 2),
+        "monthly": round(spent / BURN_DAYS * 365.25 / 12 / 100, 2),
+        "net_daily": round((spent - earned) / BURN_DAYS / 100, 2),
+    }
+
+    # linear trend over the shown months, for the months after the last one
+    income_forecast = linear_forecast(income_by_month[shown], horizon)
+    expenses_forecast = linear_forecast(expenses_by_month[shown], horizon)
+    forecast = []
+    for i in range(horizon):
+        key, label = month_key(last + 1 + i)
+        forecast.append({
+            "key": key, "month": label,
+            "income": round(float(income_forecast[i]) / 100, 2),
+            "expenses": round(float(expenses_forecast[i]) / 100, 2),
+            "net": round(float(income_forecast[i] - expenses_forecast[i]) / 100, 2),
+        })
+
+    return {
+        "as_of": date_cls.fromordinal(as_of + EPOCH_ORDINAL).isoformat(),
+        "params": params,
+        "months": month_rows,
+        "categories": categories,
+        "burn_rate": burn_rate,
+        "forecast": forecast,
+    }
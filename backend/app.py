@@ -1,15 +1,74 @@
-from flask import Flask, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager
-from flask_cors import CORS
-import os
-
-db = SQLAlchemy()
+import threading
+from startup import StartupTimer
+
+# module-level imports are timed too; see startup.py
+import_timer = StartupTimer()
+with import_timer.phase("import flask and extensions"):
+    from flask import Flask, jsonify
+    from flask_sqlalchemy import SQLAlchemy
+    from flask_bcrypt import Bcrypt
+    from flask_jwt_extended import JWTManager
+    from flask_cors import CORS
+    import os
+    from database import RoutingSession, dispose_engines_after_fork, trace_statements
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 jwt = JWTManager()
+# Flask-Mail is set up on first use by outbox.py, so workers that never send mail skip it
+
+_app = None
+_app_lock = threading.Lock()
 
 def create_app():
+    timer = StartupTimer()
+    timer.extend(import_timer)
+    with timer.phase("config"):
+        app = _configured_app()
+
+    # ✅ Initialize extensions
+    with timer.phase("init database"):
+        db.init_app(app)
+        dispose_engines_after_fork(app, db)
+        trace_statements(app, db)
+    with timer.phase("init bcrypt, jwt"):
+        bcrypt.init_app(app)
+        jwt.init_app(app)
+
+    with timer.phase("init cache, hashing"):
+        from cache import response_cache
+        from hashing import password_hasher
+        response_cache.init_app(app)
+        password_hasher.init_app(app)
+    with timer.phase("init metrics, profiling"):
+        from metrics import metrics
+        from profiling import profiler
+        metrics.init_app(app)
+        profiler.init_app(app)
+
+    # ✅ Register blueprints
+    with timer.phase("import auth"):
+        from auth import auth_bp
+    with timer.phase("import finance"):
+        from finance import finance_bp
+    with timer.phase("register blueprints"):
+        from health import health_bp
+        app.register_blueprint(auth_bp, url_prefix="/api/auth")
+        app.register_blueprint(finance_bp, url_prefix="/api/finance")
+        app.register_blueprint(health_bp)
+
+    # ✅ Root route
+    @app.route("/")
+    def root():
+        return jsonify({"message": "Personal Finance Backend API is running."})
+
+    app.extensions["startup"] = timer.report()
+    if app.config.get("STARTUP_REPORT"):
+        app.logger.warning("startup (pid %s):\n%s", os.getpid(), timer.format())
+    return app
+
+
+def _configured_app():
     app = Flask(__name__)
 
     # ✅ Use production config if deployed, otherwise use development config
@@ -27,8 +86,8 @@ def create_app():
                 "http://127.0.0.1:3000"
             ],
             supports_credentials=True,
-            expose_headers=["Content-Type", "Authorization"],
-            allow_headers=["Content-Type", "Authorization"],
+            expose_headers=["Content-Type", "Authorization", "ETag", "X-Profile-Id"],
+            allow_headers=["Content-Type", "Authorization", "If-None-Match", "X-Profile"],
             methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
         )
     else:
@@ -40,29 +99,30 @@ def create_app():
             app,
             origins=r"^https?://(localhost|127\.0\.0\.1)(:\d+)?$",
             supports_credentials=True,
-            expose_headers=["Content-Type", "Authorization"],
-            allow_headers=["Content-Type", "Authorization"],
+            expose_headers=["Content-Type", "Authorization", "ETag", "X-Profile-Id"],
+            allow_headers=["Content-Type", "Authorization", "If-None-Match", "X-Profile"],
             methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
         )
+    return app
 
-    # ✅ Initialize extensions
-    db.init_app(app)
-    bcrypt.init_app(app)
-    jwt.init_app(app)
 
-    # ✅ Register blueprints
-    from auth import auth_bp
-    from finance import finance_bp
-    app.register_blueprint(auth_bp, url_prefix="/api/auth")
-    app.register_blueprint(finance_bp, url_prefix="/api/finance")
+def get_app():
+    """The process-wide app, built on first use and only once.
 
-    # ✅ Root route
-    @app.route("/")
-    def root():
-        return jsonify({"message": "Personal Finance Backend API is running."})
-
-    return app
+    gunicorn app:app (with or without --preload), manage.py and the report workers all come
+    through here; with --preload the master builds it and the forked workers inherit it.
+    """
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
 
 
-# ✅ For Render or local run
-app = create_app()
+# ✅ For Render or local run: `app` is resolved lazily, so importing this module (as every
+# other backend module does, for `db`) does not build an app.
+def __getattr__(name):
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,349 @@
+"""Cold-data archive for old transactions.
+
+`python manage.py archive` moves transactions dated before a cutoff (ARCHIVE_AFTER_DAYS ago
+by default) out of the hot transaction table into transaction_archive segments: one
+zlib-compressed, column-oriented payload per user, year and archiving run. Segments are
+append-only; compaction rewrites each year's segments as one. Row count and income/expense
+totals are stored next to each payload, so yearly figures never decompress anything.
+
+Archived rows keep their ids, dates, category names, types and amounts, and stay counted in
+monthly_rollup, so the summary endpoint is unaffected. History, export and date-range
+summaries read through to the archive only when the requested range reaches the archived
+dates (`reaches()`). Archived transactions are read-only: PUT/DELETE only see the hot table,
+so history marks archived rows (see serialization.py) and the UI offers no edit/delete for them.
+
+Rows handled here are (id, date, category, type, amount) tuples, the same shape the
+finance read paths fetch from the hot table.
+"""
+import heapq
+import json
+import zlib
+from collections import defaultdict
+from datetime import date as date_cls, timedelta
+from sqlalchemy import extract, func, select
+from app import db
+from models import ArchiveSegment, Category, Transaction, TransactionType
+import data_version
+import sync
+
+PAYLOAD_VERSION = 1
+
+
+def sort_key(row):
+    """History order (date desc nulls last, id desc) as an ascending key."""
+    txn_date = row[1]
+    return (txn_date is None, -txn_date.toordinal() if txn_date else 0, -row[0])
+
+
+def encode(rows):
+    """Compress rows into a segment payload: one JSON array per column, then zlib."""
+    rows = sorted(rows, key=lambda r: (r[1], r[0]))
+    base = rows[0][1].toordinal()
+    categories = sorted({r[2] for r in rows if r[2]})
+    index = {name: i for i, name in enumerate(categories)}
+    columns = {
+        "v": PAYLOAD_VERSION,
+        "base": base,
+        "categories": categories,
+        "id": [r[0] for r in rows],
+        "day": [r[1].toordinal() - base for r in rows],
+        "category": [index.get(r[2], -1) for r in rows],
+        "type": [TransactionType.CODES[r[3]] for r in rows],
+        "cents": [round(r[4] * 100) for r in rows],
+    }
+    return zlib.compress(json.dumps(columns, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def decode_columns(payload):
+    """A segment payload as its column dict (base, categories, id, day, category, type, cents)."""
+    columns = json.loads(zlib.decompress(payload))
+    if columns.get("v") != PAYLOAD_VERSION:
+        raise ValueError(f"Unsupported archive payload version {columns.get('v')!r}")
+    return columns
+
+
+def decode(payload):
+    columns = decode_columns(payload)
+    base, categories, names = columns["base"], columns["categories"], TransactionType.NAMES
+    return [
+        (txn_id, date_cls.fromordinal(base + day), categories[cat] if cat >= 0 else None, names[code], cents / 100)
+        for txn_id, day, cat, code, cents in zip(
+            columns["id"], columns["day"], columns["category"], columns["type"], columns["cents"]
+        )
+    ]
+
+
+def _segment(user_id, year, rows):
+    income = sum(round(r[4] * 100) for r in rows if r[3] == "income")
+    expenses = sum(round(r[4] * 100) for r in rows if r[3] != "income")
+    return ArchiveSegment(
+        user_id=user_id,
+        year=year,
+        first_date=min(r[1] for r in rows),
+        last_date=max(r[1] for r in rows),
+        row_count=len(rows),
+        income_total=income / 100,
+        expenses_total=expenses / 100,
+        payload=encode(rows),
+    )
+
+
+def default_cutoff(config):
+    return date_cls.today() - timedelta(days=config["ARCHIVE_AFTER_DAYS"])
+
+
+def users_to_archive(cutoff):
+    """Ids of users with hot transactions dated before `cutoff`."""
+    return [
+        user_id for (user_id,) in
+        db.session.query(Transaction.user_id).filter(Transaction.date < cutoff).distinct().order_by(Transaction.user_id)
+    ]
+
+
+def archive_user(user_id, cutoff, delete_chunk=1000):
+    """Move one user's transactions dated before `cutoff` into new segments, a year per commit.
+
+    Undated transactions are never archived. Returns the number of rows moved.
+    """
+    years = (
+        db.session.query(extract("year", Transaction.date))
+        .filter(Transaction.user_id == user_id, Transaction.date < cutoff)
+        .distinct()
+        .all()
+    )
+    moved = 0
+    for year in sorted(int(y) for (y,) in years):
+        end = min(cutoff, date_cls(year + 1, 1, 1))
+        rows = [
+            tuple(row) for row in
+            db.session.query(Transaction.id, Transaction.date, Category.name, Transaction.type, Transaction.amount)
+            .outerjoin(Category, Category.id == Transaction.category_id)
+            .filter(Transaction.user_id == user_id, Transaction.date >= date_cls(year, 1, 1), Transaction.date < end)
+            .all()
+        ]
+        if not rows:
+            continue
+        # a client that has not yet synced the latest change to these rows cannot get it from
+        # /changes any more (segments keep no versions), so such cursors expire
+        sync.raise_floor(user_id, (
+            db.session.query(func.max(Transaction.version))
+            .filter(Transaction.user_id == user_id, Transaction.date >= date_cls(year, 1, 1), Transaction.date < end)
+            .scalar()
+        ))
+        db.session.add(_segment(user_id, year, rows))
+        ids = [row[0] for row in rows]
+        for start in range(0, len(ids), delete_chunk):
+            Transaction.query.filter(Transaction.id.in_(ids[start:start + delete_chunk])).delete(
+                synchronize_session=False
+            )
+        data_version.bump(user_id)
+        db.session.commit()
+        moved += len(rows)
+    return moved
+
+
+def compact_user(user_id):
+    """Rewrite every year that has several segments as a single one. Returns years compacted."""
+    years = (
+        db.session.query(ArchiveSegment.year)
+        .filter_by(user_id=user_id)
+        .group_by(ArchiveSegment.year)
+        .having(func.count(ArchiveSegment.id) > 1)
+        .all()
+    )
+    for (year,) in years:
+        segments = ArchiveSegment.query.filter_by(user_id=user_id, year=year).all()
+        rows = [row for segment in segments for row in decode(segment.payload)]
+        for segment in segments:
+            db.session.delete(segment)
+        db.session.add(_segment(user_id, year, rows))
+        db.session.commit()
+    return len(years)
+
+
+def bounds(user_id):
+    """(first_date, last_date) covered by the user's archive, or None if it is empty."""
+    first, last = (
+        db.session.query(func.min(ArchiveSegment.first_date), func.max(ArchiveSegment.last_date))
+        .filter(ArchiveSegment.user_id == user_id)
+        .one()
+    )
+    return (first, last) if first else None
+
+
+def _date_range(filters, cursor=None, floor=None):
+    """Inclusive (low, high) date range a query can return, None meaning unbounded."""
+    low = high = None
+    if "month" in filters:
+        low, end = filters["month"]
+        high = end - timedelta(days=1)
+    if "start_date" in filters:
+        low = max(low, filters["start_date"]) if low else filters["start_date"]
+    if "end_date" in filters:
+        high = min(high, filters["end_date"]) if high else filters["end_date"]
+    if cursor and cursor[0]:
+        high = min(high, cursor[0]) if high else cursor[0]
+    if floor:
+        low = max(low, floor) if low else floor
+    return low, high
+
+
+def reaches(user_id, filters, cursor=None, floor=None):
+    """Whether a query can include archived rows.
+
+    `cursor` is a decoded history cursor; `floor` is the oldest date already on a full page of
+    hot rows, below which archived rows cannot make it onto that page.
+    """
+    if cursor and cursor[0] is None:
+        return False  # past the dated rows: only undated (never archived) rows remain
+    archived = bounds(user_id)
+    if not archived:
+        return False
+    low, high = _date_range(filters, cursor, floor)
+    return (high is None or high >= archived[0]) and (low is None or low <= archived[1])
+
+
+def _matches_search(search, txn_date, category, txn_type, amount):
+    """Python side of finance.search_condition for a decoded archive row."""
+    return (
+        (category or "").lower().startswith(search["text"])
+        or txn_type in search["types"]
+        or ("amount" in search and round(amount, 2) == search["amount"])
+        or ("month" in search and search["month"][0] <= txn_date < search["month"][1])
+        or ("month_of_year" in search and txn_date.month == search["month_of_year"])
+    )
+
+
+def _matches(row, filters, cursor):
+    txn_id, txn_date, category, txn_type, amount = row
+    if "search" in filters and not _matches_search(filters["search"], txn_date, category, txn_type, amount):
+        return False
+    if "type" in filters and txn_type != filters["type"]:
+        return False
+    if "category" in filters and filters["category"].lower() not in (category or "").lower():
+        return False
+    if "month" in filters and not filters["month"][0] <= txn_date < filters["month"][1]:
+        return False
+    if "start_date" in filters and txn_date < filters["start_date"]:
+        return False
+    if "end_date" in filters and txn_date > filters["end_date"]:
+        return False
+    if cursor:
+        last_date, last_id = cursor
+        if last_date is None or not (txn_date < last_date or (txn_date == last_date and txn_id < last_id)):
+            return False
+    return True
+
+
+def rows(user_id, filters, cursor=None, floor=None, limit=None):
+    """Archived rows matching the history filters/cursor, in history order.
+
+    With `limit`, only the first `limit` rows are returned. Segments are then read newest
+    first (by last_date), streamed from one query, and decoding stops as soon as the
+    remaining segments end before the limit-th row found so far, so a page costs the
+    segments it needs rather than the whole archive in range.
+    """
+    low, high = _date_range(filters, cursor, floor)
+    query = select(ArchiveSegment.last_date, ArchiveSegment.payload).where(ArchiveSegment.user_id == user_id)
+    if low:
+        query = query.where(ArchiveSegment.last_date >= low)
+    if high:
+        query = query.where(ArchiveSegment.first_date <= high)
+    query = query.order_by(ArchiveSegment.last_date.desc(), ArchiveSegment.id.desc())
+
+    found = []
+    result = db.session.execute(query, execution_options={"yield_per": 1})
+    try:
+        for last_date, payload in result:
+            if limit and len(found) >= limit and last_date < found[limit - 1][1]:
+                break  # every remaining segment is older than the rows already kept
+            found.extend(row for row in decode(payload) if _matches(row, filters, cursor))
+            if limit:
+                found = heapq.nsmallest(limit, found, key=sort_key)
+    finally:
+        result.close()
+    found.sort(key=sort_key)
+    return found
+
+
+def merge(hot_rows, cold_rows, limit=None):
+    """Merge two row streams that are each in history order."""
+    merged = heapq.merge(hot_rows, cold_rows, key=sort_key)
+    return list(heapq.nsmallest(limit, merged, key=sort_key)) if limit else merged
+
+
+def summary_rows(user_id, filters):
+    """Archived (year, month, type, total) and (type, category, total, count) groups."""
+    months = defaultdict(int)
+    categories = defaultdict(lambda: [0, 0])
+    for _, txn_date, category, txn_type, amount in rows(user_id, filters):
+        cents = round(amount * 100)
+        months[(txn_date.year, txn_date.month, txn_type)] += cents
+        group = categories[(txn_type, category)]
+        group[0] += cents
+        group[1] += 1
+    return (
+        [(y, m, t, cents / 100) for (y, m, t), cents in months.items()],
+        [(t, c, cents / 100, count) for (t, c), (cents, count) in categories.items()],
+    )
+
+
+def rollup_deltas(user_id=None):
+    """{user_id: {rollup_key: (total, count)}} contributed by archived rows."""
+    from rollups import rollup_key
+
+    deltas = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    segments = ArchiveSegment.query
+    if user_id is not None:
+        segments = segments.filter_by(user_id=user_id)
+    for segment in segments:
+        for _, txn_date, category, txn_type, amount in decode(segment.payload):
+            delta = deltas[segment.user_id][rollup_key(txn_date, txn_type, category)]
+            delta[0] += round(amount * 100)
+            delta[1] += 1
+    return {
+        uid: {key: (cents / 100, count) for key, (cents, count) in keys.items()}
+        for uid, keys in deltas.items()
+    }
+
+
+def yearly_totals(user_id):
+    """Per-year archived row counts and totals, straight from the segment metadata."""
+    grouped = (
+        db.session.query(
+            ArchiveSegment.year,
+            func.count(ArchiveSegment.id),
+            func.sum(ArchiveSegment.row_count),
+            func.sum(ArchiveSegment.income_total),
+            func.sum(ArchiveSegment.expenses_total),
+            func.min(ArchiveSegment.first_date),
+            func.max(ArchiveSegment.last_date),
+        )
+        .filter(ArchiveSegment.user_id == user_id)
+        .group_by(ArchiveSegment.year)
+        .order_by(ArchiveSegment.year)
+        .all()
+    )
+    return [
+        {
+            "year": year,
+            "segments": segments,
+            "count": int(count),
+            "income": income,
+            "expenses": expenses,
+            "first_date": first.isoformat(),
+            "last_date": last.isoformat(),
+        }
+        for year, segments, count, income, expenses, first, last in grouped
+    ]
+
+
+def segment_columns(user_ids):
+    """(user_id, column dict) for every archived segment of the users, for readers that work on columns."""
+    query = db.session.query(ArchiveSegment.user_id, ArchiveSegment.payload).filter(ArchiveSegment.user_id.in_(user_ids))
+    for user_id, payload in query:
+        yield user_id, decode_columns(payload)
+
+
+def delete_user(user_id):
+    ArchiveSegment.query.filter_by(user_id=user_id).delete(synchronize_session=False)
@@ -0,0 +1,254 @@
+"""ASGI entry point: the same API, with the finance endpoints on async database drivers.
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+
+Requests under /api/finance/ run the finance blueprint's own views, so routes, JSON, ETags,
+caching and JWT handling are exactly those of the gunicorn app. The difference is where the
+SQL goes: each request runs in a greenlet through SQLAlchemy's asyncio bridge, with db.session
+pointed at async engines (asyncpg for PostgreSQL, aiosqlite for SQLite) via
+database.async_binds. Every statement then awaits the driver, and while one request waits on
+the database the event loop serves the others, so one process keeps many dashboard loads in
+flight without adding workers. Connections come from the async engines' own pools
+(DB_POOL_SIZE + DB_MAX_OVERFLOW per process), which bound how many requests query at once.
+
+Everything else (auth, /metrics, /healthz, /readyz, /profiles) and the CSV import go to the
+WSGI app on a pool of ASGI_THREADS threads with the regular engines: bcrypt and CSV parsing
+are CPU-bound and would stall the event loop.
+
+View code runs on the event loop between statements, so anything else in it that blocks
+(e.g. a Redis response cache, CACHE_BACKEND=redis) holds up every request on the loop for that
+long, and a profiled request's cProfile output includes the requests interleaved with it.
+Request bodies are buffered (to disk past 1 MiB) before the view runs.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.util import greenlet_spawn
+from database import async_binds, trace_engine
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+ASYNC_PREFIX = "/api/finance/"
+THREADED_PATHS = ("/api/finance/import",)
+
+
+def async_url(url):
+    """The same database URL with its async driver (postgresql+asyncpg, sqlite+aiosqlite)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} databases")
+    query = dict(url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")  # asyncpg's name for libpq's sslmode
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}", query=query)
+
+
+def async_engine_options(options):
+    """Engine options from config.engine_options() for the async drivers.
+
+    libpq's `-c name=value` connect options become asyncpg server_settings.
+    """
+    options = {k: v for k, v in options.items() if k != "url"}
+    connect_args = dict(options.pop("connect_args", {}))
+    libpq_options = connect_args.pop("options", "").split()
+    settings = dict(
+        value.split("=", 1) for flag, value in zip(libpq_options[::2], libpq_options[1::2]) if flag == "-c"
+    )
+    if settings:
+        connect_args["server_settings"] = settings
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def wsgi_environ(scope, body):
+    """A WSGI environ for an ASGI HTTP scope whose body has been read into `body`."""
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = scope["client"][0], str(scope["client"][1])
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class ResponseStart:
+    """WSGI start_response that keeps the status and headers for the ASGI response."""
+
+    def __init__(self):
+        self.status = 500
+        self.headers = []
+
+    def __call__(self, status, headers, exc_info=None):
+        self.status = int(status.split(" ", 1)[0])
+        self.headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        return self._write
+
+    @staticmethod
+    def _write(data):
+        raise NotImplementedError("the WSGI write() callable is not supported")
+
+
+class AsyncFinanceApp:
+    """ASGI application wrapping the Flask app (see the module docstring)."""
+
+    def __init__(self):
+        self.flask_app = None
+        self.engines = None
+        self.binds = None  # bind key -> sync facade of the async engine, for RoutingSession
+        self.executor = None
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return  # no websockets
+        await self._startup()
+
+        body = await self._read_body(receive)
+        if body is None:
+            return  # client went away before sending the whole body
+        environ = wsgi_environ(scope, body)
+        path = scope["path"]
+        try:
+            if path.startswith(ASYNC_PREFIX) and not path.startswith(THREADED_PATHS):
+                await self._run_async(environ, send)
+            else:
+                await self._run_threaded(environ, send)
+        finally:
+            body.close()
+
+    # --- lifecycle ---
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self._startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": repr(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self._shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _startup(self):
+        if self.engines is not None:
+            return
+        async with self._lock:
+            if self.engines is not None:
+                return
+            from app import db, get_app
+            from metrics import metrics
+
+            flask_app = self.flask_app = get_app()
+            config = flask_app.config
+            self.executor = ThreadPoolExecutor(max_workers=config["ASGI_THREADS"], thread_name_prefix="wsgi")
+
+            engines = {}
+            with flask_app.app_context():
+                for bind, engine in db.engines.items():
+                    options = config["SQLALCHEMY_BINDS"][bind] if bind else config["SQLALCHEMY_ENGINE_OPTIONS"]
+                    options = options if isinstance(options, dict) else {}
+                    engines[bind] = create_async_engine(async_url(engine.url), **async_engine_options(options))
+            for bind, engine in engines.items():
+                # the SQL accounting, query budgets and metrics hook the sync facade of each engine
+                trace_engine(engine.sync_engine)
+                if config.get("METRICS_ENABLED", True):
+                    metrics.instrument_engine(engine.sync_engine, f"{bind or 'default'}-async")
+            self.binds = {bind: engine.sync_engine for bind, engine in engines.items()}
+            self.engines = engines
+
+    async def _shutdown(self):
+        if self.engines:
+            for engine in self.engines.values():
+                await engine.dispose()
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+    # --- requests ---
+
+    @staticmethod
+    async def _read_body(receive):
+        body = SpooledTemporaryFile(max_size=1024 * 1024)
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                body.close()
+                return None
+            body.write(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body.seek(0)
+        return body
+
+    async def _run_async(self, environ, send):
+        """Run the view in a greenlet with db.session on the async engines; stream its body."""
+        token = async_binds.set(self.binds)
+        start = ResponseStart()
+        chunks = None
+        try:
+            chunks = await greenlet_spawn(self.flask_app, environ, start)
+            await send({"type": "http.response.start", "status": start.status, "headers": start.headers})
+            iterator = iter(chunks)
+            while True:
+                # a streamed body (the CSV export) may run SQL between chunks
+                chunk = await greenlet_spawn(next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            if hasattr(chunks, "close"):
+                await greenlet_spawn(chunks.close)
+            async_binds.reset(token)
+
+    def _call_wsgi(self, environ):
+        start = ResponseStart()
+        chunks = self.flask_app(environ, start)
+        try:
+            return start, b"".join(chunks)
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    async def _run_threaded(self, environ, send):
+        """Run the request on the WSGI app in the thread pool, with the regular engines."""
+        loop = asyncio.get_running_loop()
+        start, body = await loop.run_in_executor(self.executor, self._call_wsgi, environ)
+        await send({"type": "http.response.start", "status": start.status, "headers": start.headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+app = AsyncFinanceApp()
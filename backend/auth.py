@@ -2,22 +2,22 @@ from flask import Blueprint, request, jsonify, current_app, url_for
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app import db
 from models import User
-from flask_mail import Mail, Message
+import outbox
+from cache import response_cache
+from hashing import HashingBusy
+from database import use_replica, query_budget
 from datetime import datetime, timedelta
 import secrets
 
 auth_bp = Blueprint("auth", __name__)
 
-mail = Mail()
-
-def init_mail(app):
-    mail.init_app(app)
-
-@auth_bp.before_app_request
-def init_mail():
-    mail.init_app(current_app)
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    # password hashing pool is saturated: fail fast rather than queue behind it
+    return jsonify({"msg": "Server is busy, please try again shortly"}), 503, {"Retry-After": "2"}
 
 @auth_bp.route("/register", methods=["POST"])
+@query_budget(3)
 def register():
     data = request.get_json() or {}
     username = data.get("username")
@@ -39,6 +39,7 @@ def register():
     return jsonify({"msg": "User registered successfully"}), 201
 
 @auth_bp.route("/login", methods=["POST"])
+@query_budget(3)
 def login():
     data = request.get_json() or {}
     username = data.get("username")
@@ -51,11 +52,18 @@ def login():
     if not user or not user.check_password(password):
         return jsonify({"msg": "Invalid credentials"}), 401
 
+    # transparently upgrade hashes made with a different BCRYPT_LOG_ROUNDS
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+
     token = create_access_token(identity=str(user.id))
     return jsonify({"token": token, "user": {"id": user.id, "username": user.username, "name": user.name}}), 200
 
 @auth_bp.route("/me", methods=["GET"])
 @jwt_required()
+@use_replica
+@query_budget(1)
 def me():
     user_id = get_jwt_identity()
     user = User.query.get(int(user_id))
@@ -64,6 +72,7 @@ def me():
     return jsonify({"id": user.id, "username": user.username, "name": user.name, "email": user.email})
 
 @auth_bp.route("/reset-password", methods=["POST"])
+@query_budget(4)
 def reset_password():
     data = request.get_json() or {}
     email = data.get("email")
@@ -79,17 +88,15 @@ def reset_password():
     if not user:
         return jsonify({"msg": "Email not found"}), 404
 
-    # Check if SMTP is configured
-    print(f"MAIL_USERNAME: {current_app.config.get('MAIL_USERNAME')}")
-    print(f"MAIL_PASSWORD: {current_app.config.get('MAIL_PASSWORD')}")
-    if not current_app.config.get('MAIL_USERNAME') or not current_app.config.get('MAIL_PASSWORD'):
+    # Check if SMTP is configured (a local debugging server needs no credentials)
+    smtp_is_local = current_app.config.get('MAIL_SERVER') in ("localhost", "127.0.0.1")
+    if not smtp_is_local and (not current_app.config.get('MAIL_USERNAME') or not current_app.config.get('MAIL_PASSWORD')):
         return jsonify({"msg": "SMTP credentials not configured"}), 500
 
     # Generate reset token and expiration
     token = secrets.token_urlsafe(32)
     user.reset_token = token
     user.reset_token_expiration = datetime.utcnow() + timedelta(hours=1)
-    db.session.commit()
 
     # Use frontend_url from request body if provided, else use request Origin header, else configured FRONTEND_URL
     frontend_origin = frontend_url or request_origin or current_app.config.get("FRONTEND_URL", "http://localhost:5174")
@@ -102,16 +109,17 @@ def reset_password():
         frontend_origin = current_app.config.get("FRONTEND_URL", "http://localhost:5174")
     frontend_reset_url = frontend_origin + f"/reset-password?token={token}"
 
-    # Send email
-    msg = Message("Password Reset Request",
-                  sender=current_app.config.get('MAIL_DEFAULT_SENDER'),
-                  recipients=[user.email],
-                  body=f"To reset your password, click the following link:\n\n{frontend_reset_url}\n\nIf you did not request this, please ignore this email.")
-    mail.send(msg)
+    # Queue the email in the same transaction as the token; the outbox sender delivers it
+    outbox.enqueue("Password Reset Request",
+                   user.email,
+                   f"To reset your password, click the following link:\n\n{frontend_reset_url}\n\nIf you did not request this, please ignore this email.")
+    db.session.commit()
+    outbox.notify()
 
     return jsonify({"msg": "Password reset link sent!"}), 200
 
 @auth_bp.route("/reset-password/<token>", methods=["POST"])
+@query_budget(3)
 def reset_password_token(token):
     data = request.get_json() or {}
     new_password = data.get("password")
@@ -132,6 +140,7 @@ def reset_password_token(token):
 
 @auth_bp.route("/delete-account", methods=["DELETE", "OPTIONS"])
 @jwt_required(optional=True)  # allow OPTIONS without token
+@query_budget(10)
 def delete_account():
     if request.method == "OPTIONS":
         return "", 200
@@ -153,11 +162,23 @@ def delete_account():
         return jsonify({"msg": "Invalid password"}), 401
 
     try:
-        from models import Transaction
+        from models import Transaction, Category
+        import archive
+        import rollups
+        import data_version
+        import sync
+        import insights
         Transaction.query.filter_by(user_id=int(user_id)).delete()
+        archive.delete_user(int(user_id))
+        sync.delete_user(int(user_id))
+        insights.delete_user(int(user_id))
+        Category.query.filter_by(user_id=int(user_id)).delete()
+        rollups.clear_user(int(user_id))
+        data_version.bump(int(user_id))
 
         db.session.delete(user)
         db.session.commit()
+        response_cache.invalidate_user(int(user_id))
 
         return jsonify({"msg": "Account deleted successfully"}), 200
     except Exception as e:
@@ -0,0 +1,189 @@
+"""Atomic batches of add/update/delete operations on one user's transactions.
+
+A batch is validated as a whole and applied in one DB transaction with set-based SQL: one
+SELECT for the rows it touches, one DELETE ... WHERE id IN (...), one UPDATE ... WHERE id IN
+(...) per distinct set of changed values (so recategorising 300 rows is a single UPDATE), one
+bulk INSERT for the adds, and the summed rollup deltas. The statement count depends on how
+varied the batch is, not on how many rows it touches.
+
+Operations do not see each other: a row may appear in at most one update/delete, and an
+update or delete cannot target a row added in the same batch. If any operation is invalid or
+names an unknown row, nothing is written and every operation's result says why.
+"""
+from collections import defaultdict
+from datetime import date as date_cls, datetime
+from sqlalchemy import delete, insert, select, text, update
+from app import db
+from models import Category, Transaction
+from finance import parse_amount, parse_date, invalid_type
+import data_version
+import rollups
+import serialization
+import sync
+
+class BatchError(Exception):
+    """The batch was rejected; `results` has the per-operation outcome (errors and "skipped")."""
+
+    def __init__(self, results):
+        super().__init__("batch rejected")
+        self.results = results
+
+
+def _date(value):
+    try:
+        return parse_date(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+
+
+def _type(value):
+    error = invalid_type(value)
+    if error:
+        raise ValueError(error)
+    return value
+
+
+def _id(op):
+    value = op.get("id")
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError("id must be an integer")
+    return value
+
+
+def parse_operation(op):
+    """Validate one operation into (kind, id, values); raises ValueError with the reason."""
+    if not isinstance(op, dict):
+        raise ValueError("operation must be an object")
+    kind = op.get("op")
+    if kind == "add":
+        # same defaults as POST /add
+        return kind, None, {
+            "amount": parse_amount(op.get("amount", 0)),
+            "type": _type(op.get("type", "expenses")),
+            "category": op.get("category", "General") or None,
+            "date": _date(op["date"]) if op.get("date") else date_cls.today(),
+        }
+    if kind == "update":
+        values = {}
+        if "amount" in op:
+            values["amount"] = parse_amount(op["amount"])
+        if "type" in op:
+            values["type"] = _type(op["type"])
+        if "category" in op:
+            values["category"] = op["category"] or None
+        if "date" in op:
+            values["date"] = _date(op["date"]) if op["date"] else None
+        return kind, _id(op), values
+    if kind == "delete":
+        return kind, _id(op), {}
+    raise ValueError("op must be add, update or delete")
+
+
+def _row_dict(user_id, txn_id, values):
+    row = (txn_id, values["date"], values["category"], values["type"], values["amount"])
+    return serialization.transaction_rows(user_id, [row])[0]
+
+
+def _limit_statement_time(timeout_ms):
+    """Cap every statement of this DB transaction (PostgreSQL only; SET LOCAL ends with it)."""
+    if timeout_ms and db.session.get_bind().dialect.name == "postgresql":
+        db.session.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+
+
+def apply(user_id, operations, statement_timeout_ms=0):
+    """Apply a list of operation dicts atomically and return their results, in order.
+
+    Raises BatchError (after rolling back) if any operation is rejected. The caller commits.
+    """
+    results = [None] * len(operations)
+    parsed = []
+    claimed = {}
+    for index, op in enumerate(operations):
+        try:
+            kind, txn_id, values = parse_operation(op)
+            if txn_id is not None and txn_id in claimed:
+                raise ValueError(f"transaction {txn_id} is already changed by operation {claimed[txn_id]}")
+        except ValueError as e:
+            results[index] = {"op": op.get("op") if isinstance(op, dict) else None, "index": index,
+                              "status": "error", "msg": str(e)}
+            continue
+        if txn_id is not None:
+            claimed[txn_id] = index
+        parsed.append((index, kind, txn_id, values))
+
+    _limit_statement_time(statement_timeout_ms)
+    # current values of every row the batch updates or deletes, for the rollups and results
+    old = {}
+    if claimed:
+        old = {
+            txn_id: {"date": txn_date, "type": txn_type, "amount": amount, "category": category}
+            for txn_id, txn_date, txn_type, amount, category in db.session.execute(
+                select(Transaction.id, Transaction.date, Transaction.type, Transaction.amount, Category.name)
+                .outerjoin(Category, Category.id == Transaction.category_id)
+                .where(Transaction.user_id == user_id, Transaction.id.in_(claimed))
+            )
+        }
+    for index, kind, txn_id, values in parsed:
+        if txn_id is not None and txn_id not in old:
+            results[index] = {"op": kind, "index": index, "id": txn_id, "status": "error",
+                              "msg": "Transaction not found"}
+    if any(results):
+        db.session.rollback()
+        raise BatchError([result or {"op": operations[i]["op"], "status": "skipped"} for i, result in enumerate(results)])
+
+    version = data_version.bump(user_id)
+    category_ids = Category.ids_for(user_id, {values["category"] for _, kind, _, values in parsed
+                                               if kind != "delete" and values.get("category")})
+    deltas = defaultdict(lambda: [0.0, 0])
+
+    def count(values, sign):
+        delta = deltas[rollups.rollup_key(values["date"], values["type"], values["category"])]
+        delta[0] += values["amount"] * sign
+        delta[1] += sign
+
+    table = Transaction.__table__
+    deleted = [txn_id for _, kind, txn_id, _ in parsed if kind == "delete"]
+    if deleted:
+        db.session.execute(delete(table).where(table.c.user_id == user_id, table.c.id.in_(deleted)))
+        sync.record_deletes(user_id, deleted, version)
+
+    # one UPDATE per distinct set of changes
+    groups = defaultdict(list)
+    for _, kind, txn_id, values in parsed:
+        if kind == "update":
+            changes = {k: (category_ids.get(v) if k == "category" and v else v) for k, v in values.items()}
+            groups[tuple(sorted(changes.items()))].append(txn_id)
+    for changes, txn_ids in groups.items():
+        columns = {("category_id" if k == "category" else k): v for k, v in changes}
+        db.session.execute(
+            update(table).where(table.c.user_id == user_id, table.c.id.in_(txn_ids))
+            .values(**columns, version=version, updated_at=datetime.utcnow())
+        )
+
+    adds = [(index, values) for index, kind, _, values in parsed if kind == "add"]
+    new_ids = []
+    if adds:
+        # ids come back in operation order: batched INSERT ... RETURNING on PostgreSQL, while
+        # SQLite can only keep the order by inserting row by row
+        new_ids = db.session.execute(
+            insert(table).returning(table.c.id, sort_by_parameter_order=True),
+            [{"user_id": user_id, "amount": values["amount"], "type": values["type"],
+              "category_id": category_ids.get(values["category"]), "date": values["date"], "version": version}
+             for _, values in adds],
+        ).scalars().all()
+
+    for index, kind, txn_id, values in parsed:
+        if kind == "delete":
+            count(old[txn_id], -1)
+            results[index] = {"op": kind, "id": txn_id, "status": "deleted"}
+        elif kind == "update":
+            new = {**old[txn_id], **values}
+            count(old[txn_id], -1)
+            count(new, 1)
+            results[index] = {"op": kind, "id": txn_id, "status": "updated", "transaction": _row_dict(user_id, txn_id, new)}
+    for (index, values), txn_id in zip(adds, new_ids):
+        count(values, 1)
+        results[index] = {"op": "add", "id": txn_id, "status": "created", "transaction": _row_dict(user_id, txn_id, values)}
+
+    rollups.record_many(user_id, {key: tuple(delta) for key, delta in deltas.items() if delta[1] or abs(delta[0]) > 1e-9})
+    return results
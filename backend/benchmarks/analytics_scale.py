@@ -0,0 +1,110 @@
+"""Time the analytics endpoint's load and compute steps at growing transaction counts.
+
+    python benchmarks/analytics_scale.py --rows 10000,100000,1000000
+    python benchmarks/analytics_scale.py --rows 10000,100000 --python --json /tmp/analytics.json
+
+For each size one user gets that many datagen transactions in a recreated SQLite database.
+The table shows the best of --repeat runs of analytics.load() (the query and the column
+arrays), analytics.compute() (every metric) and the whole /api/finance/analytics request,
+with microseconds per row. Flat per-row numbers mean the cost grows linearly with the rows.
+--python also times a plain-Python loop over the same columns computing the monthly and
+per-category sums, for comparison with the vectorised compute step.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import datagen  # noqa: E402
+
+
+def best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def python_sums(columns):
+    """The monthly and per-category sums of analytics.compute(), one row at a time."""
+    import analytics
+
+    day, cents, income, category = (column.tolist() for column in columns[:4])
+    months, categories = {}, {}
+    for d, amount, is_income, code in zip(day, cents, income, category):
+        month = analytics.date_cls.fromordinal(d + analytics.EPOCH_ORDINAL).strftime("%Y-%m")
+        totals = months.setdefault(month, [0, 0])
+        totals[0 if is_income else 1] += amount
+        if not is_income:
+            categories[code] = categories.get(code, 0) + amount
+    return months, categories
+
+
+def measure(app, rows, repeat, with_python, seed):
+    from app import db
+    import analytics
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.engine.dispose()
+    datagen.populate(app, 1, rows, seed=seed)
+
+    with app.app_context():
+        load_ms, columns = best_of(repeat, lambda: analytics.load(1))
+        compute_ms, _ = best_of(repeat, lambda: analytics.compute(columns))
+        python_ms = best_of(repeat, lambda: python_sums(columns))[0] if with_python else None
+    client = app.test_client()
+    request_ms, response = best_of(repeat, lambda: client.get("/api/finance/analytics"))
+    if response.status_code != 200:
+        raise RuntimeError(f"/api/finance/analytics answered {response.status_code}")
+    return {"rows": rows, "load_ms": round(load_ms, 2), "compute_ms": round(compute_ms, 2),
+            "request_ms": round(request_ms, 2), "python_ms": round(python_ms, 2) if python_ms else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="10000,100000,1000000", help="comma-separated transaction counts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--python", action="store_true", help="also time a plain-Python loop")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    os.environ["CACHE_BACKEND"] = "none"
+    os.environ["MAIL_OUTBOX_WORKER"] = "False"
+
+    from app import create_app
+
+    app = create_app()
+    results = []
+    print(f"{'rows':>9} {'load ms':>9} {'us/row':>7} {'compute ms':>11} {'us/row':>7} "
+          f"{'request ms':>11} {'us/row':>7} {'python ms':>10}")
+    for rows in (int(r) for r in args.rows.split(",")):
+        r = measure(app, rows, args.repeat, args.python, args.seed)
+        results.append(r)
+        python = f"{r['python_ms']:>10.1f}" if r["python_ms"] is not None else f"{'-':>10}"
+        print(f"{rows:>9} {r['load_ms']:>9.1f} {r['load_ms'] * 1000 / rows:>7.2f} "
+              f"{r['compute_ms']:>11.1f} {r['compute_ms'] * 1000 / rows:>7.3f} "
+              f"{r['request_ms']:>11.1f} {r['request_ms'] * 1000 / rows:>7.2f} {python}")
+
+    tmp.cleanup()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
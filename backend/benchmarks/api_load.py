@@ -0,0 +1,263 @@
+"""Drive the API through create_app() and report latency percentiles, throughput and peak RSS.
+
+    python benchmarks/api_load.py --users 20 --transactions 5000 --requests 200
+    python benchmarks/api_load.py --save-baseline sqlite-default
+    python benchmarks/api_load.py --compare sqlite-default --threshold 0.25
+
+By default the database is a fresh SQLite file in a temp directory, filled by datagen.py
+with the same seed every run. Pass --database-url postgresql://... to run against Postgres;
+its tables are dropped and recreated, so the URL must point at a throwaway database and
+--reset must be given. Requests go through Flask's test client, so the numbers cover the
+app, SQLAlchemy and the database but not a WSGI server or the network.
+
+Each scenario runs --requests requests after a short warm-up. Baselines are JSON files in
+benchmarks/baselines/; --compare exits 1 when any scenario's p95 (or throughput) is worse
+than the baseline by more than --threshold, ignoring changes smaller than --min-delta-ms.
+Latencies depend on the machine, so compare against a baseline recorded on the same host
+(baselines/sqlite-default.json came from a 1-CPU container). The response cache is disabled
+unless --cache is given, so repeated reads hit the database.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datagen  # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+HISTORY_FILTERS = ["", "&type=expenses", "&type=income", "&category=food", "&month=2025-06",
+                   "&start_date=2024-01-01&end_date=2024-12-31"]
+
+
+def peak_rss_mib():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Scenarios:
+    """One method per endpoint; each call issues a single request and returns the response."""
+
+    def __init__(self, client, rng, user_count):
+        self.client = client
+        self.rng = rng
+        self.user_count = user_count
+        self.added = []
+        self.cursor = None
+        self.token = None
+
+    def add(self):
+        rng = self.rng
+        response = self.client.post("/api/finance/add", json={
+            "amount": round(rng.uniform(50, 5000), 2),
+            "type": rng.choice(["expenses", "expenses", "expenses", "income"]),
+            "category": rng.choice(["Food", "Transport", "Shopping", "Bench"]),
+            "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        })
+        if response.status_code == 201:
+            self.added.append(response.get_json()["transaction"]["id"])
+        return response
+
+    def history(self):
+        return self.client.get(f"/api/finance/history?limit=50{self.rng.choice(HISTORY_FILTERS)}")
+
+    def history_pages(self):
+        # walk forward with the cursor, starting over at the end
+        url = "/api/finance/history?limit=50" + (f"&cursor={self.cursor}" if self.cursor else "")
+        response = self.client.get(url)
+        self.cursor = (response.get_json() or {}).get("next_cursor")
+        return response
+
+    def summary(self):
+        return self.client.get(f"/api/finance/summary?{self.rng.choice(HISTORY_FILTERS).lstrip('&')}")
+
+    def update(self):
+        if not self.added:  # only when run with --only
+            self.add()
+        tx_id = self.rng.choice(self.added)
+        return self.client.put(f"/api/finance/{tx_id}", json={
+            "amount": round(self.rng.uniform(50, 5000), 2), "category": self.rng.choice(["Food", "Bench"]),
+        })
+
+    def delete(self):
+        if not self.added:
+            self.add()
+        return self.client.delete(f"/api/finance/{self.added.pop()}")
+
+    def login(self):
+        username, _ = datagen.users(self.user_count)[self.rng.randrange(self.user_count)]
+        response = self.client.post("/api/auth/login", json={"username": username, "password": datagen.PASSWORD})
+        if response.status_code == 200:
+            self.token = response.get_json()["token"]
+        return response
+
+    def me(self):
+        if not self.token:
+            self.login()
+        return self.client.get("/api/auth/me", headers={"Authorization": f"Bearer {self.token}"})
+
+
+# (name, method, warm-up requests); order matters: update/delete use rows made by add, me uses login's token
+PLAN = [
+    ("add", "add", 5),
+    ("history", "history", 5),
+    ("history_pages", "history_pages", 5),
+    ("summary", "summary", 5),
+    ("update", "update", 5),
+    ("delete", "delete", 5),
+    ("login", "login", 1),
+    ("me", "me", 5),
+]
+
+
+def run_scenario(scenarios, method, requests, warmup):
+    call = getattr(scenarios, method)
+    for _ in range(warmup):
+        call()
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        response = call()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Return human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        delta = current["p95_ms"] - before["p95_ms"]
+        if delta > min_delta_ms and current["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < before["throughput_rps"] / (1 + threshold) and delta > min_delta_ms:
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=5000, help="transactions per user")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=None, help="default: a temporary SQLite file")
+    parser.add_argument("--reset", action="store_true", help="allow dropping all tables at --database-url")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="override BCRYPT_LOG_ROUNDS for /login")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--only", action="append", default=None, help="run only these scenarios (repeatable)")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    parser.add_argument("--save-baseline", default=None, metavar="NAME")
+    parser.add_argument("--compare", default=None, metavar="NAME")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore p95 changes smaller than this")
+    args = parser.parse_args()
+
+    if args.database_url and not args.reset:
+        parser.error("--database-url drops and recreates every table there; pass --reset to confirm")
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    os.environ["CACHE_BACKEND"] = "memory" if args.cache else "none"
+    os.environ["MAIL_OUTBOX_WORKER"] = "False"
+    os.environ.setdefault("QUERY_BUDGET_ENFORCE", "raise")  # a view over its SQL budget counts as an error
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_LOG_ROUNDS"] = str(args.bcrypt_rounds)
+
+    from app import create_app, db
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        dialect = db.engine.dialect.name
+
+    started = time.perf_counter()
+    datagen.populate(app, args.users, args.transactions, seed=args.seed)
+    print(f"Generated {args.users} users x {args.transactions} transactions on {dialect} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    scenarios = Scenarios(app.test_client(), random.Random(args.seed), args.users)
+    results = {
+        "meta": {
+            "dialect": dialect, "users": args.users, "transactions": args.transactions,
+            "requests": args.requests, "seed": args.seed, "cache": args.cache,
+            "bcrypt_rounds": app.config["BCRYPT_LOG_ROUNDS"],
+            "python": platform.python_version(), "machine": platform.machine(),
+        },
+        "scenarios": {},
+    }
+    print(f"{'scenario':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'errors':>6} {'rss MiB':>8}")
+    for name, method, warmup in PLAN:
+        if args.only and name not in args.only:
+            continue
+        stats = run_scenario(scenarios, method, args.requests, warmup)
+        results["scenarios"][name] = stats
+        print(f"{name:<14} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{stats['throughput_rps']:>8.1f} {stats['errors']:>6} {stats['peak_rss_mib']:>8.1f}")
+    results["meta"]["peak_rss_mib"] = round(peak_rss_mib(), 1)
+    tmp.cleanup()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline {path}")
+
+    failed = any(stats["errors"] for stats in results["scenarios"].values())
+    if failed:
+        print("❌ some requests returned errors")
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["dialect"] != dialect:
+            print(f"⚠️ baseline was recorded on {baseline['meta']['dialect']}, this run is on {dialect}")
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        for line in regressions:
+            print(f"❌ regression {line}")
+        if regressions:
+            failed = True
+        else:
+            print(f"✅ within {args.threshold:.0%} of baseline {args.compare}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
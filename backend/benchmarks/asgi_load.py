@@ -0,0 +1,273 @@
+"""Compare the gunicorn sync workers with the ASGI entry point under concurrent dashboard loads.
+
+    python benchmarks/asgi_load.py --concurrency 1,8,32,64 --duration 10
+    python benchmarks/asgi_load.py --db-latency-ms 2 --json /tmp/asgi.json
+
+Both servers run as real processes on local ports against the same database: gunicorn with
+--workers sync workers (as deployed, see render.yaml) and uvicorn with one asgi:app process.
+Each client thread keeps one connection and repeats a dashboard load (summary, the first
+history page and the category list, one after the other) for --duration seconds per
+concurrency level; the table shows loads per second and per-load latency percentiles, plus
+the servers' resident memory at the end.
+
+SQLite answers in microseconds, which hides what the async mode is for: waiting on a database
+across a network. --db-latency-ms adds that round trip to every statement, as time.sleep() on
+the sync engines and as an awaited asyncio.sleep() on the async ones. Pass --database-url
+postgresql://... --reset to measure a real server instead (its tables are dropped and
+recreated). The response cache is disabled so every load reaches the database.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import datagen  # noqa: E402
+from api_load import percentile  # noqa: E402
+
+DASHBOARD = ["/api/finance/summary", "/api/finance/history?limit=50", "/api/finance/categories"]
+
+
+# --- the apps the server processes load (gunicorn asgi_load:wsgi_app, uvicorn asgi_load:asgi_app) ---
+
+def _delay_seconds():
+    return float(os.environ.get("BENCH_DB_LATENCY_MS") or 0) / 1000
+
+
+def _add_sync_latency(engine, seconds):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sleep(*args):
+        time.sleep(seconds)
+
+
+def _add_async_latency(engine, seconds):
+    import asyncio
+    from sqlalchemy import event
+    from sqlalchemy.util import await_only
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sleep(*args):
+        await_only(asyncio.sleep(seconds))
+
+
+def _wsgi_app():
+    from app import db, get_app
+
+    flask_app = get_app()
+    if _delay_seconds():
+        with flask_app.app_context():
+            for engine in db.engines.values():
+                _add_sync_latency(engine, _delay_seconds())
+    return flask_app
+
+
+def _asgi_app():
+    import asgi
+
+    async def delayed(scope, receive, send):
+        if asgi.app.engines is None:
+            await asgi.app._startup()
+            if _delay_seconds():
+                for engine in asgi.app.engines.values():
+                    _add_async_latency(engine.sync_engine, _delay_seconds())
+        await asgi.app(scope, receive, send)
+
+    return delayed if _delay_seconds() else asgi.app
+
+
+def __getattr__(name):
+    if name == "wsgi_app":
+        return _wsgi_app()
+    if name == "asgi_app":
+        return _asgi_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# --- servers and load ---
+
+def server_command(kind, port, workers):
+    if kind == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "--pythonpath", f"{BACKEND_DIR},{BENCH_DIR}",
+                "--workers", str(workers), "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+                "asgi_load:wsgi_app"]
+    return [sys.executable, "-m", "uvicorn", "--app-dir", BENCH_DIR, "--host", "127.0.0.1", "--port", str(port),
+            "--no-access-log", "--log-level", "warning", "asgi_load:asgi_app"]
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/api/finance/categories")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not come up")
+
+
+def process_tree_rss_mib(pid):
+    """Resident memory of `pid` and its children (Linux /proc; None elsewhere)."""
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pending += [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):
+        return None
+    return round(total / 1024, 1)
+
+
+def run_level(port, concurrency, duration, warmup):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        mine = []
+        failed = 0
+        while True:
+            t0 = time.perf_counter()
+            if t0 >= stop_at:
+                break
+            ok = True
+            for path in DASHBOARD:
+                try:
+                    conn.request("GET", path)
+                    response = conn.getresponse()
+                    response.read()
+                    ok = ok and response.status == 200
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    ok = False
+            if t0 >= measure_from:
+                mine.append((time.perf_counter() - t0) * 1000)
+                failed += not ok
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        "loads": len(latencies),
+        "errors": errors[0],
+        "loads_per_second": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=2000, help="transactions per user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", default="1,8,32,64", help="comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds per level")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn sync workers")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated round trip per statement")
+    parser.add_argument("--database-url", default=None, help="default: a temporary SQLite file")
+    parser.add_argument("--reset", action="store_true", help="allow dropping all tables at --database-url")
+    parser.add_argument("--only", choices=["gunicorn", "uvicorn"], action="append", default=None)
+    parser.add_argument("--port", type=int, default=8731, help="first of the two ports used")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.database_url and not args.reset:
+        parser.error("--database-url drops and recreates every table there; pass --reset to confirm")
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    os.environ["CACHE_BACKEND"] = "none"
+    os.environ["MAIL_OUTBOX_WORKER"] = "False"
+    os.environ["BENCH_DB_LATENCY_MS"] = str(args.db_latency_ms)
+
+    from app import create_app, db
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        dialect = db.engine.dialect.name
+        db.engine.dispose()
+    datagen.populate(app, args.users, args.transactions, seed=args.seed)
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = {
+        "meta": {
+            "dialect": dialect, "users": args.users, "transactions": args.transactions,
+            "workers": args.workers, "db_latency_ms": args.db_latency_ms, "duration": args.duration,
+            "dashboard": DASHBOARD,
+        },
+        "servers": {},
+    }
+    print(f"{args.users} users x {args.transactions} transactions on {dialect}, "
+          f"{args.db_latency_ms} ms added per statement")
+    print(f"{'server':<22} {'clients':>7} {'loads/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+
+    for offset, kind in enumerate(["gunicorn", "uvicorn"]):
+        if args.only and kind not in args.only:
+            continue
+        label = f"gunicorn sync x{args.workers}" if kind == "gunicorn" else "uvicorn asgi x1"
+        port = args.port + offset
+        server = subprocess.Popen(server_command(kind, port, args.workers), cwd=BACKEND_DIR)
+        try:
+            wait_until_up(port)
+            levels_out = {}
+            for concurrency in levels:
+                stats = run_level(port, concurrency, args.duration, args.warmup)
+                levels_out[str(concurrency)] = stats
+                print(f"{label:<22} {concurrency:>7} {stats['loads_per_second']:>8.1f} {stats['p50_ms'] or 0:>8.1f} "
+                      f"{stats['p95_ms'] or 0:>8.1f} {stats['p99_ms'] or 0:>8.1f} {stats['errors']:>6}")
+            rss = process_tree_rss_mib(server.pid)
+            results["servers"][label] = {"levels": levels_out, "rss_mib": rss}
+            if rss is not None:
+                print(f"{label:<22} resident memory {rss} MiB")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    tmp.cleanup()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    failed = any(stats["errors"] for server in results["servers"].values() for stats in server["levels"].values())
+    if failed:
+        print("❌ some dashboard loads failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
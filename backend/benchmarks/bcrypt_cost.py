@@ -0,0 +1,44 @@
+"""Report bcrypt hashes/second per work factor, to pick BCRYPT_LOG_ROUNDS.
+
+    python benchmarks/bcrypt_cost.py --min-cost 8 --max-cost 14 --threads 2
+
+Each cost level is timed for roughly --seconds of wall time, once on a single thread and once
+spread over --threads threads (bcrypt releases the GIL, so this approximates HASH_WORKERS).
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+PASSWORD = b"correct horse battery staple"
+
+
+def hashes_per_second(cost, seconds, threads):
+    salt = bcrypt.gensalt(rounds=cost)
+    done = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while time.perf_counter() - started < seconds:
+            list(pool.map(lambda _: bcrypt.hashpw(PASSWORD, salt), range(threads)))
+            done += threads
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-cost", type=int, default=8)
+    parser.add_argument("--max-cost", type=int, default=14)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'cost':>4}  {'ms/hash':>9}  {'hashes/s':>9}  {f'hashes/s x{args.threads}':>14}")
+    for cost in range(args.min_cost, args.max_cost + 1):
+        single = hashes_per_second(cost, args.seconds, 1)
+        pooled = hashes_per_second(cost, args.seconds, args.threads)
+        print(f"{cost:>4}  {1000 / single:>9.1f}  {single:>9.1f}  {pooled:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
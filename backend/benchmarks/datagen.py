@@ -0,0 +1,128 @@
+"""Synthetic users and transactions for the benchmarks.
+
+    python benchmarks/datagen.py --transactions 5000 --csv /tmp/user1.csv
+
+Every user gets a household-like ledger over the --months months up to ANCHOR: a monthly
+salary, rent and utilities on fixed days, weekly groceries, and frequent small food, transport
+and entertainment spends (weekend-heavy), with log-normal amounts. The same seed always yields
+the same rows (dates are anchored, not relative to today), so benchmark runs stay comparable.
+"""
+import argparse
+import csv
+import math
+import random
+import sys
+from datetime import date, timedelta
+
+PASSWORD = "benchmark-password"
+ANCHOR = date(2026, 1, 1)
+
+# (category, type, median amount, spread, share of the variable spends)
+VARIABLE = [
+    ("Food", "expenses", 650, 0.6, 0.40),
+    ("Transport", "expenses", 300, 0.5, 0.25),
+    ("Entertainment", "expenses", 1500, 0.8, 0.12),
+    ("Shopping", "expenses", 2500, 0.9, 0.10),
+    ("Health", "expenses", 2000, 0.7, 0.05),
+    ("Education", "expenses", 4000, 0.6, 0.03),
+    ("Side Income", "income", 5000, 0.8, 0.05),
+]
+# (category, type, day of month, median amount, spread)
+MONTHLY = [
+    ("Salary", "income", 25, 85000, 0.05),
+    ("Rent", "expenses", 1, 25000, 0.0),
+    ("Utilities", "expenses", 10, 3500, 0.25),
+    ("Savings", "expenses", 26, 10000, 0.3),
+]
+
+
+def _amount(rng, median, spread):
+    return round(median * math.exp(rng.gauss(0, spread)), 2)
+
+
+def transactions(rng, count, months=36, today=ANCHOR):
+    """`count` (date, amount, type, category) tuples spread over the `months` months up to `today`."""
+    start = today - timedelta(days=int(months * 30.4))
+    rows = []
+
+    # fixed monthly items, then weekly groceries, then variable spends for the remainder
+    month = date(start.year, start.month, 1)
+    while month <= today and len(rows) < count:
+        for category, txn_type, day, median, spread in MONTHLY:
+            when = month.replace(day=min(day, 28))
+            if start <= when <= today:
+                rows.append((when, _amount(rng, median, spread), txn_type, category))
+        month = (month + timedelta(days=32)).replace(day=1)
+    week = start
+    while week <= today and len(rows) < count:
+        rows.append((week + timedelta(days=5), _amount(rng, 4500, 0.3), "expenses", "Groceries"))
+        week += timedelta(days=7)
+    rows = rows[:count]
+
+    weights = [share for *_, share in VARIABLE]
+    span = (today - start).days
+    while len(rows) < count:
+        category, txn_type, median, spread, _ = rng.choices(VARIABLE, weights)[0]
+        when = start + timedelta(days=rng.randrange(span + 1))
+        if when.weekday() < 5 and category == "Entertainment" and rng.random() < 0.6:
+            when += timedelta(days=5 - when.weekday())  # push most outings to Saturday
+        rows.append((min(when, today), _amount(rng, median, spread), txn_type, category))
+
+    rows.sort()
+    return rows
+
+
+def users(count):
+    """(username, email) for benchmark users; all share PASSWORD."""
+    return [(f"bench{i}", f"bench{i}@example.com") for i in range(1, count + 1)]
+
+
+def populate(app, user_count, per_user, seed=42, months=36):
+    """Create users 1..user_count with `per_user` transactions each, plus their rollups."""
+    from sqlalchemy import insert
+    from app import db
+    from models import User, Category, Transaction
+    from hashing import password_hasher
+    import rollups
+
+    rng = random.Random(seed)
+    with app.app_context():
+        password_hash = password_hasher.hash(PASSWORD)  # one bcrypt for everyone
+        for user_id, (username, email) in enumerate(users(user_count), start=1):
+            db.session.add(User(id=user_id, username=username, email=email, name=username,
+                                password_hash=password_hash))
+        db.session.commit()
+
+        for user_id in range(1, user_count + 1):
+            rows = transactions(rng, per_user, months)
+            category_ids = Category.ids_for(user_id, {row[3] for row in rows})
+            for start in range(0, len(rows), 5000):
+                db.session.execute(insert(Transaction.__table__), [
+                    {"user_id": user_id, "date": d, "amount": amount, "type": txn_type,
+                     "category_id": category_ids[category]}
+                    for d, amount, txn_type, category in rows[start:start + 5000]
+                ])
+            db.session.commit()
+        rollups.rebuild()
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv", default=None, help="write one user's rows as importable CSV (default stdout)")
+    args = parser.parse_args()
+
+    out = open(args.csv, "w", newline="") if args.csv else sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(["date", "amount", "type", "category"])
+    for d, amount, txn_type, category in transactions(random.Random(args.seed), args.transactions, args.months):
+        writer.writerow([d.isoformat(), amount, txn_type, category])
+    if args.csv:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Compare the old and compact transaction schemas: table size and summary-query time.
+
+    python benchmarks/schema_compaction.py --rows 200000 --users 20
+
+Builds two SQLite databases with the same synthetic rows, one with the old layout
+(Float amount, String type/category/month) and one with the compact layout (integer cents,
+small-int type, category ids), VACUUMs both and reports the file size and the median time
+of the per-month and per-category GROUP BY queries the summary endpoint runs.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+CATEGORIES = ["General", "Food", "Rent", "Transport", "Salary", "Utilities", "Entertainment",
+              "Health", "Groceries", "Savings", "Education", "Shopping"]
+
+OLD_SCHEMA = """
+CREATE TABLE "transaction" (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, amount FLOAT NOT NULL,
+    type VARCHAR(20) NOT NULL, category VARCHAR(100), date DATE, month VARCHAR(20)
+);
+CREATE INDEX ix_transaction_user_date_id ON "transaction" (user_id, date, id);
+"""
+NEW_SCHEMA = """
+CREATE TABLE category (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, name VARCHAR(100) NOT NULL,
+                       UNIQUE (user_id, name));
+CREATE TABLE "transaction" (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, amount BIGINT NOT NULL,
+    type SMALLINT NOT NULL, category_id INTEGER REFERENCES category (id), date DATE
+);
+CREATE INDEX ix_transaction_user_date_id ON "transaction" (user_id, date, id);
+"""
+
+OLD_QUERIES = [
+    """SELECT strftime('%Y', date), strftime('%m', date), type, SUM(amount) FROM "transaction"
+       WHERE user_id = ? GROUP BY 1, 2, 3""",
+    """SELECT type, category, SUM(amount), COUNT(id) FROM "transaction"
+       WHERE user_id = ? GROUP BY type, category""",
+]
+NEW_QUERIES = [
+    """SELECT strftime('%Y', date), strftime('%m', date), type, SUM(amount) FROM "transaction"
+       WHERE user_id = ? GROUP BY 1, 2, 3""",
+    """SELECT t.type, c.name, SUM(t.amount), COUNT(t.id) FROM "transaction" t
+       LEFT OUTER JOIN category c ON c.id = t.category_id
+       WHERE t.user_id = ? GROUP BY t.type, c.name""",
+]
+
+
+def synthetic_rows(rows, users, seed):
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    for _ in range(rows):
+        txn_date = start + timedelta(days=rng.randrange(2000))
+        income = rng.random() < 0.2
+        yield (
+            rng.randrange(1, users + 1),
+            round(rng.uniform(50, 90000) if income else rng.uniform(1, 5000), 2),
+            "income" if income else "expenses",
+            rng.choice(CATEGORIES),
+            txn_date,
+        )
+
+
+def build_old(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    conn.executemany(
+        'INSERT INTO "transaction" (user_id, amount, type, category, date, month) VALUES (?, ?, ?, ?, ?, ?)',
+        ((u, a, t, c, d.isoformat(), d.strftime("%b/%Y")) for u, a, t, c, d in rows),
+    )
+    conn.commit()
+    return conn
+
+
+def build_new(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executescript(NEW_SCHEMA)
+    category_ids = {}
+
+    def category_id(user_id, name):
+        key = (user_id, name)
+        if key not in category_ids:
+            cursor = conn.execute("INSERT INTO category (user_id, name) VALUES (?, ?)", key)
+            category_ids[key] = cursor.lastrowid
+        return category_ids[key]
+
+    conn.executemany(
+        'INSERT INTO "transaction" (user_id, amount, type, category_id, date) VALUES (?, ?, ?, ?, ?)',
+        ((u, round(a * 100), 1 if t == "income" else 0, category_id(u, c), d.isoformat()) for u, a, t, c, d in rows),
+    )
+    conn.commit()
+    return conn
+
+
+def median_ms(conn, queries, users, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for user_id in range(1, users + 1):
+            for sql in queries:
+                conn.execute(sql, (user_id,)).fetchall()
+        timings.append((time.perf_counter() - started) * 1000 / users)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = list(synthetic_rows(args.rows, args.users, args.seed))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, build, queries in (("old", build_old, OLD_QUERIES), ("compact", build_new, NEW_QUERIES)):
+            path = os.path.join(tmp, f"{label}.db")
+            conn = build(path, rows)
+            conn.execute("VACUUM")
+            size = os.path.getsize(path)
+            results.append((label, size, median_ms(conn, queries, args.users, args.repeat)))
+            conn.close()
+
+    print(f"{args.rows} rows, {args.users} users")
+    print(f"{'schema':<8}  {'size MiB':>9}  {'bytes/row':>9}  {'summary ms/user':>15}")
+    for label, size, ms in results:
+        print(f"{label:<8}  {size / 2**20:>9.2f}  {size / args.rows:>9.1f}  {ms:>15.2f}")
+    (_, old_size, old_ms), (_, new_size, new_ms) = results
+    print(f"size {new_size / old_size:.0%} of old, summary {new_ms / old_ms:.0%} of old")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Compare how history pages are built and encoded: CPU per row and bytes on the wire.
+
+    python benchmarks/serialize_pages.py --rows 500 --transactions 20000
+
+One user gets --transactions datagen rows in a temporary SQLite database. Each variant builds
+the newest --rows transactions as a JSON body, best of --repeat runs:
+
+  orm+jsonify     Transaction entities, to_dict() and jsonify (the previous history path)
+  tuples+json     column tuples, serialization.transaction_rows(), stdlib json
+  tuples+orjson   the same with orjson (what /history serves when orjson is installed)
+  columns+orjson  the same tuples as parallel arrays (?format=columns)
+
+and reports the body size raw, gzipped and brotli-compressed at the configured levels.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import datagen  # noqa: E402
+
+
+def best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500, help="transactions per page")
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ.pop("DATABASE_REPLICA_URL", None)
+    os.environ["CACHE_BACKEND"] = "none"
+    os.environ["MAIL_OUTBOX_WORKER"] = "False"
+
+    from flask import jsonify
+    from app import create_app, db
+    from models import Category, Transaction
+    import serialization
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    datagen.populate(app, 1, args.transactions, seed=args.seed)
+    order = (Transaction.date.desc().nullslast(), Transaction.id.desc())
+
+    def orm_jsonify():
+        txns = Transaction.query.filter_by(user_id=1).order_by(*order).limit(args.rows).all()
+        return jsonify({"transactions": [t.to_dict() for t in txns], "next_cursor": None}).get_data()
+
+    def tuples():
+        return [tuple(row) for row in (
+            db.session.query(Transaction.id, Transaction.date, Category.name, Transaction.type, Transaction.amount)
+            .outerjoin(Category, Category.id == Transaction.category_id)
+            .filter(Transaction.user_id == 1).order_by(*order).limit(args.rows)
+        )]
+
+    def tuples_json():
+        payload = {"transactions": serialization.transaction_rows(1, tuples()), "next_cursor": None}
+        return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    def tuples_orjson():
+        return serialization.dumps({"transactions": serialization.transaction_rows(1, tuples()), "next_cursor": None})
+
+    def columns_orjson():
+        return serialization.dumps({"columns": serialization.transaction_columns(tuples()), "next_cursor": None})
+
+    variants = [("orm+jsonify", orm_jsonify), ("tuples+json", tuples_json)]
+    if serialization.orjson is not None:
+        variants += [("tuples+orjson", tuples_orjson), ("columns+orjson", columns_orjson)]
+    else:
+        print("⚠️ orjson is not installed; its variants are skipped")
+
+    results = {}
+    print(f"{args.rows} rows per page")
+    print(f"{'variant':<16} {'ms':>7} {'us/row':>7} {'bytes':>8} {'gzip':>7} {'br':>7}")
+    with app.test_request_context():
+        for name, build in variants:
+            ms, body = best_of(args.repeat, build)
+            gzipped = len(gzip.compress(body, compresslevel=app.config["RESPONSE_GZIP_LEVEL"]))
+            brotli_bytes = (
+                len(serialization.brotli.compress(body, quality=app.config["RESPONSE_BROTLI_QUALITY"]))
+                if serialization.brotli else None
+            )
+            results[name] = {"ms": round(ms, 3), "bytes": len(body), "gzip": gzipped, "br": brotli_bytes}
+            print(f"{name:<16} {ms:>7.2f} {ms * 1000 / args.rows:>7.2f} {len(body):>8} {gzipped:>7} "
+                  f"{brotli_bytes if brotli_bytes is not None else '-':>7}")
+    tmp.cleanup()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Response cache for the finance read paths.
+
+Entries are serialized response bodies keyed by user, the user's data_version and the request
+(endpoint + query string). A write bumps data_version in the same DB transaction, so every
+worker stops seeing that user's old entries at once without a global flush. Writers also call
+`invalidate_user()` after commit to drop the dead entries eagerly where the backend can.
+
+Backends:
+  memory  in-process LRU with TTL, bounded by entry count and total bytes (default)
+  redis   SharedBackend over a Redis-compatible client, shared by all gunicorn workers
+  none    caching disabled
+`SharedBackend(DictClient())` is the in-process stand-in for the shared backend in tests.
+"""
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.sets = self.evictions = self.invalidations = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        return {
+            "hits": self.hits, "misses": self.misses, "sets": self.sets,
+            "evictions": self.evictions, "invalidations": self.invalidations,
+        }
+
+
+class CacheBackend:
+    """Storage interface. Keys are str, values are bytes."""
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def invalidate_user(self, user_id):
+        """Drop every entry for one user. Optional: versioned keys already make them unreachable."""
+
+    def info(self):
+        return self.stats.as_dict()
+
+
+class NullBackend(CacheBackend):
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+
+class LRUBackend(CacheBackend):
+    """In-process LRU + TTL cache bounded by entry count and total value size."""
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._user_keys = {}  # user prefix -> set of keys
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+        prefix = key.split(":", 1)[0]
+        keys = self._user_keys.get(prefix)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[prefix]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.stats.incr("misses")
+                self.stats.incr("evictions")
+                return None
+            self._entries.move_to_end(key)
+        self.stats.incr("hits")
+        return entry[1]
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._bytes += len(value)
+            self._user_keys.setdefault(key.split(":", 1)[0], set()).add(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        self.stats.incr("sets")
+        if evicted:
+            self.stats.incr("evictions", evicted)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            keys = list(self._user_keys.get(f"u{user_id}", ()))
+            for key in keys:
+                self._remove(key)
+        if keys:
+            self.stats.incr("invalidations", len(keys))
+
+    def info(self):
+        info = super().info()
+        with self._lock:
+            info.update(entries=len(self._entries), bytes=self._bytes,
+                        max_entries=self.max_entries, max_bytes=self.max_bytes)
+        return info
+
+
+class SharedBackend(CacheBackend):
+    """Backend over a Redis-compatible client (get, set(name, value, ex=...), delete)."""
+
+    def __init__(self, client, prefix="finance:"):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        self.stats.incr("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl)
+        self.stats.incr("sets")
+
+
+class DictClient:
+    """In-process stand-in for a Redis client, for tests and single-process development."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.monotonic():
+                del self._data[name]
+                return None
+            return entry[1]
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+
+class ResponseCache:
+    """Flask extension wrapper: `response_cache.init_app(app)` picks the configured backend."""
+
+    def init_app(self, app):
+        kind = app.config.get("CACHE_BACKEND", "memory")
+        if kind == "memory":
+            backend = LRUBackend(app.config["CACHE_MAX_ENTRIES"], app.config["CACHE_MAX_BYTES"])
+        elif kind == "redis":
+            import redis  # optional dependency, only needed for the shared backend
+            backend = SharedBackend(redis.Redis.from_url(app.config["CACHE_REDIS_URL"]))
+        elif kind == "none":
+            backend = NullBackend()
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND {kind!r}")
+        app.extensions["response_cache"] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions["response_cache"]
+
+    @staticmethod
+    def key(user_id, version, name, params=b""):
+        if isinstance(params, bytes):
+            params = params.decode("utf-8", "replace")
+        return f"u{user_id}:v{version}:{name}:{params}"
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value):
+        self.backend.set(key, value, current_app.config["CACHE_TTL"])
+
+    def invalidate_user(self, user_id):
+        self.backend.invalidate_user(user_id)
+
+    def info(self):
+        return self.backend.info()
+
+
+response_cache = ResponseCache()
@@ -1,14 +1,46 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load .env from the backend directory
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
+def engine_options(uri):
+    """SQLAlchemy engine options from DB_* environment variables.
+
+    Pool sizing does not apply to in-memory SQLite, and statement_timeout is PostgreSQL-only.
+    """
+    if not uri:
+        return {}
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "True").lower() in ("true", "1", "yes"),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    }
+    if not (uri.startswith("sqlite") and (":memory:" in uri or uri.rstrip("/") == "sqlite:")):
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE", 5))
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", 5))
+        options["pool_timeout"] = int(os.getenv("DB_POOL_TIMEOUT", 10))
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+    if statement_timeout and uri.startswith("postgres"):
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+
+def replica_binds(uri):
+    """SQLALCHEMY_BINDS entry for the optional read replica (DATABASE_REPLICA_URL)."""
+    if not uri:
+        return {}
+    return {"replica": {"url": uri, **engine_options(uri)}}
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-prod")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", os.getenv("SECRET_KEY", "change-me-in-prod"))
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///local.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Read-only routes are sent here when set (see database.use_replica)
+    SQLALCHEMY_BINDS = replica_binds(os.getenv("DATABASE_REPLICA_URL"))
 
     # SMTP Configuration
     # NOTE: Do NOT store real credentials in source control. Set these via environment variables
@@ -24,3 +56,91 @@ class Config:
 
     # Frontend URL for password reset links
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5174")
+
+    # Email outbox: background sender thread per worker, retry with exponential backoff
+    MAIL_OUTBOX_WORKER = os.getenv("MAIL_OUTBOX_WORKER", "True").lower() in ("true", "1", "yes")
+    MAIL_OUTBOX_POLL = float(os.getenv("MAIL_OUTBOX_POLL", 30))
+    MAIL_OUTBOX_BATCH = int(os.getenv("MAIL_OUTBOX_BATCH", 50))
+    MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+    MAIL_RETRY_BASE = float(os.getenv("MAIL_RETRY_BASE", 30))
+    MAIL_RETRY_MAX = float(os.getenv("MAIL_RETRY_MAX", 3600))
+    # sent/failed messages (their bodies may hold reset links) are deleted after this many hours
+    MAIL_OUTBOX_RETENTION_HOURS = int(os.getenv("MAIL_OUTBOX_RETENTION_HOURS", 24))
+    MAIL_CLAIM_TIMEOUT = float(os.getenv("MAIL_CLAIM_TIMEOUT", 300))
+
+    # Transaction history pagination
+    HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", 50))
+    HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", 500))
+    # /changes delta sync: rows per page, and how long deletes stay visible to it
+    CHANGES_PAGE_SIZE = int(os.getenv("CHANGES_PAGE_SIZE", 500))
+    CHANGES_MAX_PAGE_SIZE = int(os.getenv("CHANGES_MAX_PAGE_SIZE", 5000))
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", 30))
+    # POST /batch: operations per request, and a per-statement time cap inside it (PostgreSQL; 0 = none)
+    BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", 500))
+    BATCH_STATEMENT_TIMEOUT_MS = int(os.getenv("BATCH_STATEMENT_TIMEOUT_MS", 5000))
+    # Nightly insights job (manage.py insights): pool processes, and users per chunk/bulk write
+    INSIGHTS_WORKERS = int(os.getenv("INSIGHTS_WORKERS", os.cpu_count() or 1))
+    INSIGHTS_CHUNK_SIZE = int(os.getenv("INSIGHTS_CHUNK_SIZE", 200))
+
+    # Bulk CSV import: rows per INSERT/commit, and how many row errors to report back
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+    IMPORT_MAX_BATCH_SIZE = int(os.getenv("IMPORT_MAX_BATCH_SIZE", 10000))
+    IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 100))
+
+    # Streaming CSV export: rows fetched per server-side cursor batch, gzip when the client accepts it
+    EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", 1000))
+    EXPORT_GZIP = os.getenv("EXPORT_GZIP", "True").lower() in ("true", "1", "yes")
+
+    # Report jobs: rendered in a process pool, results cached on local disk
+    REPORT_DIR = os.getenv("REPORT_DIR", os.path.join(tempfile.gettempdir(), "finance-reports"))
+    REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 1))
+    REPORT_MAX_PENDING = int(os.getenv("REPORT_MAX_PENDING", 8))
+    REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", 24 * 3600))
+
+    # /metrics (Prometheus text format); METRICS_DIR aggregates gunicorn workers, METRICS_TOKEN requires a bearer token
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "yes")
+    METRICS_DIR = os.getenv("METRICS_DIR") or None
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+    # Request profiling: send "X-Profile: <PROFILE_TOKEN>" or sample a fraction of requests; stored in PROFILE_DIR
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "finance-profiles"))
+    PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 200))
+    PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", 40))
+    PROFILE_SQL_PARAMS = os.getenv("PROFILE_SQL_PARAMS", "False").lower() in ("true", "1", "yes")
+
+    # Per-view SQL statement budgets (database.query_budget): "raise" (or true) fails the request, "warn" logs
+    QUERY_BUDGET_ENFORCE = {"true": True, "1": True, "yes": True, "raise": True, "warn": "warn"}.get(
+        os.getenv("QUERY_BUDGET_ENFORCE", "False").lower(), False
+    )
+
+    # Log the per-phase startup time (imports, config, extensions, blueprints) once per process
+    STARTUP_REPORT = os.getenv("STARTUP_REPORT", "False").lower() in ("true", "1", "yes")
+    # /readyz reuses a successful database ping for this many seconds per worker
+    READYZ_CACHE_SECONDS = float(os.getenv("READYZ_CACHE_SECONDS", 5))
+    # asgi.py: threads for the requests it hands to the WSGI app (auth, /metrics, CSV import, ...)
+    ASGI_THREADS = int(os.getenv("ASGI_THREADS", 8))
+
+    # Cold-data archive: `manage.py archive` moves transactions older than this many days
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 730))
+
+    # JSON read endpoints: encodings offered in order of preference ("" for none; br needs the
+    # brotli package) and their levels. Compressed bodies are cached, so each is compressed once
+    RESPONSE_ENCODINGS = [e.strip() for e in os.getenv("RESPONSE_ENCODINGS", "br,gzip").split(",") if e.strip()]
+    RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", 6))
+    RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", 5))
+
+    # Response cache for history/summary/categories: "memory" (per worker), "redis" (shared) or "none"
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_TTL = int(os.getenv("CACHE_TTL", 300))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 32 * 1024 * 1024))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Password hashing: bcrypt work factor and the bounded hashing pool (503 when full)
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", 2))
+    HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", 4))
+    HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", 10))
@@ -0,0 +1,52 @@
+"""Per-user data version and the ETag/304 handling built on it.
+
+Every mutation of a user's transactions calls `bump()` inside its own DB transaction, so the
+version changes exactly when the data behind history, summary and export responses does.
+Read endpoints check `If-None-Match` against the version before running any transaction
+query, and answer 304 when the client already has the current data.
+"""
+from flask import request, make_response
+from sqlalchemy import update
+from app import db
+from models import User
+
+
+def bump(user_id):
+    """Increment the user's data version (atomic UPDATE, committed by the caller) and return it.
+
+    The UPDATE locks the user row until the commit, so a user's writes get increasing versions
+    in commit order; sync.py stamps the written rows with the returned version.
+    """
+    return db.session.execute(
+        update(User).where(User.id == user_id).values(data_version=User.data_version + 1)
+        .returning(User.data_version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def current(user_id):
+    return db.session.query(User.data_version).filter_by(id=user_id).scalar()
+
+
+def etag(user_id, version, variant=None):
+    """Strong ETag for a user's data at `version`, or None if the user does not exist."""
+    if version is None:
+        return None
+    value = f"u{user_id}-v{version}"
+    return f"{value}-{variant}" if variant else value
+
+
+def not_modified(etag):
+    """A 304 response if the request's If-None-Match already names `etag`, else None."""
+    if etag and request.if_none_match.contains(etag):
+        response = make_response("", 304)
+        return tag(response, etag)
+    return None
+
+
+def tag(response, etag):
+    if etag:
+        response.set_etag(etag)
+        # let the browser keep the body but revalidate it on every use
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,142 @@
+"""Session routing, per-request SQL accounting and process-safety helpers for the engines.
+
+Routes decorated with `use_replica` run their queries on the "replica" bind
+(DATABASE_REPLICA_URL) when one is configured; everything else, and anything flushed,
+goes to the primary. Without a replica the decorator is a no-op, so the same code runs
+against a single database.
+
+Under the ASGI entry point (asgi.py) the same sessions are pointed at async engines through
+the `async_binds` context variable; the routing above applies to them unchanged.
+
+`trace_statements()` counts the SQL statements each request runs (and records them when a
+profiler asks for a trace); `query_budget(n)` fails a request that runs more than n of them
+while QUERY_BUDGET_ENFORCE is on, which catches N+1 regressions in tests and benchmarks.
+"""
+import logging
+import os
+import time
+import weakref
+from contextvars import ContextVar
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+log = logging.getLogger(__name__)
+
+# {bind key: engine} set by asgi.py while a request runs on the async engines
+async_binds = ContextVar("async_binds", default=None)
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engines = async_binds.get()
+        if bind is None and not self._flushing and has_request_context() and g.get("use_replica"):
+            replica = (self._db.engines if engines is None else engines).get("replica")
+            if replica is not None:
+                return replica
+        if engines is not None and bind is None:
+            return engines[None]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_replica(view):
+    """Mark a read-only view: its queries may be served by the read replica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+# engines to dispose in a forked child; weak, so apps built and dropped (tests, workers) do not
+# keep their engines alive. The fork hook itself is registered once per process.
+_fork_engines = weakref.WeakSet()
+_fork_hook_registered = False
+
+
+def _dispose_after_fork():
+    for engine in list(_fork_engines):
+        engine.dispose(close=False)
+
+
+def dispose_engines_after_fork(app, db):
+    """Drop pooled connections inherited from the parent in every forked child.
+
+    With gunicorn --preload (or any fork after the app has connected) the children would
+    otherwise share the parent's sockets. close=False leaves the parent's connections alone.
+    """
+    global _fork_hook_registered
+    with app.app_context():
+        _fork_engines.update(db.engines.values())
+    if not _fork_hook_registered:
+        os.register_at_fork(after_in_child=_dispose_after_fork)
+        _fork_hook_registered = True
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more SQL statements than its declared budget."""
+
+
+def _trace_before(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._trace_started = time.perf_counter()
+
+
+def _trace_after(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    g.sql_statements = g.get("sql_statements", 0) + 1
+    trace = g.get("sql_trace")
+    if trace is not None:
+        started = getattr(context, "_trace_started", None)
+        entry = {
+            "statement": statement,
+            "ms": round((time.perf_counter() - started) * 1000, 3) if started else None,
+            "executemany": executemany,
+            "bind": conn.engine.url.render_as_string(hide_password=True),
+        }
+        if current_app.config.get("PROFILE_SQL_PARAMS"):
+            entry["parameters"] = repr(parameters)[:2000]
+        trace.append(entry)
+
+
+def trace_engine(engine):
+    event.listen(engine, "before_cursor_execute", _trace_before)
+    event.listen(engine, "after_cursor_execute", _trace_after)
+
+
+def trace_statements(app, db):
+    """Count each request's SQL statements in g.sql_statements.
+
+    When g.sql_trace is a list (the request profiler sets one), every statement is appended to
+    it with its duration; parameters are included only with PROFILE_SQL_PARAMS.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            trace_engine(engine)
+
+
+def query_budget(max_statements):
+    """Declare how many SQL statements a view may run (enforced with QUERY_BUDGET_ENFORCE).
+
+    Statements run while streaming a response body after the view returns are not counted.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get("QUERY_BUDGET_ENFORCE"):
+                return view(*args, **kwargs)
+            before = g.get("sql_statements", 0)
+            result = view(*args, **kwargs)
+            used = g.get("sql_statements", 0) - before
+            if used > max_statements:
+                message = f"{request.method} {request.path} ran {used} SQL statements, budget is {max_statements}"
+                if current_app.config.get("QUERY_BUDGET_ENFORCE") == "warn":
+                    log.warning(message)
+                else:
+                    raise QueryBudgetExceeded(message)
+            return result
+        wrapper.query_budget = max_statements
+        return wrapper
+    return decorator
@@ -1,13 +1,200 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import and_, or_, func, extract
 from app import db
-from models import Transaction
-from datetime import datetime
+from models import Transaction, MonthlyRollup, Category, TransactionType, User, UserInsight
+from datetime import datetime, timedelta
 from datetime import date as date_cls
+from decimal import Decimal, InvalidOperation
+import base64
+import csv
+import io
+import math
+import re
+import zlib
+import rollups
+import data_version
+import archive
+import sync
+import serialization
+from cache import response_cache
+from database import use_replica, query_budget
 
 finance_bp = Blueprint("finance", __name__)
 
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string the same way add_transaction does."""
+    return datetime.fromisoformat(value).date()
+
+
+# largest accepted amount: its cents stay exact in a float and far inside BIGINT (see Cents)
+MAX_AMOUNT = 10 ** 13
+
+
+def parse_amount(value):
+    """Parse a posted amount; ValueError unless it is a finite number within MAX_AMOUNT."""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not math.isfinite(amount) or abs(amount) > MAX_AMOUNT:
+        raise ValueError(f"amount must be a finite number between -{MAX_AMOUNT} and {MAX_AMOUNT}")
+    return amount
+
+
+def _month_bounds(value):
+    """Turn a YYYY-MM month key into a [first day, first day of next month) range."""
+    start = datetime.strptime(value, "%Y-%m").date()
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def encode_cursor(txn_date, txn_id):
+    raw = f"{txn_date.isoformat() if txn_date else ''}|{txn_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    date_part, id_part = raw.split("|", 1)
+    return (parse_date(date_part) if date_part else None), int(id_part)
+
+
+MONTH_NUMBERS = {date_cls(2000, m, 1).strftime("%B").lower(): m for m in range(1, 13)}
+
+
+def _month_number(word):
+    """1-12 for a month name or its prefix of at least three letters ("sep", "sept"), else None."""
+    if len(word) < 3:
+        return None
+    for name, number in MONTH_NUMBERS.items():
+        if name.startswith(word):
+            return number
+    return None
+
+
+def parse_search(text):
+    """What the free-text search `q` matches, mirroring the columns of the history table.
+
+    A transaction matches if its category name starts with the text (case-insensitive), its
+    type starts with it ("inc"), its amount equals it ("1500", "1500.50"), or its date is in
+    the month it names ("2025-09", "Sep/2025", or just "sep" for every September).
+    """
+    text = text.strip().lower()
+    search = {"text": text, "types": [t for t in TransactionType.CODES if t.startswith(text)]}
+    try:
+        amount = Decimal(text.replace(",", ""))
+        if amount.is_finite() and abs(amount) <= MAX_AMOUNT:
+            search["amount"] = float(round(amount, 2))
+    except InvalidOperation:
+        pass
+    match = re.fullmatch(r"(\d{4})-(\d{1,2})|([a-z]+)[/ -](\d{4})|([a-z]+)", text)
+    if match:
+        year, month, name, name_year, bare = match.groups()
+        if year and 1 <= int(month) <= 12:
+            search["month"] = _month_bounds(f"{year}-{int(month):02d}")
+        elif name and _month_number(name):
+            search["month"] = _month_bounds(f"{name_year}-{_month_number(name):02d}")
+        elif bare and _month_number(bare):
+            search["month_of_year"] = _month_number(bare)
+    return search
+
+
+def like_prefix(text):
+    """LIKE pattern (escape character \\) matching strings that start with `text`."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def invalid_type(value):
+    """Error message for a transaction type the schema cannot store, else None."""
+    if value not in TransactionType.CODES:
+        return "type must be 'income' or 'expenses'"
+    return None
+
+
+def parse_filters(args):
+    """Read the history filters from a query-string mapping.
+
+    Returns (filters, error_message). Supported keys: type, category (case-insensitive
+    substring), month (YYYY-MM, taken from Transaction.date), start_date and end_date
+    (inclusive, YYYY-MM-DD), and q (free text, see parse_search).
+    """
+    filters = {}
+    if args.get("q") and args["q"].strip():
+        filters["search"] = parse_search(args["q"])
+    if args.get("type"):
+        error = invalid_type(args["type"])
+        if error:
+            return None, error
+        filters["type"] = args["type"]
+    if args.get("category"):
+        filters["category"] = args["category"]
+    try:
+        if args.get("month"):
+            filters["month"] = _month_bounds(args["month"])
+        if args.get("start_date"):
+            filters["start_date"] = parse_date(args["start_date"])
+        if args.get("end_date"):
+            filters["end_date"] = parse_date(args["end_date"])
+    except ValueError:
+        return None, "Invalid date filter. Use YYYY-MM for month and YYYY-MM-DD for dates."
+    return filters, None
+
+
+def search_condition(user_id, search):
+    # category names come from the (user_id, lower(name)) index as a prefix range
+    matching = db.select(Category.id).where(
+        Category.user_id == user_id, func.lower(Category.name).like(like_prefix(search["text"]), escape="\\")
+    )
+    conditions = [Transaction.category_id.in_(matching)]
+    if search["types"]:
+        conditions.append(Transaction.type.in_(search["types"]))
+    if "amount" in search:
+        conditions.append(Transaction.amount == search["amount"])
+    if "month" in search:
+        start, end = search["month"]
+        conditions.append(and_(Transaction.date >= start, Transaction.date < end))
+    if "month_of_year" in search:
+        conditions.append(extract("month", Transaction.date) == search["month_of_year"])
+    return or_(*conditions)
+
+
+def apply_filters(query, filters, user_id):
+    if "search" in filters:
+        query = query.filter(search_condition(user_id, filters["search"]))
+    if "type" in filters:
+        query = query.filter(Transaction.type == filters["type"])
+    if "category" in filters:
+        # match the user's names in the (small) category table, then filter transactions by id;
+        # autoescape makes % and _ in the text literal
+        matching = db.select(Category.id).where(
+            Category.user_id == user_id, Category.name.icontains(filters["category"], autoescape=True)
+        )
+        query = query.filter(Transaction.category_id.in_(matching))
+    if "month" in filters:
+        start, end = filters["month"]
+        query = query.filter(Transaction.date >= start, Transaction.date < end)
+    if "start_date" in filters:
+        query = query.filter(Transaction.date >= filters["start_date"])
+    if "end_date" in filters:
+        query = query.filter(Transaction.date <= filters["end_date"])
+    return query
+
+
+def apply_cursor(query, cursor):
+    """Keyset condition for rows strictly after `cursor` in (date desc nulls last, id desc) order."""
+    last_date, last_id = cursor
+    if last_date is None:
+        return query.filter(Transaction.date.is_(None), Transaction.id < last_id)
+    return query.filter(or_(
+        Transaction.date < last_date,
+        and_(Transaction.date == last_date, Transaction.id < last_id),
+        Transaction.date.is_(None),
+    ))
+
 @finance_bp.route("/add", methods=["POST"])
+@query_budget(12)
 def add_transaction():
     user_id = 1  # For testing, use user_id = 1
     data = request.get_json() or {}
@@ -17,43 +204,686 @@ def add_transaction():
     txn_date = None
     if date_str:
         try:
-            txn_date = datetime.fromisoformat(date_str).date()
+            txn_date = parse_date(date_str)
         except Exception:
             return jsonify({"msg": "Invalid date format. Use YYYY-MM-DD."}), 400
     # if no date provided, default to today
     if not txn_date:
         txn_date = date_cls.today()
 
+    txn_type = data.get("type", "expenses")
+    error = invalid_type(txn_type)
+    if error:
+        return jsonify({"msg": error}), 400
+    try:
+        amount = parse_amount(data.get("amount", 0))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # month (Month/Year, e.g. Sep/2025) is derived from date, so a posted "month" is ignored
     txn = Transaction(
         user_id=user_id,
-        amount=float(data.get("amount", 0)),
-        type=data.get("type", "expenses"),
-        category=data.get("category", "General"),
+        amount=amount,
+        type=txn_type,
         date=txn_date,
-        # store month as Month/Year (e.g., Sep/2025) derived from date when possible
-        month=data.get("month") or txn_date.strftime("%b/%Y")
+        version=data_version.bump(user_id),
     )
+    txn.set_category(data.get("category", "General"))
     db.session.add(txn)
+    rollups.record_transaction(txn)
     db.session.commit()
+    response_cache.invalidate_user(user_id)
     return jsonify({"msg": "Transaction added", "transaction": txn.to_dict()}), 201
 
+@finance_bp.route("/import", methods=["POST"])
+def import_transactions():
+    """Bulk-load transactions from CSV (multipart field "file", or a raw text/csv body).
+
+    No query_budget: the statement count grows with the number of batches.
+    """
+    import importer
+
+    user_id = 1  # For testing, use user_id = 1
+    upload = request.files.get("file")
+    raw = upload.stream if upload else request.stream
+    text_stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+
+    try:
+        batch_size = int(request.args.get("batch_size", current_app.config["IMPORT_BATCH_SIZE"]))
+    except ValueError:
+        return jsonify({"msg": "batch_size must be an integer"}), 400
+    batch_size = max(1, min(batch_size, current_app.config["IMPORT_MAX_BATCH_SIZE"]))
+
+    try:
+        report = importer.import_csv(
+            user_id, text_stream, batch_size=batch_size, max_errors=current_app.config["IMPORT_MAX_ERRORS"]
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({"msg": f"Could not import CSV: {e}"}), 400
+    finally:
+        # earlier batches may have committed even if a later one failed
+        response_cache.invalidate_user(user_id)
+
+    return jsonify({"msg": "Import finished", **report}), 200
+
+@finance_bp.route("/batch", methods=["POST"])
+def batch_transactions():
+    """Apply {"operations": [{"op": "add" | "update" | "delete", ...}, ...]} atomically.
+
+    Adds take the fields of POST /add; updates and deletes take an "id" (updates also the
+    fields of PUT /<id> to change). Returns one result per operation, in order; if any is
+    rejected nothing is applied and the response is 400. No query_budget: the statement count
+    grows with the number of distinct updates (see batch.py); BATCH_MAX_OPERATIONS bounds it.
+    """
+    import batch
+
+    user_id = 1  # For testing, use user_id = 1
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"msg": "operations must be a non-empty list"}), 400
+    max_operations = current_app.config["BATCH_MAX_OPERATIONS"]
+    if len(operations) > max_operations:
+        return jsonify({"msg": f"A batch holds at most {max_operations} operations"}), 413
+
+    try:
+        results = batch.apply(user_id, operations, current_app.config["BATCH_STATEMENT_TIMEOUT_MS"])
+        db.session.commit()
+    except batch.BatchError as e:
+        return jsonify({"msg": "Batch rejected; nothing was applied", "results": e.results}), 400
+    response_cache.invalidate_user(user_id)
+    return jsonify({"msg": "Batch applied", "results": results}), 200
+
+def _json_response(body, encoding, etag):
+    response = current_app.response_class(body, mimetype="application/json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return data_version.tag(response, etag)
+
+
+def serve_versioned(user_id, name, build):
+    """ETag/304, compression and response-cache handling shared by the JSON read endpoints.
+
+    Callers validate the query string first: the ETag only covers the data version and
+    encoding, so a malformed query checked inside `build()` could be answered 304. `build()`
+    returns the payload dict, or an error response tuple that is passed through uncached.
+    The body is encoded with serialization.dumps() and compressed as negotiated; each
+    encoding is its own representation with its own ETag (like the CSV export). Cache entries
+    hold the encoded bytes, keyed by the user's data_version, the encoding and the query
+    string, so a cached page is neither re-serialised nor re-compressed.
+    """
+    version = data_version.current(user_id)
+    encoding = serialization.negotiate_encoding()
+    etag = data_version.etag(user_id, version, encoding)
+    cached = data_version.not_modified(etag)
+    if cached:
+        cached.vary.add("Accept-Encoding")
+        return cached
+
+    variant = f"{name}.{encoding}" if encoding else name
+    cache_key = response_cache.key(user_id, version, variant, request.query_string) if etag else None
+    body = response_cache.get(cache_key) if cache_key else None
+    if body is not None:
+        return _json_response(body, encoding, etag), 200
+
+    result = build()
+    if isinstance(result, tuple):
+        return result
+    body = serialization.dumps(result)
+    if encoding:
+        body = serialization.compress(body, encoding)
+    if cache_key:
+        response_cache.set(cache_key, body)
+    return _json_response(body, encoding, etag), 200
+
 @finance_bp.route("/history", methods=["GET"])
+@use_replica
+@query_budget(5)
 def get_history():
     user_id = 1  # For testing, use user_id = 1
-    txns = Transaction.query.filter_by(user_id=user_id).order_by(Transaction.date.desc().nullslast()).all()
-    return jsonify({"transactions": [t.to_dict() for t in txns]}), 200
+    params, error = _history_params()
+    if error:
+        return error
+    return serve_versioned(user_id, "history", lambda: _history_page(user_id, params))
+
+
+@finance_bp.route("/search", methods=["GET"])
+@use_replica
+@query_budget(5)
+def search_transactions():
+    """History pages matching the free text `q` (see parse_search), newest first.
+
+    Takes the same filters, limit and cursor as /history and returns the same shape.
+    """
+    user_id = 1  # For testing, use user_id = 1
+    if not (request.args.get("q") or "").strip():
+        return jsonify({"msg": "q is required"}), 400
+    params, error = _history_params()
+    if error:
+        return error
+    return serve_versioned(user_id, "search", lambda: _history_page(user_id, params))
+
+
+def _history_params():
+    """(params, error response) for the history query string: filters, format, limit, cursor."""
+    filters, error = parse_filters(request.args)
+    if error:
+        return None, (jsonify({"msg": error}), 400)
+    page_format = request.args.get("format", "rows")
+    if page_format not in serialization.FORMATS:
+        return None, (jsonify({"msg": f"format must be one of {', '.join(serialization.FORMATS)}"}), 400)
+
+    try:
+        limit = int(request.args.get("limit", current_app.config["HISTORY_PAGE_SIZE"]))
+    except ValueError:
+        return None, (jsonify({"msg": "limit must be an integer"}), 400)
+    limit = max(1, min(limit, current_app.config["HISTORY_MAX_PAGE_SIZE"]))
+
+    cursor = None
+    if request.args.get("cursor"):
+        try:
+            cursor = decode_cursor(request.args["cursor"])
+        except (ValueError, UnicodeDecodeError):
+            return None, (jsonify({"msg": "Invalid cursor"}), 400)
+    return {"filters": filters, "format": page_format, "limit": limit, "cursor": cursor}, None
+
+
+def _history_page(user_id, params):
+    filters, limit, cursor = params["filters"], params["limit"], params["cursor"]
+
+    # plain column tuples in the archive's row shape, not ORM objects (see serialization.py)
+    query = apply_filters(
+        db.session.query(Transaction.id, Transaction.date, Category.name, Transaction.type, Transaction.amount)
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .filter(Transaction.user_id == user_id),
+        filters, user_id,
+    )
+    if cursor:
+        query = apply_cursor(query, cursor)
+
+    # Ordering matches the (user_id, date, id) index so each page is a bounded range scan.
+    # One extra row tells us whether there is a next page without a COUNT query.
+    page = [
+        tuple(row) for row in
+        query.order_by(Transaction.date.desc().nullslast(), Transaction.id.desc()).limit(limit + 1)
+    ]
+
+    # merge in archived rows only if they could land on this page; their ids are kept so the
+    # page can mark them read-only
+    floor = page[-1][1] if len(page) > limit else None
+    archived = set()
+    if archive.reaches(user_id, filters, cursor, floor):
+        cold = archive.rows(user_id, filters, cursor, floor, limit + 1)
+        archived = {row[0] for row in cold}
+        page = archive.merge(page, cold, limit + 1)
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1][1], page[-1][0])
+
+    if params["format"] == "columns":
+        return {"columns": serialization.transaction_columns(page, archived), "next_cursor": next_cursor}
+    return {"transactions": serialization.transaction_rows(user_id, page, archived), "next_cursor": next_cursor}
+
+EXPORT_HEADER = ["Date", "Month", "Category", "Type", "Amount"]
+
+
+def export_rows(user_id, filters, yield_per):
+    """(date, category, type, amount) tuples for export, newest first, archive included.
+
+    Hot rows come through a server-side cursor in yield_per batches; archived rows are only
+    decompressed when the filters reach the archived dates.
+    """
+    hot = (
+        apply_filters(Transaction.query.filter_by(user_id=user_id), filters, user_id)
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .with_entities(Transaction.id, Transaction.date, Category.name, Transaction.type, Transaction.amount)
+        .order_by(Transaction.date.desc().nullslast(), Transaction.id.desc())
+        .yield_per(yield_per)
+    )
+    if archive.reaches(user_id, filters):
+        hot = archive.merge(hot, archive.rows(user_id, filters))
+    return (row[1:] for row in hot)
+
+
+def _csv_chunks(rows, flush_bytes=64 * 1024):
+    """Render (date, category, type, amount) rows as CSV text in ~flush_bytes chunks."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_HEADER)
+    for txn_date, category, txn_type, amount in rows:
+        writer.writerow([
+            txn_date.isoformat() if txn_date else "-",
+            txn_date.strftime("%b/%Y") if txn_date else "-",
+            category or "-",
+            txn_type or "-",
+            amount,
+        ])
+        if buf.tell() >= flush_bytes:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@finance_bp.route("/export.csv", methods=["GET"])
+@use_replica
+@query_budget(4)
+def export_csv():
+    user_id = 1  # For testing, use user_id = 1
+    filters, error = parse_filters(request.args)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    # the gzip and identity bodies are different representations, so they get different ETags
+    use_gzip = current_app.config["EXPORT_GZIP"] and "gzip" in request.accept_encodings
+    etag = data_version.etag(user_id, data_version.current(user_id), "gzip" if use_gzip else None)
+    cached = data_version.not_modified(etag)
+    if cached:
+        return cached
+
+    # Plain column tuples fetched through a server-side cursor in yield_per batches,
+    # so the worker only ever holds one batch and one output chunk in memory.
+    chunks = _csv_chunks(export_rows(user_id, filters, current_app.config["EXPORT_YIELD_PER"]))
+    headers = {"Content-Disposition": "attachment; filename=transactions.csv"}
+
+    if use_gzip:
+        body = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    else:
+        body = (chunk.encode("utf-8") for chunk in chunks)
+
+    response = Response(stream_with_context(body), mimetype="text/csv", headers=headers)
+    return data_version.tag(response, etag)
+
+
+def _public_job(job):
+    return {k: job.get(k) for k in ("id", "format", "filters", "status", "cached", "error")}
+
+
+@finance_bp.route("/reports", methods=["POST"])
+@query_budget(1)
+def submit_report():
+    """Queue a PDF/CSV report; rendering happens in the report process pool."""
+    import reports
+
+    user_id = 1  # For testing, use user_id = 1
+    data = request.get_json() or {}
+    fmt = (data.get("format") or "pdf").lower()
+    if fmt not in reports.REPORT_FORMATS:
+        return jsonify({"msg": f"format must be one of {', '.join(reports.REPORT_FORMATS)}"}), 400
+
+    raw_filters = {
+        k: str(v) for k, v in (data.get("filters") or {}).items()
+        if k in ("q", "type", "category", "month", "start_date", "end_date") and v
+    }
+    _, error = parse_filters(raw_filters)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    reports.prune(current_app.config["REPORT_DIR"], current_app.config["REPORT_CACHE_TTL"])
+    try:
+        job = reports.submit(current_app.config, user_id, fmt, raw_filters)
+    except reports.ReportQueueFull:
+        return jsonify({"msg": "Report queue is full, try again shortly"}), 503, {"Retry-After": "5"}
+
+    return jsonify({"msg": "Report queued", "job": _public_job(job)}), 202
+
+@finance_bp.route("/reports/<job_id>", methods=["GET"])
+@query_budget(0)
+def report_status(job_id):
+    import reports
+
+    user_id = 1  # For testing, use user_id = 1
+    job = reports.load_job(current_app.config["REPORT_DIR"], job_id)
+    if not job or job["user_id"] != user_id:
+        return jsonify({"msg": "Report not found"}), 404
+    return jsonify({"job": _public_job(job)}), 200
+
+@finance_bp.route("/reports/<job_id>/download", methods=["GET"])
+@query_budget(0)
+def download_report(job_id):
+    import reports
+
+    user_id = 1  # For testing, use user_id = 1
+    job = reports.load_job(current_app.config["REPORT_DIR"], job_id)
+    if not job or job["user_id"] != user_id:
+        return jsonify({"msg": "Report not found"}), 404
+    if job["status"] != "done":
+        return jsonify({"msg": f"Report is {job['status']}", "job": _public_job(job)}), 409
+
+    return send_file(
+        reports.result_path(current_app.config["REPORT_DIR"], job),
+        mimetype=reports.MIMETYPES[job["format"]],
+        as_attachment=True,
+        download_name=f"transactions.{job['format']}",
+    )
+
+
+def _month_label(year, month):
+    """Dashboard month label (e.g. Sep/2025) for a year/month pair."""
+    if not year or not month:
+        return "Unknown"
+    return date_cls(int(year), int(month), 1).strftime("%b/%Y")
+
+
+def _summary_rows_from_transactions(user_id, filters):
+    year = extract("year", Transaction.date)
+    month = extract("month", Transaction.date)
+    base = apply_filters(Transaction.query.filter_by(user_id=user_id), filters, user_id)
+
+    month_rows = (
+        base.with_entities(year, month, Transaction.type, func.sum(Transaction.amount))
+        .group_by(year, month, Transaction.type)
+        .all()
+    )
+    category_rows = (
+        base.outerjoin(Category, Category.id == Transaction.category_id)
+        .with_entities(Transaction.type, Category.name, func.sum(Transaction.amount), func.count(Transaction.id))
+        .group_by(Transaction.type, Category.name)
+        .all()
+    )
+
+    if archive.reaches(user_id, filters):
+        cold_months, cold_categories = archive.summary_rows(user_id, filters)
+        month_rows = list(month_rows) + cold_months
+        merged = {}
+        for txn_type, category, total, count in list(category_rows) + cold_categories:
+            group = merged.setdefault((txn_type, category), [0.0, 0])
+            group[0] += total or 0.0
+            group[1] += count
+        category_rows = [(t, c, total, count) for (t, c), (total, count) in merged.items()]
+    return month_rows, category_rows
+
+
+def _summary_rows_from_rollups(user_id, filters):
+    base = MonthlyRollup.query.filter_by(user_id=user_id)
+    if "type" in filters:
+        base = base.filter(MonthlyRollup.type == filters["type"])
+    if "category" in filters:
+        base = base.filter(MonthlyRollup.category.icontains(filters["category"], autoescape=True))
+    if "month" in filters:
+        start, _ = filters["month"]
+        base = base.filter(MonthlyRollup.year == start.year, MonthlyRollup.month == start.month)
+
+    month_rows = (
+        base.with_entities(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type, func.sum(MonthlyRollup.total))
+        .group_by(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type)
+        .all()
+    )
+    category_rows = [
+        (txn_type, category or None, total, count)
+        for txn_type, category, total, count in (
+            base.with_entities(MonthlyRollup.type, MonthlyRollup.category, func.sum(MonthlyRollup.total), func.sum(MonthlyRollup.count))
+            .group_by(MonthlyRollup.type, MonthlyRollup.category)
+            .all()
+        )
+    ]
+    return month_rows, category_rows
+
+
+def build_summary(user_id, filters):
+    """Monthly income/expense buckets, totals and a per-category breakdown.
+
+    Served from the monthly_rollup table unless the filters need day precision
+    (start_date/end_date) or a search, in which case the raw transactions are grouped in SQL.
+    Anything that is not "income" counts as expenses, matching how the dashboard charts it.
+    """
+    if "start_date" in filters or "end_date" in filters or "search" in filters:
+        month_rows, category_rows = _summary_rows_from_transactions(user_id, filters)
+    else:
+        month_rows, category_rows = _summary_rows_from_rollups(user_id, filters)
+
+    months = {}
+    totals = {"income": 0.0, "expenses": 0.0}
+    for y, m, txn_type, total in month_rows:
+        key = f"{int(y):04d}-{int(m):02d}" if y and m else None
+        bucket = months.setdefault(key, {"key": key, "month": _month_label(y, m), "income": 0.0, "expenses": 0.0})
+        side = "income" if txn_type == "income" else "expenses"
+        bucket[side] += total or 0.0
+        totals[side] += total or 0.0
+    # group totals are exact cents from SQL; re-round after adding them up as floats
+    for bucket in months.values():
+        bucket["income"] = round(bucket["income"], 2)
+        bucket["expenses"] = round(bucket["expenses"], 2)
+    totals = {side: round(total, 2) for side, total in totals.items()}
+    totals["balance"] = round(totals["income"] - totals["expenses"], 2)
+
+    categories = [
+        {"type": txn_type, "category": category, "total": round(total or 0.0, 2), "count": int(count)}
+        for txn_type, category, total, count in category_rows
+    ]
+    categories.sort(key=lambda c: c["total"], reverse=True)
+
+    # undated rows ("Unknown") sort first, as the dashboard did
+    ordered = sorted(months.values(), key=lambda b: b["key"] or "")
+    return {"months": ordered, "totals": totals, "categories": categories}
+
+
+@finance_bp.route("/summary", methods=["GET"])
+@use_replica
+@query_budget(6)
+def get_summary():
+    user_id = 1  # For testing, use user_id = 1
+    filters, error = parse_filters(request.args)
+    if error:
+        return jsonify({"msg": error}), 400
+    return serve_versioned(user_id, "summary", lambda: build_summary(user_id, filters))
+
+
+@finance_bp.route("/categories", methods=["GET"])
+@use_replica
+@query_budget(2)
+def get_categories():
+    """Distinct categories per type for filter dropdowns, read from the rollups."""
+    user_id = 1  # For testing, use user_id = 1
+    return serve_versioned(user_id, "categories", lambda: _categories_payload(user_id))
+
+
+def _categories_payload(user_id):
+    rows = (
+        MonthlyRollup.query.filter_by(user_id=user_id)
+        .with_entities(MonthlyRollup.type, MonthlyRollup.category)
+        .distinct()
+        .order_by(MonthlyRollup.category)
+        .all()
+    )
+    categories = {}
+    for txn_type, category in rows:
+        if category:
+            categories.setdefault(txn_type, []).append(category)
+    return {"categories": categories}
+
+
+@finance_bp.route("/analytics", methods=["GET"])
+@use_replica
+@query_budget(4)
+def get_analytics():
+    """Monthly trends, category shares, burn rate and a forecast (see analytics.py).
+
+    Query parameters: months (shown and fitted), window (rolling average) and horizon
+    (forecast months); limits are in analytics.PARAMS.
+    """
+    import analytics
+
+    user_id = 1  # For testing, use user_id = 1
+    params = {}
+    for name, (default, low, high) in analytics.PARAMS.items():
+        try:
+            value = int(request.args.get(name, default))
+        except ValueError:
+            return jsonify({"msg": f"{name} must be an integer"}), 400
+        if not low <= value <= high:
+            return jsonify({"msg": f"{name} must be between {low} and {high}"}), 400
+        params[name] = value
+    return serve_versioned(user_id, "analytics", lambda: analytics.compute(analytics.load(user_id), **params))
+
+
+@finance_bp.route("/insights", methods=["GET"])
+@use_replica
+@query_budget(1)
+def get_insights():
+    """The precomputed insights of the nightly job (see insights.py), served as stored.
+
+    `stale` is true when the user's data changed after they were computed; the next run of
+    the job refreshes them. 404 until the job has run for the user.
+    """
+    user_id = 1  # For testing, use user_id = 1
+    row = (
+        db.session.query(UserInsight.payload, UserInsight.computed_at, UserInsight.data_version, User.data_version)
+        .join(User, User.id == UserInsight.user_id)
+        .filter(UserInsight.user_id == user_id)
+        .first()
+    )
+    if row is None:
+        return jsonify({"msg": "Insights have not been computed yet"}), 404
+    payload, computed_at, computed_version, current = row
+
+    encoding = serialization.negotiate_encoding()
+    variant = f"i{computed_at:%Y%m%d%H%M%S%f}"
+    etag = data_version.etag(user_id, current, f"{variant}-{encoding}" if encoding else variant)
+    cached = data_version.not_modified(etag)
+    if cached:
+        cached.vary.add("Accept-Encoding")
+        return cached
+    # the stored JSON is spliced in as bytes, never decoded
+    body = b"".join((
+        b'{"stale":', b"true" if computed_version != current else b"false",
+        b',"computed_at":', serialization.dumps(computed_at.isoformat()),
+        b',"insights":', payload, b"}",
+    ))
+    if encoding:
+        body = serialization.compress(body, encoding)
+    return _json_response(body, encoding, etag), 200
+
+
+@finance_bp.route("/facets", methods=["GET"])
+@use_replica
+@query_budget(3)
+def get_facets():
+    """Category and month filter options with transaction counts, read from the rollups.
+
+    `prefix` narrows the categories to names starting with it (case-insensitive), for
+    autocomplete; the months are always all of them.
+    """
+    user_id = 1  # For testing, use user_id = 1
+    return serve_versioned(user_id, "facets", lambda: _facets_payload(user_id))
+
+
+def _facets_payload(user_id):
+    base = MonthlyRollup.query.filter(MonthlyRollup.user_id == user_id, MonthlyRollup.count > 0)
+    category_query = (
+        base.filter(MonthlyRollup.category != "")
+        .with_entities(MonthlyRollup.category, MonthlyRollup.type, func.sum(MonthlyRollup.count))
+        .group_by(MonthlyRollup.category, MonthlyRollup.type)
+    )
+    prefix = (request.args.get("prefix") or "").strip().lower()
+    if prefix:
+        category_query = category_query.filter(func.lower(MonthlyRollup.category).like(like_prefix(prefix), escape="\\"))
+
+    categories = {}
+    for name, txn_type, count in category_query.all():
+        entry = categories.setdefault(name, {"name": name, "count": 0, "income": 0, "expenses": 0})
+        entry[txn_type] += int(count)
+        entry["count"] += int(count)
+
+    months = []
+    types = {"income": 0, "expenses": 0}
+    month_rows = (
+        base.with_entities(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type, func.sum(MonthlyRollup.count))
+        .group_by(MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.type)
+        .order_by(MonthlyRollup.year.desc(), MonthlyRollup.month.desc())
+        .all()
+    )
+    for year, month, txn_type, count in month_rows:
+        types[txn_type] += int(count)
+        if not year:
+            continue  # undated transactions have no month to filter by
+        key = f"{year:04d}-{month:02d}"
+        if not months or months[-1]["key"] != key:
+            months.append({"key": key, "label": _month_label(year, month), "count": 0})
+        months[-1]["count"] += int(count)
+
+    return {
+        "categories": sorted(categories.values(), key=lambda c: (-c["count"], c["name"].lower())),
+        "months": months,
+        "types": types,
+    }
+
+
+@finance_bp.route("/changes", methods=["GET"])
+@use_replica
+@query_budget(4)
+def get_changes():
+    """Transactions added, edited or deleted since the cursor `since` (see sync.py).
+
+    Without `since` only the current cursor is returned: read it before loading the full
+    history, then poll from it. A cursor that is too old gets 410 and the current cursor,
+    to start over from. Follow `cursor` while `more` is true.
+    """
+    user_id = 1  # For testing, use user_id = 1
+    if request.args.get("since") is None:
+        return jsonify({"cursor": data_version.current(user_id), "changed": [], "deleted": [], "more": False}), 200
+    try:
+        since = int(request.args["since"])
+        limit = int(request.args.get("limit", current_app.config["CHANGES_PAGE_SIZE"]))
+    except ValueError:
+        return jsonify({"msg": "since and limit must be integers"}), 400
+    limit = max(1, min(limit, current_app.config["CHANGES_MAX_PAGE_SIZE"]))
+
+    try:
+        return jsonify(sync.changes(user_id, since, limit)), 200
+    except sync.CursorExpired as e:
+        return jsonify({"msg": "Cursor expired; reload the full history", "cursor": e.current}), 410
+    except LookupError:
+        return jsonify({"msg": "User not found"}), 404
+
+
+@finance_bp.route("/archive", methods=["GET"])
+@use_replica
+@query_budget(2)
+def get_archive():
+    """Archived years with their row counts and totals (from segment metadata only)."""
+    user_id = 1  # For testing, use user_id = 1
+    return serve_versioned(user_id, "archive", lambda: {"years": archive.yearly_totals(user_id)})
+
+
+@finance_bp.route("/cache-stats", methods=["GET"])
+@query_budget(0)
+def cache_stats():
+    """Hit/miss/eviction counters of this worker's response cache, for tuning."""
+    return jsonify(response_cache.info()), 200
 
 @finance_bp.route("/<int:tx_id>", methods=["DELETE"])
+@query_budget(6)
 def delete_transaction(tx_id):
     user_id = 1  # For testing, use user_id = 1
     tx = Transaction.query.filter_by(id=tx_id, user_id=user_id).first()
     if not tx:
         return jsonify({"msg": "Transaction not found"}), 404
+    rollups.record_transaction(tx, -1)
+    sync.record_delete(user_id, tx.id, data_version.bump(user_id))
     db.session.delete(tx)
     db.session.commit()
+    response_cache.invalidate_user(user_id)
     return jsonify({"msg": "Deleted"}), 200
 
 @finance_bp.route("/<int:tx_id>", methods=["PUT"])
+@query_budget(16)
 def update_transaction(tx_id):
     user_id = 1  # For testing, use user_id = 1
     tx = Transaction.query.filter_by(id=tx_id, user_id=user_id).first()
@@ -61,19 +891,30 @@ def update_transaction(tx_id):
         return jsonify({"msg": "Transaction not found"}), 404
 
     data = request.get_json() or {}
-    if "amount" in data:
-        tx.amount = float(data["amount"])
+    error = invalid_type(data["type"]) if "type" in data else None
+    if error:
+        return jsonify({"msg": error}), 400
+    try:
+        amount = parse_amount(data["amount"]) if "amount" in data else None
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # take the old values out of the rollups, then add the edited row back in
+    rollups.record_transaction(tx, -1)
+    tx.version = data_version.bump(user_id)
+    if amount is not None:
+        tx.amount = amount
     if "type" in data:
         tx.type = data["type"]
     if "category" in data:
-        tx.category = data["category"]
-    if "month" in data:
-        tx.month = data["month"]
+        tx.set_category(data["category"])
     if "date" in data:
         try:
             tx.date = datetime.fromisoformat(data["date"]).date()
         except Exception:
             pass
 
+    rollups.record_transaction(tx)
     db.session.commit()
+    response_cache.invalidate_user(user_id)
     return jsonify({"msg": "Updated", "transaction": tx.to_dict()}), 200
@@ -0,0 +1,87 @@
+"""Password hashing off the request thread.
+
+bcrypt releases the GIL while it works, so a small thread pool lets a worker keep serving
+finance requests while logins hash. The pool is bounded: HASH_WORKERS hashes run at once and
+at most HASH_QUEUE_SIZE more may wait. Beyond that `PasswordHasher` raises HashingBusy
+straight away, and the auth blueprint turns it into a 503 instead of letting a login burst
+pile up behind the workers.
+
+The work factor is BCRYPT_LOG_ROUNDS; `needs_rehash()` tells login when a stored hash was
+made with a different cost.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app
+from app import bcrypt
+
+
+class HashingBusy(Exception):
+    """The hashing pool and its queue are full, or a hash did not finish in time."""
+
+
+class _BoundedPool:
+    def __init__(self, workers, queue_size):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.pid = os.getpid()
+
+    def run(self, fn, *args, timeout):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            raise HashingBusy()
+
+
+class PasswordHasher:
+    """Flask extension wrapper around the bounded bcrypt pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.extensions["password_hasher"] = {"pool": None}
+
+    def _pool(self):
+        state = current_app.extensions["password_hasher"]
+        # built lazily, and rebuilt after a fork so gunicorn workers never share threads
+        with self._lock:
+            if state["pool"] is None or state["pool"].pid != os.getpid():
+                state["pool"] = _BoundedPool(
+                    current_app.config["HASH_WORKERS"], current_app.config["HASH_QUEUE_SIZE"]
+                )
+            return state["pool"]
+
+    def hash(self, password):
+        rounds = current_app.config["BCRYPT_LOG_ROUNDS"]
+        hashed = self._pool().run(
+            bcrypt.generate_password_hash, password, rounds, timeout=current_app.config["HASH_TIMEOUT"]
+        )
+        return hashed.decode("utf-8")
+
+    def check(self, password_hash, password):
+        return self._pool().run(
+            bcrypt.check_password_hash, password_hash, password, timeout=current_app.config["HASH_TIMEOUT"]
+        )
+
+    @staticmethod
+    def cost(password_hash):
+        """Work factor encoded in a $2b$<cost>$... hash, or None if it cannot be read."""
+        try:
+            return int(password_hash.split("$")[2])
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+    def needs_rehash(self, password_hash):
+        return self.cost(password_hash) != current_app.config["BCRYPT_LOG_ROUNDS"]
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,48 @@
+"""Liveness and readiness probes for the platform's health checks.
+
+/healthz answers as long as the worker can serve a request; it never touches the database,
+so a slow or restarting database does not get healthy workers killed. /readyz pings the
+primary database with SELECT 1 and returns 503 when that fails. A successful ping is reused
+for READYZ_CACHE_SECONDS per worker, so frequent probes cost at most one query per interval;
+failures are not cached, so a recovered database is noticed on the next probe.
+"""
+import threading
+import time
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import text
+from app import db
+from database import query_budget
+
+health_bp = Blueprint("health", __name__)
+
+_ready_lock = threading.Lock()
+_ready_at = None  # time.monotonic() of the last successful ping
+
+
+@health_bp.route("/healthz", methods=["GET"])
+@query_budget(0)
+def healthz():
+    return jsonify({"status": "ok"}), 200
+
+
+@health_bp.route("/readyz", methods=["GET"])
+@query_budget(1)
+def readyz():
+    global _ready_at
+    ttl = current_app.config["READYZ_CACHE_SECONDS"]
+    checked = _ready_at
+    if checked is not None and time.monotonic() - checked < ttl:
+        return jsonify({"status": "ready", "cached": True}), 200
+
+    with _ready_lock:  # one ping per worker at a time; the others wait for its answer
+        if _ready_at is not None and time.monotonic() - _ready_at < ttl:
+            return jsonify({"status": "ready", "cached": True}), 200
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except Exception as e:
+            _ready_at = None
+            current_app.logger.warning("readiness check failed: %s", e)
+            return jsonify({"status": "unavailable", "msg": "Database is unreachable"}), 503
+        _ready_at = time.monotonic()
+    return jsonify({"status": "ready", "cached": False}), 200
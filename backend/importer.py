@@ -0,0 +1,127 @@
+"""Streaming CSV import of transactions.
+
+Rows are read one at a time from the uploaded stream, validated with the same rules as
+`POST /api/finance/add`, and written in batches with a single bulk INSERT per batch
+(executemany on SQLite, multi-row VALUES via SQLAlchemy's insertmanyvalues on PostgreSQL).
+Each batch commits together with its monthly rollup deltas, so memory stays bounded by the
+batch size no matter how large the file is.
+"""
+import csv
+import time
+from collections import defaultdict
+from datetime import date as date_cls
+from sqlalchemy import insert
+from app import db
+from models import Transaction, Category
+from finance import parse_amount, parse_date, invalid_type
+import rollups
+import data_version
+
+# what the CSV export writes for an empty cell (undated or uncategorised transactions)
+NO_VALUE = "-"
+
+
+def parse_row(user_id, record):
+    """Validate one CSV record (dict keyed by lower-case header) into Transaction column values."""
+    date_str = (record.get("date") or "").strip()
+    txn_date = None
+    if date_str == NO_VALUE:
+        pass  # exported undated transaction: stays undated
+    elif date_str:
+        try:
+            txn_date = parse_date(date_str)
+        except ValueError:
+            raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+    else:
+        txn_date = date_cls.today()
+
+    amount_str = (record.get("amount") or "").strip()
+    if not amount_str:
+        raise ValueError("amount is required")
+    amount = parse_amount(amount_str)
+
+    txn_type = (record.get("type") or "").strip() or "expenses"
+    error = invalid_type(txn_type)
+    if error:
+        raise ValueError(error)
+
+    category = (record.get("category") or "").strip() or "General"
+    # a "month" column (e.g. from our own export) is ignored: month is derived from date
+    return {
+        "user_id": user_id,
+        "amount": amount,
+        "type": txn_type,
+        "category": None if category == NO_VALUE else category,
+        "date": txn_date,
+    }
+
+
+def _flush(user_id, rows):
+    deltas = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        delta = deltas[rollups.rollup_key(row["date"], row["type"], row["category"])]
+        delta[0] += row["amount"]
+        delta[1] += 1
+
+    version = data_version.bump(user_id)
+    category_ids = Category.ids_for(user_id, {row["category"] for row in rows})
+    db.session.execute(insert(Transaction.__table__), [
+        {"user_id": row["user_id"], "amount": row["amount"], "type": row["type"],
+         "category_id": category_ids.get(row["category"]), "date": row["date"], "version": version}
+        for row in rows
+    ])
+    rollups.record_many(user_id, {key: tuple(value) for key, value in deltas.items()})
+    db.session.commit()
+
+
+def import_csv(user_id, text_stream, batch_size=1000, max_errors=100):
+    """Import transactions from a text stream of CSV with a header row.
+
+    Invalid rows are skipped and reported; valid rows are committed batch by batch.
+    Returns a report dict with counts, the first `max_errors` row errors and the throughput.
+    """
+    started = time.perf_counter()
+    reader = csv.reader(text_stream)
+    imported = failed = 0
+    errors = []
+
+    header = next(reader, None)
+    if not header:
+        raise ValueError("CSV file is empty")
+    # headers are matched case-insensitively, so the dashboard's own CSV export
+    # (Date, Month, Category, Type, Amount) imports without editing
+    header = [h.strip().lower() for h in header]
+    if "amount" not in header:
+        raise ValueError("CSV header must include an 'amount' column")
+
+    batch = []
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        record = dict(zip(header, values))
+        try:
+            batch.append(parse_row(user_id, record))
+        except ValueError as e:
+            failed += 1
+            if len(errors) < max_errors:
+                errors.append({"line": reader.line_num, "msg": str(e)})
+            continue
+
+        if len(batch) >= batch_size:
+            _flush(user_id, batch)
+            imported += len(batch)
+            batch = []
+
+    if batch:
+        _flush(user_id, batch)
+        imported += len(batch)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(imported / elapsed, 1) if elapsed > 0 else None,
+    }
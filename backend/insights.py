@@ -0,0 +1,232 @@
+"""Nightly per-user insights: monthly totals, top categories and anomaly flags, computed ahead.
+
+`python manage.py insights` runs the job. It collects the users whose insights are missing or
+stale (their data_version moved since) and splits them into chunks of INSIGHTS_CHUNK_SIZE.
+The chunks go to a ProcessPoolExecutor of INSIGHTS_WORKERS spawned processes; each worker
+builds its own app, and with it its own engine and connections. Per chunk, a worker:
+- loads every user's columns with analytics.load_many() (the same few queries for the whole chunk);
+- computes the insights with NumPy;
+- replaces the chunk's user_insight rows with one DELETE and one bulk INSERT, in one commit.
+GET /api/finance/insights serves the stored JSON as it is.
+
+Each run is recorded in insight_run. If the latest run stopped part-way (crash, deploy,
+Ctrl-C), the next invocation resumes it. Users that run already wrote are skipped, so only
+the remaining chunks are computed. --force recomputes users whose insights are current too.
+"""
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date as date_cls, datetime
+import numpy as np
+from sqlalchemy import and_, delete, insert, or_
+from app import db
+from models import InsightRun, User, UserInsight
+import analytics
+import serialization
+
+MONTHS = 12                 # monthly totals kept, and the window of the top categories
+TOP_CATEGORIES = 5
+BASELINE_MONTHS = 6         # months before the latest one that anomalies are measured against
+SPIKE_Z = 2.0               # latest month's spending vs the baseline: standard deviations above the mean
+SPIKE_RATIO = 1.25          # ... and at least this multiple of the mean
+CATEGORY_RATIO = 2.0        # a category's latest month vs its baseline mean
+CATEGORY_MIN_CENTS = 5000   # ignore category spikes below 50.00
+LARGE_Z = 3.0               # a recent expense vs its category's mean, in standard deviations
+LARGE_MIN_SAMPLES = 10      # expenses a category needs before its spread means anything
+LARGE_DAYS = 30
+MAX_FLAGS = 5               # per kind
+
+
+def _money(cents):
+    return round(float(cents) / 100, 2)
+
+
+def _category(columns, code):
+    return columns.names[code] if code >= 0 else None
+
+
+def anomalies(columns):
+    """Anomaly flags for a non-empty Columns, by kind, largest first within a kind.
+
+    - spending_spike: the latest month's expenses are far above the months before it;
+    - category_spike: a category's latest month is a multiple of its usual month;
+    - large_expense: an expense in the last LARGE_DAYS days far above its category's usual amount.
+    """
+    day, cents, income = columns.day, columns.cents.astype(np.float64), columns.income
+    expense = ~income
+    month_number = day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    latest = int(month_number.max())
+    latest_key = analytics.month_key(latest)[0]
+    age = latest - month_number  # 0 for the latest month
+    flags = []
+
+    # spending spike; needs a few months of baseline to mean anything
+    in_window = expense & (age <= BASELINE_MONTHS)
+    totals = np.bincount(age[in_window], weights=cents[in_window], minlength=BASELINE_MONTHS + 1)
+    current, baseline = totals[0], totals[1:]
+    if np.count_nonzero(baseline) >= 3:
+        mean, std = baseline.mean(), baseline.std()
+        if current > mean + SPIKE_Z * std and current > mean * SPIKE_RATIO:
+            flags.append({"kind": "spending_spike", "month": latest_key,
+                          "amount": _money(current), "usual": _money(mean)})
+
+    # category spikes: one bincount over (age, category) cells
+    width = len(columns.names) + 1
+    cells = age[in_window] * width + columns.category[in_window] + 1
+    grid = np.bincount(cells, weights=cents[in_window], minlength=(BASELINE_MONTHS + 1) * width)
+    grid = grid.reshape(BASELINE_MONTHS + 1, width)
+    current, usual = grid[0], grid[1:].mean(axis=0)
+    spiking = np.flatnonzero((current >= CATEGORY_MIN_CENTS) & (usual > 0) & (current > usual * CATEGORY_RATIO))
+    spiking = spiking[np.argsort(-(current[spiking] / usual[spiking]), kind="stable")][:MAX_FLAGS]
+    flags.extend(
+        {"kind": "category_spike", "month": latest_key, "category": _category(columns, code - 1),
+         "amount": _money(current[code]), "usual": _money(usual[code])}
+        for code in spiking
+    )
+
+    # large expenses against per-category mean and spread
+    codes, amounts = columns.category[expense] + 1, cents[expense]
+    count = np.bincount(codes, minlength=width)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(codes, weights=amounts, minlength=width) / count
+        squares = np.bincount(codes, weights=amounts * amounts, minlength=width) / count
+        std = np.sqrt(np.maximum(squares - mean * mean, 0))
+    recent = day[expense] > int(day.max()) - LARGE_DAYS
+    large = np.flatnonzero(
+        recent & (count[codes] >= LARGE_MIN_SAMPLES) & (amounts > mean[codes] + LARGE_Z * std[codes])
+    )
+    large = large[np.argsort(-amounts[large], kind="stable")][:MAX_FLAGS]
+    expense_day = day[expense]
+    flags.extend(
+        {"kind": "large_expense",
+         "date": date_cls.fromordinal(int(expense_day[i]) + analytics.EPOCH_ORDINAL).isoformat(),
+         "category": _category(columns, codes[i] - 1),
+         "amount": _money(amounts[i]), "usual": _money(mean[codes[i]])}
+        for i in large
+    )
+    return flags
+
+
+def compute(columns):
+    """The insights payload for a Columns."""
+    summary = analytics.compute(columns, months=MONTHS, window=3, horizon=0)
+    return {
+        "as_of": summary["as_of"],
+        "months": [{key: month[key] for key in ("key", "month", "count", "income", "expenses", "net")}
+                   for month in summary["months"]],
+        "top_categories": summary["categories"][:TOP_CATEGORIES],
+        "burn_rate": summary["burn_rate"],
+        "anomalies": anomalies(columns) if len(columns.day) else [],
+    }
+
+
+def compute_chunk(run_id, user_ids):
+    """Compute and store the insights of `user_ids` in one commit; returns the users written."""
+    # versions are read before the data: a write landing in between makes the row look
+    # stale, so it is recomputed next time rather than served as current
+    versions = dict(db.session.query(User.id, User.data_version).filter(User.id.in_(user_ids)).all())
+    loaded = analytics.load_many(list(versions))
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "run_id": run_id, "data_version": version, "computed_at": now,
+         "payload": serialization.dumps(compute(loaded[user_id]))}
+        for user_id, version in versions.items()
+    ]
+    table = UserInsight.__table__
+    db.session.execute(delete(table).where(table.c.user_id.in_(list(versions))))
+    if rows:
+        db.session.execute(insert(table), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def _compute_chunk_in_worker(run_id, user_ids):
+    # runs in a spawned pool process: its own app, engine and connections
+    from app import get_app
+
+    with get_app().app_context():
+        return compute_chunk(run_id, user_ids)
+
+
+def start_run(force=False, restart=False):
+    """(run, resumed): the latest run if it is unfinished and compatible, else a new run."""
+    job = InsightRun.query.order_by(InsightRun.id.desc()).first()
+    if job is not None and job.finished_at is None and not restart and (job.force or not force):
+        return job, True
+    job = InsightRun(force=force)
+    db.session.add(job)
+    db.session.commit()
+    return job, False
+
+
+def pending_users(run):
+    """Ids of the users `run` still has to compute, in id order."""
+    redo = [UserInsight.run_id != run.id]
+    if not run.force:
+        redo.append(UserInsight.data_version != User.data_version)
+    query = (
+        db.session.query(User.id)
+        .outerjoin(UserInsight, UserInsight.user_id == User.id)
+        .filter(or_(UserInsight.user_id.is_(None), and_(*redo)))
+        .order_by(User.id)
+    )
+    return [user_id for (user_id,) in query]
+
+
+def run(workers, chunk_size, force=False, restart=False, progress=None):
+    """Run (or resume) the insights job and return a report dict.
+
+    `progress(done, total, seconds)` is called after each chunk is stored. With workers <= 1
+    the chunks are computed in this process.
+    """
+    started = time.perf_counter()
+    job, resumed = start_run(force, restart)
+    user_ids = pending_users(job)
+    if not resumed:
+        job.users_total = len(user_ids)
+        db.session.commit()
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    workers = max(1, min(workers, len(chunks)))
+
+    done = 0
+
+    def stored(written):
+        nonlocal done
+        done += written
+        InsightRun.query.filter_by(id=job.id).update(
+            {InsightRun.users_done: InsightRun.users_done + written}, synchronize_session=False
+        )
+        db.session.commit()
+        if progress:
+            progress(done, len(user_ids), time.perf_counter() - started)
+
+    if workers == 1:
+        for chunk in chunks:
+            stored(compute_chunk(job.id, chunk))
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            futures = [executor.submit(_compute_chunk_in_worker, job.id, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                stored(future.result())
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    seconds = time.perf_counter() - started
+    return {
+        "run_id": job.id,
+        "resumed": resumed,
+        "users": done,
+        "chunks": len(chunks),
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "users_per_second": round(done / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def delete_user(user_id):
+    UserInsight.query.filter_by(user_id=user_id).delete(synchronize_session=False)
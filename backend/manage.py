@@ -1,8 +1,10 @@
-from app import create_app
+from app import get_app
 from models import db
+import argparse
 import os
+import sys
 
-app = create_app()
+app = get_app()
 
 def setup_database():
     """Initialize database tables on startup"""
@@ -14,7 +16,139 @@ def setup_database():
         except Exception as e:
             print(f"⚠️ Database setup warning: {e}")
 
-if __name__ == "__main__":
+def rollups_command(args):
+    """Backfill and/or check monthly_rollup against the transaction table."""
+    import rollups
+
+    with app.app_context():
+        if args.rebuild:
+            rollups.rebuild(args.user)
+            db.session.commit()
+            print("✅ Monthly rollups rebuilt")
+
+        mismatches = rollups.verify(args.user)
+        if not mismatches:
+            print("✅ Monthly rollups match the transaction table")
+            return 0
+        for key, expected, actual in mismatches:
+            print(f"❌ {key}: expected total={expected[0]} count={expected[1]}, "
+                  f"rollup has total={actual[0]} count={actual[1]}")
+        print(f"⚠️ {len(mismatches)} rollup row(s) out of sync; run with --rebuild to fix")
+        return 1
+
+
+def import_csv_command(args):
+    """Bulk-load a CSV file of transactions for one user."""
+    import importer
+
+    with app.app_context():
+        batch_size = args.batch_size or app.config["IMPORT_BATCH_SIZE"]
+        with open(args.path, encoding="utf-8-sig", newline="") as f:
+            report = importer.import_csv(args.user, f, batch_size=batch_size,
+                                         max_errors=app.config["IMPORT_MAX_ERRORS"])
+
+    for error in report["errors"]:
+        print(f"❌ line {error['line']}: {error['msg']}")
+    if report["errors_truncated"]:
+        print(f"⚠️ only the first {len(report['errors'])} errors are shown")
+    print(f"✅ Imported {report['imported']} row(s), {report['failed']} failed, "
+          f"in {report['seconds']}s ({report['rows_per_second']} rows/s)")
+    return 1 if report["failed"] else 0
+
+
+def send_mail_command(args):
+    """Drain the email outbox once, or keep draining with --loop."""
+    import time
+    import outbox
+
+    with app.app_context():
+        while True:
+            sent = outbox.drain(app.config["MAIL_OUTBOX_BATCH"])
+            if sent:
+                print(f"✅ Sent {sent} message(s)")
+            elif not args.loop:
+                break
+            else:
+                time.sleep(args.interval)
+        print(f"📬 {outbox.pending_count()} message(s) still pending")
+    return 0
+
+
+def archive_command(args):
+    """Move old transactions into the compressed archive, then compact each year's segments."""
+    from datetime import date
+    import archive
+
+    with app.app_context():
+        cutoff = date.fromisoformat(args.before) if args.before else archive.default_cutoff(app.config)
+        users = [args.user] if args.user else archive.users_to_archive(cutoff)
+        for user_id in users:
+            moved = archive.archive_user(user_id, cutoff)
+            if moved:
+                print(f"📦 user {user_id}: archived {moved} transaction(s) dated before {cutoff}")
+        if not args.no_compact:
+            if not args.user:
+                from models import ArchiveSegment
+                users = [u for (u,) in db.session.query(ArchiveSegment.user_id).distinct()]
+            for user_id in users:
+                years = archive.compact_user(user_id)
+                if years:
+                    print(f"🗜️ user {user_id}: compacted {years} year(s)")
+        print("✅ Archive up to date")
+    return 0
+
+
+def prune_tombstones_command(args):
+    """Forget deletes older than the retention period; clients behind them reload in full."""
+    import sync
+
+    with app.app_context():
+        days = args.days if args.days is not None else app.config["TOMBSTONE_RETENTION_DAYS"]
+        pruned = sync.prune_tombstones(days)
+    print(f"🧹 Pruned {pruned} tombstone(s) older than {days} day(s)")
+    return 0
+
+
+def prune_outbox_command(args):
+    """Delete sent and failed outbox emails, whose bodies may still hold reset links."""
+    import outbox
+
+    with app.app_context():
+        hours = args.hours if args.hours is not None else app.config["MAIL_OUTBOX_RETENTION_HOURS"]
+        pruned = outbox.prune(hours)
+    print(f"🧹 Pruned {pruned} sent/failed outbox message(s) older than {hours} hour(s)")
+    return 0
+
+
+def insights_command(args):
+    """Precompute every user's dashboard insights in a process pool, resuming an unfinished run."""
+    import insights
+
+    def progress(done, total, seconds):
+        print(f"⚙️ {done}/{total} user(s), {done / seconds:.1f} users/s")
+
+    with app.app_context():
+        report = insights.run(
+            args.workers or app.config["INSIGHTS_WORKERS"],
+            args.chunk_size or app.config["INSIGHTS_CHUNK_SIZE"],
+            force=args.force, restart=args.restart, progress=progress,
+        )
+    action = "Resumed" if report["resumed"] else "Finished"
+    print(f"✅ {action} insights run {report['run_id']}: {report['users']} user(s) in {report['chunks']} chunk(s) "
+          f"on {report['workers']} worker(s), {report['seconds']}s ({report['users_per_second']} users/s)")
+    return 0
+
+
+def startup_report_command(args):
+    """Print how long this process took to import and build the app, phase by phase."""
+    from startup import format_report
+
+    print(f"⏱️ Startup phases (pid {os.getpid()}):")
+    print(format_report(app.extensions["startup"]))
+    return 0
+
+
+def runserver_command(args):
     # Setup database on startup
     setup_database()
 
@@ -27,3 +161,63 @@ if __name__ == "__main__":
         # Development mode: run Flask dev server
         print("🔧 Development mode: Starting Flask dev server")
         app.run(debug=True, host="0.0.0.0", port=5000)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Personal Finance backend management")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("runserver", help="create tables and start the dev server (default)")
+
+    rollups_parser = commands.add_parser("rollups", help="verify or rebuild monthly rollups")
+    rollups_parser.add_argument("--rebuild", action="store_true", help="recompute rollups from transactions first")
+    rollups_parser.add_argument("--user", type=int, default=None, help="limit to one user id")
+    rollups_parser.set_defaults(func=rollups_command)
+
+    import_parser = commands.add_parser("import-csv", help="bulk-load transactions from a CSV file")
+    import_parser.add_argument("path", help="CSV file with a header row (date, amount, type, category)")
+    import_parser.add_argument("--user", type=int, required=True, help="owner user id")
+    import_parser.add_argument("--batch-size", type=int, default=None, help="rows per bulk INSERT/commit")
+    import_parser.set_defaults(func=import_csv_command)
+
+    mail_parser = commands.add_parser("send-mail", help="deliver queued outbox emails")
+    mail_parser.add_argument("--loop", action="store_true", help="keep polling instead of exiting when empty")
+    mail_parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls with --loop")
+    mail_parser.set_defaults(func=send_mail_command)
+
+    archive_parser = commands.add_parser("archive", help="move old transactions into the compressed archive")
+    archive_parser.add_argument("--before", default=None,
+                                help="archive transactions dated before YYYY-MM-DD (default: ARCHIVE_AFTER_DAYS ago)")
+    archive_parser.add_argument("--user", type=int, default=None, help="limit to one user id")
+    archive_parser.add_argument("--no-compact", action="store_true", help="skip merging each year's segments")
+    archive_parser.set_defaults(func=archive_command)
+
+    prune_parser = commands.add_parser("prune-tombstones", help="delete old delete markers of the /changes feed")
+    prune_parser.add_argument("--days", type=int, default=None,
+                              help="keep tombstones this many days (default: TOMBSTONE_RETENTION_DAYS)")
+    prune_parser.set_defaults(func=prune_tombstones_command)
+
+    outbox_prune_parser = commands.add_parser("prune-outbox", help="delete sent and failed outbox emails")
+    outbox_prune_parser.add_argument("--hours", type=int, default=None,
+                                     help="keep messages this many hours (default: MAIL_OUTBOX_RETENTION_HOURS)")
+    outbox_prune_parser.set_defaults(func=prune_outbox_command)
+
+    insights_parser = commands.add_parser("insights", help="precompute per-user dashboard insights")
+    insights_parser.add_argument("--workers", type=int, default=None,
+                                 help="pool processes (default: INSIGHTS_WORKERS; 1 computes in this process)")
+    insights_parser.add_argument("--chunk-size", type=int, default=None,
+                                 help="users per chunk and bulk write (default: INSIGHTS_CHUNK_SIZE)")
+    insights_parser.add_argument("--force", action="store_true", help="recompute insights that are still current")
+    insights_parser.add_argument("--restart", action="store_true", help="start a new run instead of resuming")
+    insights_parser.set_defaults(func=insights_command)
+
+    startup_parser = commands.add_parser("startup-report", help="show import and init time per startup phase")
+    startup_parser.set_defaults(func=startup_report_command)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    sys.exit(getattr(args, "func", runserver_command)(args))
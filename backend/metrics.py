@@ -0,0 +1,285 @@
+"""Request and SQL metrics in Prometheus text format, served on /metrics.
+
+Request hooks record, per route template (e.g. /api/finance/<int:tx_id>) and method:
+request count by status, latency and response-size histograms, and the number of SQL
+statements and SQL time spent per request. SQLAlchemy engine events time every statement and
+every pool checkout wait. Recording is a few perf_counter() calls and dict updates under one
+lock, so the collector is meant to stay on.
+
+Streamed responses (the CSV export) are timed until the response object is returned and have
+no size observation, since their length is unknown at that point; SQL they run while streaming
+is counted under an empty route.
+
+Gunicorn: every worker keeps its own registry. With METRICS_DIR set, workers write a snapshot
+there at most every METRICS_FLUSH_INTERVAL seconds (and whenever they serve /metrics), and
+/metrics sums the snapshots of all workers, including ones that have exited, so counters and
+histograms stay monotonic for the whole deployment. Point METRICS_DIR at a directory that is
+emptied on deploy. Without METRICS_DIR, /metrics reports the worker that served it.
+"""
+import hmac
+import json
+import os
+import threading
+import time
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+COUNTERS = {
+    "http_requests_total": "Requests handled, by route, method and status.",
+    "db_statements_total": "SQL statements executed, by route (empty outside requests).",
+    "db_statement_seconds_total": "Seconds spent executing SQL, by route (empty outside requests).",
+}
+HISTOGRAMS = {
+    "http_request_duration_seconds": (LATENCY_BUCKETS, "Request latency, by route and method."),
+    "http_response_size_bytes": (SIZE_BUCKETS, "Response body size, by route and method."),
+    "http_request_db_statements": (COUNT_BUCKETS, "SQL statements per request, by route."),
+    "http_request_db_seconds": (LATENCY_BUCKETS, "SQL time per request, by route."),
+    "db_pool_checkout_wait_seconds": (LATENCY_BUCKETS, "Time spent waiting for a pooled connection, by bind."),
+}
+
+
+class Registry:
+    """Counters and histograms keyed by (metric name, sorted label pairs)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][0]
+        key = (name, labels)
+        with self._lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(buckets)] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), list(series)] for (name, labels), series in self.histograms.items()],
+            }
+
+
+def merge(snapshots):
+    """Sum snapshots from several workers into one registry."""
+    total = Registry()
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            total.counters[key] = total.counters.get(key, 0) + value
+        for name, labels, series in snapshot["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            current = total.histograms.setdefault(key, [0] * len(series))
+            for i, value in enumerate(series):
+                current[i] += value
+    return total
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs, extra=None):
+    pairs = list(pairs) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(registry):
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for name, help_text in COUNTERS.items():
+        series = sorted((labels, value) for (n, labels), value in registry.counters.items() if n == name)
+        if not series:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_labels(labels)} {_number(value)}" for labels, value in series]
+    for name, (buckets, help_text) in HISTOGRAMS.items():
+        series = sorted((labels, values) for (n, labels), values in registry.histograms.items() if n == name)
+        if not series:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(buckets + (float("inf"),), values):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(values[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    """Flask extension: `metrics.init_app(app)` installs the hooks and the /metrics route."""
+
+    def __init__(self):
+        self.registry = Registry()
+        self._flushed_at = 0.0
+        self._started = time.time()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # a forked worker starts from zero and writes its own snapshot file
+        self.registry = Registry()
+        self._flushed_at = 0.0
+        self._started = time.time()
+
+    def init_app(self, app):
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule("/metrics", "metrics", self._metrics_view)
+
+        from app import db
+        with app.app_context():
+            for bind, engine in db.engines.items():
+                self.instrument_engine(engine, bind or "default")
+
+    # --- request hooks ---
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql = [0, 0.0]
+
+    def _after_request(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        labels = (("method", request.method), ("route", route))
+        statements, sql_seconds = g.pop("metrics_sql", (0, 0.0))
+
+        registry = self.registry
+        registry.inc("http_requests_total", labels + (("status", str(response.status_code)),))
+        registry.observe("http_request_duration_seconds", labels, elapsed)
+        if not response.is_streamed:
+            registry.observe("http_response_size_bytes", labels, response.calculate_content_length() or 0)
+        route_label = (("route", route),)
+        registry.observe("http_request_db_statements", route_label, statements)
+        registry.observe("http_request_db_seconds", route_label, sql_seconds)
+        if statements:
+            registry.inc("db_statements_total", route_label, statements)
+            registry.inc("db_statement_seconds_total", route_label, sql_seconds)
+
+        self._maybe_flush(current_app.config)
+        return response
+
+    # --- SQLAlchemy events ---
+
+    def instrument_engine(self, engine, bind):
+        """Time statements and pool checkouts on `engine` (asgi.py adds its async engines)."""
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            if context is not None:
+                context._metrics_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, "_metrics_started", None)
+            if started is None:
+                return
+            elapsed = time.perf_counter() - started
+            if has_request_context() and "metrics_sql" in g:
+                g.metrics_sql[0] += 1
+                g.metrics_sql[1] += elapsed
+            else:
+                self.registry.inc("db_statements_total", (("route", ""),))
+                self.registry.inc("db_statement_seconds_total", (("route", ""),), elapsed)
+
+        # The pool has no "checkout started" event, so the pool's own wait is wrapped; dispose()
+        # (e.g. after a fork) builds a new pool, which is wrapped again.
+        self._time_checkouts(engine.pool, bind)
+
+        @event.listens_for(engine, "engine_disposed")
+        def _disposed(engine):
+            self._time_checkouts(engine.pool, bind)
+
+    def _time_checkouts(self, pool, bind):
+        if getattr(pool, "_metrics_timed", False):
+            return
+        do_get = pool._do_get
+        labels = (("bind", bind),)
+
+        def timed_do_get():
+            started = time.perf_counter()
+            try:
+                return do_get()
+            finally:
+                self.registry.observe("db_pool_checkout_wait_seconds", labels, time.perf_counter() - started)
+
+        pool._do_get = timed_do_get
+        pool._metrics_timed = True
+
+    # --- multi-process snapshots and the endpoint ---
+
+    def _snapshot_path(self, directory):
+        return os.path.join(directory, f"worker-{os.getpid()}-{int(self._started * 1000)}.json")
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        path = self._snapshot_path(directory)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp, path)
+        self._flushed_at = time.monotonic()
+
+    def _maybe_flush(self, config):
+        directory = config.get("METRICS_DIR")
+        if directory and time.monotonic() - self._flushed_at >= config["METRICS_FLUSH_INTERVAL"]:
+            self.flush(directory)
+
+    def collect(self, config):
+        """The registry to expose: this worker's, or the sum over all workers' snapshots."""
+        directory = config.get("METRICS_DIR")
+        if not directory:
+            return self.registry
+        self.flush(directory)
+        snapshots = []
+        for name in os.listdir(directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # a file being replaced right now; it is picked up on the next scrape
+        return merge(snapshots)
+
+    def _metrics_view(self):
+        token = current_app.config.get("METRICS_TOKEN")
+        supplied = request.headers.get("Authorization", "")
+        # constant-time comparison, so response timing does not leak the token
+        if token and not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+        return Response(render(self.collect(current_app.config)), mimetype="text/plain; version=0.0.4")
+
+
+metrics = Metrics()
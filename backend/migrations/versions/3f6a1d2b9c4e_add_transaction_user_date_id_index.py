@@ -0,0 +1,28 @@
+"""Add (user_id, date, id) index on transaction for keyset-paginated history
+
+Revision ID: 3f6a1d2b9c4e
+Revises: c85d9599b2f0
+Create Date: 2026-10-18 10:12:31.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6a1d2b9c4e'
+down_revision: Union[str, Sequence[str], None] = 'c85d9599b2f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_transaction_user_date_id', 'transaction', ['user_id', 'date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transaction_user_date_id', table_name='transaction')
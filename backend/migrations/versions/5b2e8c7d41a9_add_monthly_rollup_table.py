@@ -0,0 +1,56 @@
+"""Add monthly_rollup table and backfill it from transaction
+
+Revision ID: 5b2e8c7d41a9
+Revises: 3f6a1d2b9c4e
+Create Date: 2026-10-18 11:02:47.518390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8c7d41a9'
+down_revision: Union[str, Sequence[str], None] = '3f6a1d2b9c4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    monthly_rollup = op.create_table('monthly_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'year', 'month', 'type', 'category', name='uq_monthly_rollup_key')
+    )
+
+    # Backfill from existing transactions (same grouping as rollups.rebuild)
+    transaction = sa.table('transaction',
+        sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('amount', sa.Float),
+        sa.column('type', sa.String), sa.column('category', sa.String), sa.column('date', sa.Date),
+    )
+    year = sa.func.coalesce(sa.extract('year', transaction.c.date), 0)
+    month = sa.func.coalesce(sa.extract('month', transaction.c.date), 0)
+    category = sa.func.coalesce(transaction.c.category, sa.literal(''))
+    grouped = sa.select(
+        transaction.c.user_id, year, month, transaction.c.type, category,
+        sa.func.sum(transaction.c.amount), sa.func.count(transaction.c.id),
+    ).group_by(transaction.c.user_id, year, month, transaction.c.type, category)
+    op.execute(monthly_rollup.insert().from_select(
+        ['user_id', 'year', 'month', 'type', 'category', 'total', 'count'], grouped
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('monthly_rollup')
@@ -0,0 +1,28 @@
+"""Add data_version to user for ETag support on read endpoints
+
+Revision ID: 8d3c5a1f7e20
+Revises: 5b2e8c7d41a9
+Create Date: 2026-10-18 12:20:05.731842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3c5a1f7e20'
+down_revision: Union[str, Sequence[str], None] = '5b2e8c7d41a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'data_version')
@@ -0,0 +1,53 @@
+"""Add version/updated_at to transaction, sync_floor to user and the transaction_tombstone table
+
+Revision ID: b9e4c1d7a362
+Revises: f6d2a7c94b13
+Create Date: 2026-10-18 21:14:52.480913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4c1d7a362'
+down_revision: Union[str, Sequence[str], None] = 'f6d2a7c94b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # existing rows get version 0: every cursor a client can hold is newer, so they count as
+    # already synced (clients start from a full load anyway)
+    op.add_column('transaction', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('transaction', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_transaction_user_version', 'transaction', ['user_id', 'version'], unique=False)
+    op.add_column('user', sa.Column('sync_floor', sa.Integer(), server_default='0', nullable=False))
+    op.create_table(
+        'transaction_tombstone',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_transaction_tombstone_user_version', 'transaction_tombstone', ['user_id', 'version'], unique=False
+    )
+    op.create_index('ix_transaction_tombstone_deleted_at', 'transaction_tombstone', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transaction_tombstone_deleted_at', table_name='transaction_tombstone')
+    op.drop_index('ix_transaction_tombstone_user_version', table_name='transaction_tombstone')
+    op.drop_table('transaction_tombstone')
+    op.drop_column('user', 'sync_floor')
+    op.drop_index('ix_transaction_user_version', table_name='transaction')
+    op.drop_column('transaction', 'updated_at')
+    op.drop_column('transaction', 'version')
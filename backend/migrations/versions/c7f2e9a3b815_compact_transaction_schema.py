@@ -0,0 +1,164 @@
+"""Compact transaction schema: integer cents, small-int type, category table, drop month
+
+Revision ID: c7f2e9a3b815
+Revises: a4e91b6c0d57
+Create Date: 2026-10-18 14:52:36.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f2e9a3b815'
+down_revision: Union[str, Sequence[str], None] = 'a4e91b6c0d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+MONTH_NAMES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+transaction = sa.table('transaction',
+    sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('amount', sa.Float),
+    sa.column('type', sa.String), sa.column('category', sa.String), sa.column('date', sa.Date),
+    sa.column('month', sa.String), sa.column('amount_cents', sa.BigInteger),
+    sa.column('type_code', sa.SmallInteger), sa.column('category_id', sa.Integer),
+)
+category = sa.table('category',
+    sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('name', sa.String),
+)
+monthly_rollup = sa.table('monthly_rollup',
+    sa.column('user_id', sa.Integer), sa.column('year', sa.Integer), sa.column('month', sa.Integer),
+    sa.column('type', sa.SmallInteger), sa.column('category', sa.String),
+    sa.column('total', sa.BigInteger), sa.column('count', sa.Integer),
+)
+
+
+def _in_batches(statement):
+    """Run an UPDATE over transaction in id ranges, so no single statement touches every row."""
+    if context.is_offline_mode():
+        op.execute(statement)
+        return
+    bind = op.get_bind()
+    low, high = bind.execute(sa.select(sa.func.min(transaction.c.id), sa.func.max(transaction.c.id))).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_SIZE):
+        bind.execute(statement.where(transaction.c.id >= start, transaction.c.id < start + BATCH_SIZE))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('category',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'name', name='uq_category_user_name')
+    )
+    op.execute(category.insert().from_select(
+        ['user_id', 'name'],
+        sa.select(transaction.c.user_id, transaction.c.category).distinct()
+        .where(transaction.c.category.isnot(None), transaction.c.category != ''),
+    ))
+
+    op.add_column('transaction', sa.Column('amount_cents', sa.BigInteger(), nullable=True))
+    op.add_column('transaction', sa.Column('type_code', sa.SmallInteger(), nullable=True))
+    op.add_column('transaction', sa.Column('category_id', sa.Integer(), nullable=True))
+
+    # anything that is not "income" was already treated as expenses by the dashboard
+    _in_batches(transaction.update().values(
+        amount_cents=sa.cast(sa.func.round(transaction.c.amount * 100), sa.BigInteger),
+        type_code=sa.case((transaction.c.type == 'income', 1), else_=0),
+        category_id=sa.select(category.c.id).where(
+            category.c.user_id == transaction.c.user_id, category.c.name == transaction.c.category,
+        ).scalar_subquery(),
+    ))
+
+    # batch mode: SQLite rebuilds the table (copy-and-move), PostgreSQL gets plain ALTERs
+    with op.batch_alter_table('transaction') as batch_op:
+        batch_op.drop_column('amount')
+        batch_op.drop_column('type')
+        batch_op.drop_column('category')
+        batch_op.drop_column('month')
+        batch_op.alter_column('amount_cents', new_column_name='amount', existing_type=sa.BigInteger(), nullable=False)
+        batch_op.alter_column('type_code', new_column_name='type', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.create_foreign_key('fk_transaction_category_id_category', 'category', ['category_id'], ['id'])
+
+    # Rollups are regrouped from the converted rows rather than cast in place: folding
+    # unknown types into "expenses" can merge rows that were distinct before.
+    op.execute(monthly_rollup.delete())
+    with op.batch_alter_table('monthly_rollup') as batch_op:
+        batch_op.alter_column('total', existing_type=sa.Float(), type_=sa.BigInteger(), postgresql_using='total::bigint')
+        batch_op.alter_column('type', existing_type=sa.String(length=20), type_=sa.SmallInteger(),
+                              postgresql_using='0')
+    year = sa.func.coalesce(sa.extract('year', transaction.c.date), 0)
+    month = sa.func.coalesce(sa.extract('month', transaction.c.date), 0)
+    category_name = sa.func.coalesce(category.c.name, sa.literal(''))
+    grouped = sa.select(
+        transaction.c.user_id, year, month, transaction.c.type, category_name,
+        sa.func.sum(transaction.c.amount), sa.func.count(transaction.c.id),
+    ).select_from(
+        transaction.outerjoin(category, category.c.id == transaction.c.category_id)
+    ).group_by(transaction.c.user_id, year, month, transaction.c.type, category_name)
+    op.execute(monthly_rollup.insert().from_select(
+        ['user_id', 'year', 'month', 'type', 'category', 'total', 'count'], grouped
+    ))
+
+
+def _month_label(date):
+    """'Mon/YYYY' for a date column (NULL stays NULL), in SQL every dialect understands."""
+    names = sa.case(
+        *[(sa.extract('month', date) == number, name) for number, name in enumerate(MONTH_NAMES, 1)]
+    )
+    return names + '/' + sa.cast(sa.extract('year', date), sa.String)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # emptied and regrouped below, like the upgrade does, so no cast of the values is needed
+    op.execute(monthly_rollup.delete())
+    with op.batch_alter_table('monthly_rollup') as batch_op:
+        batch_op.alter_column('total', existing_type=sa.BigInteger(), type_=sa.Float(),
+                              postgresql_using='total / 100.0')
+        batch_op.alter_column('type', existing_type=sa.SmallInteger(), type_=sa.String(length=20),
+                              postgresql_using="CASE WHEN type = 1 THEN 'income' ELSE 'expenses' END")
+
+    with op.batch_alter_table('transaction') as batch_op:
+        batch_op.drop_constraint('fk_transaction_category_id_category', type_='foreignkey')
+        batch_op.alter_column('amount', new_column_name='amount_cents', existing_type=sa.BigInteger())
+        batch_op.alter_column('type', new_column_name='type_code', existing_type=sa.SmallInteger())
+    # the old names come back as new columns, after the renames have freed them
+    op.add_column('transaction', sa.Column('amount', sa.Float(), nullable=True))
+    op.add_column('transaction', sa.Column('type', sa.String(length=20), nullable=True))
+    op.add_column('transaction', sa.Column('category', sa.String(length=100), nullable=True))
+    op.add_column('transaction', sa.Column('month', sa.String(length=20), nullable=True))
+
+    _in_batches(transaction.update().values(
+        amount=transaction.c.amount_cents / 100.0,
+        type=sa.case((transaction.c.type_code == 1, 'income'), else_='expenses'),
+        category=sa.select(category.c.name).where(category.c.id == transaction.c.category_id).scalar_subquery(),
+        month=_month_label(transaction.c.date),
+    ))
+
+    with op.batch_alter_table('transaction') as batch_op:
+        batch_op.alter_column('amount', existing_type=sa.Float(), nullable=False)
+        batch_op.alter_column('type', existing_type=sa.String(length=20), nullable=False)
+        batch_op.drop_column('amount_cents')
+        batch_op.drop_column('type_code')
+        batch_op.drop_column('category_id')
+    op.drop_table('category')
+
+    year = sa.func.coalesce(sa.extract('year', transaction.c.date), 0)
+    month = sa.func.coalesce(sa.extract('month', transaction.c.date), 0)
+    category_name = sa.func.coalesce(transaction.c.category, sa.literal(''))
+    op.execute(monthly_rollup.insert().from_select(
+        ['user_id', 'year', 'month', 'type', 'category', 'total', 'count'],
+        sa.select(
+            transaction.c.user_id, year, month, transaction.c.type, category_name,
+            sa.func.sum(transaction.c.amount), sa.func.count(transaction.c.id),
+        ).group_by(transaction.c.user_id, year, month, transaction.c.type, category_name),
+    ))
@@ -0,0 +1,49 @@
+"""Add the user_insight and insight_run tables
+
+Revision ID: d5a8f3e1c074
+Revises: b9e4c1d7a362
+Create Date: 2026-10-18 23:02:17.315640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8f3e1c074'
+down_revision: Union[str, Sequence[str], None] = 'b9e4c1d7a362'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'insight_run',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('force', sa.Boolean(), nullable=False),
+        sa.Column('users_total', sa.Integer(), nullable=False),
+        sa.Column('users_done', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'user_insight',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('data_version', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['run_id'], ['insight_run.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_insight')
+    op.drop_table('insight_run')
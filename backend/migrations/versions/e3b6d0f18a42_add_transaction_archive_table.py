@@ -0,0 +1,43 @@
+"""Add transaction_archive table for compressed cold transactions
+
+Revision ID: e3b6d0f18a42
+Revises: c7f2e9a3b815
+Create Date: 2026-10-18 15:37:12.480913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b6d0f18a42'
+down_revision: Union[str, Sequence[str], None] = 'c7f2e9a3b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transaction_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('first_date', sa.Date(), nullable=False),
+    sa.Column('last_date', sa.Date(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('income_total', sa.BigInteger(), nullable=False),
+    sa.Column('expenses_total', sa.BigInteger(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transaction_archive_user_year', 'transaction_archive', ['user_id', 'year'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transaction_archive_user_year', table_name='transaction_archive')
+    op.drop_table('transaction_archive')
@@ -0,0 +1,34 @@
+"""Add indexes for category prefix search and per-category history pages
+
+Revision ID: f6d2a7c94b13
+Revises: e3b6d0f18a42
+Create Date: 2026-10-18 19:05:41.208337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6d2a7c94b13'
+down_revision: Union[str, Sequence[str], None] = 'e3b6d0f18a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # text_pattern_ops lets PostgreSQL use the index for LIKE 'foo%'; other backends take the plain expression
+    name_lower = 'lower(name) text_pattern_ops' if op.get_context().dialect.name == 'postgresql' else 'lower(name)'
+    op.create_index('ix_category_user_name_lower', 'category', ['user_id', sa.text(name_lower)], unique=False)
+    op.create_index(
+        'ix_transaction_user_category_date_id', 'transaction', ['user_id', 'category_id', 'date', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transaction_user_category_date_id', table_name='transaction')
+    op.drop_index('ix_category_user_name_lower', table_name='category')
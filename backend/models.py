@@ -1,5 +1,59 @@
-from datetime import date
-from app import db, bcrypt
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.types import TypeDecorator
+from app import db
+from hashing import password_hasher
+
+
+class Cents(TypeDecorator):
+    """Money stored as integer minor units, exposed to Python (and JSON) as a float.
+
+    SUMs run on integers in the database and are only converted on the way out, so
+    totals do not drift the way Float columns do.
+    """
+    impl = db.BigInteger
+    cache_ok = True
+
+    MAX_CENTS = 2 ** 63 - 1  # BIGINT
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            cents = (Decimal(str(value)) * 100).to_integral_value(ROUND_HALF_UP)
+        except ArithmeticError:  # decimal.InvalidOperation / Overflow
+            raise ValueError(f"Invalid amount {value!r}")
+        if not cents.is_finite() or abs(cents) > self.MAX_CENTS:
+            raise ValueError(f"Amount {value!r} does not fit in BIGINT cents")
+        return int(cents)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return int(value) / 100
+
+
+class TransactionType(TypeDecorator):
+    """"income"/"expenses" stored as a small integer."""
+    impl = db.SmallInteger
+    cache_ok = True
+
+    CODES = {"expenses": 0, "income": 1}
+    NAMES = {code: name for name, code in CODES.items()}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self.CODES[value]
+        except KeyError:
+            raise ValueError(f"Unknown transaction type {value!r}")
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.NAMES[value]
+
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -11,23 +65,106 @@ class User(db.Model):
     reset_token = db.Column(db.String(255), nullable=True, unique=True)
     reset_token_expiration = db.Column(db.DateTime, nullable=True)
 
+    # Bumped by every write to this user's transactions; used as the ETag of read endpoints
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Oldest /changes cursor that can still be served: tombstones at or below it were pruned
+    sync_floor = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     transactions = db.relationship("Transaction", backref="user", lazy=True)
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
+
+
+class Category(db.Model):
+    """A user's category name, referenced by id from Transaction."""
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "name", name="uq_category_user_name"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+
+    @classmethod
+    def ids_for(cls, user_id, names):
+        """Map category names to ids for one user, creating the missing ones."""
+        names = {n for n in names if n}
+        if not names:
+            return {}
+        found = dict(
+            db.session.query(cls.name, cls.id).filter(cls.user_id == user_id, cls.name.in_(names)).all()
+        )
+        missing = names - found.keys()
+        if missing:
+            for name in missing:
+                # savepoint so a concurrent insert of the same name does not abort the caller
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(cls(user_id=user_id, name=name))
+                except IntegrityError:
+                    pass
+            found.update(
+                db.session.query(cls.name, cls.id).filter(cls.user_id == user_id, cls.name.in_(missing)).all()
+            )
+        return found
+
+
+# Search and autocomplete match category names by case-insensitive prefix:
+# lower(name) LIKE 'foo%'. text_pattern_ops lets PostgreSQL answer that from the index
+# under any collation; SQLite cannot use an index for LIKE on an expression, so there the
+# user_id column narrows the scan to one user's categories.
+db.Index(
+    "ix_category_user_name_lower", Category.user_id, db.func.lower(Category.name).label("name_lower"),
+    postgresql_ops={"name_lower": "text_pattern_ops"},
+)
 
 
 class Transaction(db.Model):
+    # History pages are read per user in (date desc, id desc) order, also within one category
+    __table_args__ = (
+        db.Index("ix_transaction_user_date_id", "user_id", "date", "id"),
+        db.Index("ix_transaction_user_category_date_id", "user_id", "category_id", "date", "id"),
+        # /changes reads the rows written after a user's data_version cursor
+        db.Index("ix_transaction_user_version", "user_id", "version"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
-    type = db.Column(db.String(20), nullable=False)  # "income" or "expenses"
-    category = db.Column(db.String(100), nullable=True)
+    amount = db.Column(Cents, nullable=False)
+    type = db.Column(TransactionType, nullable=False)  # "income" or "expenses"
+    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=True)
     date = db.Column(db.Date, nullable=True)
-    month = db.Column(db.String(20), nullable=True)
+    # user's data_version of the write that created or last changed this row (see sync.py)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    category_ref = db.relationship("Category", lazy="joined")
+
+    @hybrid_property
+    def category(self):
+        return self.category_ref.name if self.category_ref else None
+
+    @category.expression
+    def category(cls):
+        return db.select(Category.name).where(Category.id == cls.category_id).scalar_subquery()
+
+    def set_category(self, name):
+        """Point this transaction at the user's category called `name` (None/"" clears it)."""
+        category_id = Category.ids_for(self.user_id, [name]).get(name) if name else None
+        self.category_id = category_id
+        self.category_ref = db.session.get(Category, category_id) if category_id else None
+
+    @property
+    def month(self):
+        # derived from date; kept in the JSON for the dashboard's Month/Year column
+        return self.date.strftime("%b/%Y") if self.date else None
 
     def to_dict(self):
         return {
@@ -39,3 +176,113 @@ class Transaction(db.Model):
             "date": self.date.isoformat() if self.date else None,
             "month": self.month,
         }
+
+
+class TransactionTombstone(db.Model):
+    """Marker left by a deleted transaction so /changes can report the delete (see sync.py).
+
+    Pruned after TOMBSTONE_RETENTION_DAYS; the user's sync_floor then moves past it.
+    """
+    __tablename__ = "transaction_tombstone"
+    __table_args__ = (
+        db.Index("ix_transaction_tombstone_user_version", "user_id", "version"),
+        db.Index("ix_transaction_tombstone_deleted_at", "deleted_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    transaction_id = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class MonthlyRollup(db.Model):
+    """Per-user running sum/count of transactions for one month, type and category.
+
+    Maintained alongside every write to Transaction (see rollups.py). Undated transactions
+    are kept under year=0, month=0 and uncategorised ones under category="".
+    """
+    __tablename__ = "monthly_rollup"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "year", "month", "type", "category", name="uq_monthly_rollup_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    type = db.Column(TransactionType, nullable=False)
+    category = db.Column(db.String(100), nullable=False, default="")
+    total = db.Column(Cents, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class OutboxMessage(db.Model):
+    """Email waiting to be sent by the outbox sender (see outbox.py)."""
+    __tablename__ = "outbox_message"
+    __table_args__ = (
+        db.Index("ix_outbox_message_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255), nullable=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+
+class ArchiveSegment(db.Model):
+    """Compressed, append-only batch of archived transactions for one user and year.
+
+    `archive.py` writes a new segment each time it moves rows out of the transaction table and
+    compacts each year back into a single segment; the totals are kept alongside the payload so
+    yearly figures never need to decompress it.
+    """
+    __tablename__ = "transaction_archive"
+    __table_args__ = (
+        db.Index("ix_transaction_archive_user_year", "user_id", "year"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    first_date = db.Column(db.Date, nullable=False)
+    last_date = db.Column(db.Date, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    income_total = db.Column(Cents, nullable=False, default=0)
+    expenses_total = db.Column(Cents, nullable=False, default=0)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class UserInsight(db.Model):
+    """Precomputed dashboard insights for one user, written by the nightly job (see insights.py).
+
+    `payload` is the encoded JSON served as-is by /api/finance/insights; `data_version` is the
+    user's version the insights were computed from, so a later write marks them stale.
+    """
+    __tablename__ = "user_insight"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("insight_run.id"), nullable=False)
+    data_version = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    payload = db.Column(db.LargeBinary, nullable=False)
+
+
+class InsightRun(db.Model):
+    """One run of the insights job; an unfinished run is resumed by the next invocation."""
+    __tablename__ = "insight_run"
+
+    id = db.Column(db.Integer, primary_key=True)
+    force = db.Column(db.Boolean, nullable=False, default=False)
+    users_total = db.Column(db.Integer, nullable=False, default=0)
+    users_done = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
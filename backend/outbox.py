@@ -0,0 +1,175 @@
+"""Transactional email outbox.
+
+Request handlers `enqueue()` a message in the same DB transaction as the change that triggers
+it (e.g. storing a reset token) and return without touching SMTP. A background sender thread
+per worker process, started on first use, drains the outbox over a single SMTP connection per
+batch and retries failures with exponential backoff. `python manage.py send-mail` drains it
+from the command line instead (or in addition).
+
+Claiming a message moves it to "sending" with a lease in next_attempt_at, so several workers
+can drain concurrently without sending twice; a claim left behind by a crashed worker becomes
+eligible again once its lease expires.
+
+Bodies can hold live secrets (password-reset links), so sent and failed messages are deleted
+after MAIL_OUTBOX_RETENTION_HOURS by `python manage.py prune-outbox`.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from models import OutboxMessage
+
+log = logging.getLogger(__name__)
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def enqueue(subject, recipient, body, sender=None):
+    """Add a message to the outbox. The caller commits."""
+    message = OutboxMessage(
+        subject=subject,
+        recipient=recipient,
+        body=body,
+        sender=sender or current_app.config.get("MAIL_DEFAULT_SENDER"),
+        status="pending",
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(message)
+    return message
+
+
+def _mail():
+    """Flask-Mail state for the current app, initialised the first time mail is sent."""
+    state = current_app.extensions.get("mail")
+    if state is None:
+        from flask_mail import Mail
+        state = Mail().init_app(current_app)
+    return state
+
+
+def _backoff(attempts):
+    config = current_app.config
+    return timedelta(seconds=min(config["MAIL_RETRY_BASE"] * 2 ** (attempts - 1), config["MAIL_RETRY_MAX"]))
+
+
+def _retry_later(message, error):
+    message.attempts += 1
+    message.last_error = str(error)[:1000]
+    if message.attempts >= current_app.config["MAIL_MAX_ATTEMPTS"]:
+        message.status = "failed"
+    else:
+        message.status = "pending"
+        message.next_attempt_at = datetime.utcnow() + _backoff(message.attempts)
+
+
+def _claim(limit):
+    now = datetime.utcnow()
+    due = (
+        db.session.query(OutboxMessage.id)
+        .filter(OutboxMessage.status.in_(("pending", "sending")))
+        .filter(OutboxMessage.next_attempt_at <= now)
+        .order_by(OutboxMessage.id)
+        .limit(limit)
+        .all()
+    )
+    lease = now + timedelta(seconds=current_app.config["MAIL_CLAIM_TIMEOUT"])
+    claimed = []
+    for (message_id,) in due:
+        # conditional UPDATE: only one drainer can win each message
+        won = OutboxMessage.query.filter(
+            OutboxMessage.id == message_id,
+            OutboxMessage.status.in_(("pending", "sending")),
+            OutboxMessage.next_attempt_at <= now,
+        ).update({"status": "sending", "next_attempt_at": lease}, synchronize_session=False)
+        if won:
+            claimed.append(message_id)
+    db.session.commit()
+    return claimed
+
+
+def drain(limit=50):
+    """Send up to `limit` due messages over one SMTP connection. Returns how many were sent."""
+    claimed = _claim(limit)
+    if not claimed:
+        return 0
+
+    from flask_mail import Message
+
+    sent = 0
+    messages = OutboxMessage.query.filter(OutboxMessage.id.in_(claimed)).order_by(OutboxMessage.id).all()
+    try:
+        with _mail().connect() as connection:
+            for message in messages:
+                try:
+                    connection.send(Message(
+                        message.subject, sender=message.sender, recipients=[message.recipient], body=message.body
+                    ))
+                    message.status = "sent"
+                    message.sent_at = datetime.utcnow()
+                    message.attempts += 1
+                    sent += 1
+                except Exception as e:
+                    log.warning("outbox message %s failed: %s", message.id, e)
+                    _retry_later(message, e)
+                db.session.commit()
+    except Exception as e:
+        # could not connect (or the connection dropped): reschedule whatever is still claimed
+        log.warning("outbox SMTP connection failed: %s", e)
+        for message in messages:
+            if message.status == "sending":
+                _retry_later(message, e)
+        db.session.commit()
+    return sent
+
+
+def prune(older_than_hours):
+    """Delete sent and failed messages created more than `older_than_hours` ago.
+
+    Returns the number of messages deleted. Pending and in-flight messages are kept.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    pruned = OutboxMessage.query.filter(
+        OutboxMessage.status.in_(("sent", "failed")), OutboxMessage.created_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return pruned
+
+
+def pending_count():
+    return OutboxMessage.query.filter(OutboxMessage.status.in_(("pending", "sending"))).count()
+
+
+class OutboxSender(threading.Thread):
+    """Daemon thread that drains the outbox when woken, and polls for retries."""
+
+    def __init__(self, app):
+        super().__init__(name="outbox-sender", daemon=True)
+        self.app = app
+        self.wakeup = threading.Event()
+        self.pid = os.getpid()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.app.config["MAIL_OUTBOX_POLL"])
+            self.wakeup.clear()
+            try:
+                with self.app.app_context():
+                    while drain(self.app.config["MAIL_OUTBOX_BATCH"]):
+                        pass
+            except Exception:
+                log.exception("outbox sender iteration failed")
+
+
+def notify():
+    """Wake this process's sender thread (starting it after a fork or on first use)."""
+    global _sender
+    if not current_app.config["MAIL_OUTBOX_WORKER"]:
+        return
+    with _sender_lock:
+        if _sender is None or _sender.pid != os.getpid() or not _sender.is_alive():
+            _sender = OutboxSender(current_app._get_current_object())
+            _sender.start()
+    _sender.wakeup.set()
@@ -0,0 +1,168 @@
+"""Opt-in request profiling.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>`, or at random with
+probability PROFILE_SAMPLE_RATE. The view runs under cProfile with an SQL trace
+(see database.trace_statements), and the result is written to PROFILE_DIR as
+<id>.prof (pstats) and <id>.json (request, timings, SQL trace, top functions). The response
+carries the id in an X-Profile-Id header.
+
+Stored profiles are listed and downloaded from /profiles, /profiles/<id> and
+/profiles/<id>/pstats, which need the same X-Profile token. At most one request per worker
+is profiled at a time; the others run normally. Only the newest PROFILE_MAX_FILES profiles
+are kept.
+"""
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import current_app, g, jsonify, request, send_file
+
+PROFILE_ID = re.compile(r"^[0-9TZ-]+-[0-9a-f]{8}$")
+
+
+class RequestProfiler:
+    """Flask extension: `profiler.init_app(app)` installs the hooks and the /profiles routes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if not (app.config.get("PROFILE_TOKEN") or app.config.get("PROFILE_SAMPLE_RATE")):
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._abandon)
+        app.add_url_rule("/profiles", "profiles", self._list_view)
+        app.add_url_rule("/profiles/<profile_id>", "profile", self._detail_view)
+        app.add_url_rule("/profiles/<profile_id>/pstats", "profile_pstats", self._pstats_view)
+
+    def _authorised(self):
+        token = current_app.config.get("PROFILE_TOKEN")
+        # constant-time comparison, so response timing does not leak the token
+        supplied = request.headers.get("X-Profile", "")
+        return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+    def _start(self):
+        if request.path.startswith("/profiles"):
+            return
+        requested = self._authorised()
+        rate = current_app.config.get("PROFILE_SAMPLE_RATE") or 0
+        if not (requested or (rate and random.random() < rate)):
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # cProfile is one-at-a-time; this request runs unprofiled
+        g.profile_requested = requested
+        g.sql_trace = []
+        g.profile_started = time.perf_counter()
+        g.profile = cProfile.Profile()
+        g.profile.enable()
+
+    def _stop(self):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return None
+        profile.disable()
+        self._lock.release()
+        return profile
+
+    def _finish(self, response):
+        profile = self._stop()
+        if profile is None:
+            return response
+        elapsed = time.perf_counter() - g.pop("profile_started")
+        trace = g.pop("sql_trace", [])
+
+        # microseconds, so ids sort in creation order (pruning and /profiles rely on it)
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S%fZ}-{uuid.uuid4().hex[:8]}"
+        directory = current_app.config["PROFILE_DIR"]
+        os.makedirs(directory, exist_ok=True)
+        profile.dump_stats(os.path.join(directory, f"{profile_id}.prof"))
+
+        top = io.StringIO()
+        pstats.Stats(profile, stream=top).sort_stats("cumulative").print_stats(current_app.config["PROFILE_TOP_FUNCTIONS"])
+        record = {
+            "id": profile_id,
+            "method": request.method,
+            "path": request.path,
+            "query_string": request.query_string.decode("utf-8", "replace"),
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "requested": g.pop("profile_requested", False),
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql_count": len(trace),
+            "sql_ms": round(sum(entry["ms"] or 0 for entry in trace), 3),
+            "sql": trace,
+            "top_functions": top.getvalue(),
+        }
+        with open(os.path.join(directory, f"{profile_id}.json"), "w") as f:
+            json.dump(record, f)
+        self._prune(directory, current_app.config["PROFILE_MAX_FILES"])
+
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    def _abandon(self, exc):
+        # after_request did not run (e.g. the response could not be built): just release
+        self._stop()
+        g.pop("sql_trace", None)
+
+    @staticmethod
+    def _prune(directory, keep):
+        records = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+        for name in records[:-keep] if keep else []:
+            for suffix in (".json", ".prof"):
+                try:
+                    os.remove(os.path.join(directory, name[:-5] + suffix))
+                except OSError:
+                    pass
+
+    # --- download endpoints ---
+
+    def _load(self, profile_id):
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(current_app.config["PROFILE_DIR"], f"{profile_id}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _list_view(self):
+        if not self._authorised():
+            return jsonify({"msg": "Not found"}), 404
+        directory = current_app.config["PROFILE_DIR"]
+        names = sorted((n for n in os.listdir(directory) if n.endswith(".json")), reverse=True) \
+            if os.path.isdir(directory) else []
+        profiles = []
+        for name in names:
+            record = self._load(name[:-5])
+            if record:
+                profiles.append({k: v for k, v in record.items() if k not in ("sql", "top_functions")})
+        return jsonify({"profiles": profiles}), 200
+
+    def _detail_view(self, profile_id):
+        record = self._load(profile_id) if self._authorised() else None
+        if not record:
+            return jsonify({"msg": "Not found"}), 404
+        return jsonify(record), 200
+
+    def _pstats_view(self, profile_id):
+        if not self._authorised() or not self._load(profile_id):
+            return jsonify({"msg": "Not found"}), 404
+        return send_file(
+            os.path.join(current_app.config["PROFILE_DIR"], f"{profile_id}.prof"),
+            mimetype="application/octet-stream",
+            as_attachment=True,
+            download_name=f"{profile_id}.prof",
+        )
+
+
+profiler = RequestProfiler()
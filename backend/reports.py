@@ -0,0 +1,247 @@
+"""Server-side report jobs.
+
+A report request is written to REPORT_DIR/jobs/<job_id>.json and rendered by a small
+ProcessPoolExecutor, so PDF/CSV rendering never runs on a gunicorn request worker. Job files
+are the only shared state, which lets any worker answer status and download requests.
+
+Rendered files are cached under REPORT_DIR/cache, keyed by the request and the user's
+data_version (like the ETags and the response cache); an identical request over unchanged
+data reuses the cached file without reading a single transaction.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+REPORT_FORMATS = ("pdf", "csv")
+MIMETYPES = {"pdf": "application/pdf", "csv": "text/csv"}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_pending = 0
+
+
+class ReportQueueFull(Exception):
+    pass
+
+
+def _jobs_dir(report_dir):
+    return os.path.join(report_dir, "jobs")
+
+
+def _cache_dir(report_dir):
+    return os.path.join(report_dir, "cache")
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def load_job(report_dir, job_id):
+    try:
+        with open(os.path.join(_jobs_dir(report_dir), f"{job_id}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_job(report_dir, job):
+    _write_json(os.path.join(_jobs_dir(report_dir), f"{job['id']}.json"), job)
+
+
+def _get_executor(max_workers):
+    # Created lazily and re-created after a fork, so gunicorn workers never share a pool.
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _job_finished(_future):
+    global _pending
+    with _executor_lock:
+        _pending -= 1
+
+
+def submit(config, user_id, fmt, raw_filters):
+    """Queue a report job and return its job record. Raises ReportQueueFull when saturated."""
+    global _pending
+    report_dir = config["REPORT_DIR"]
+    os.makedirs(_jobs_dir(report_dir), exist_ok=True)
+    os.makedirs(_cache_dir(report_dir), exist_ok=True)
+
+    with _executor_lock:
+        if _pending >= config["REPORT_MAX_PENDING"]:
+            raise ReportQueueFull()
+        _pending += 1
+
+    job = {
+        "id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "format": fmt,
+        "filters": raw_filters,
+        "status": "queued",
+        "created_at": time.time(),
+        "result": None,
+        "cached": False,
+        "error": None,
+    }
+    _save_job(report_dir, job)
+    try:
+        future = _get_executor(config["REPORT_WORKERS"]).submit(run_job, report_dir, job["id"])
+    except Exception:
+        _job_finished(None)
+        raise
+    future.add_done_callback(_job_finished)
+    return job
+
+
+def result_path(report_dir, job):
+    return os.path.join(_cache_dir(report_dir), job["result"])
+
+
+def prune(report_dir, max_age):
+    """Delete job records and cached results older than max_age seconds."""
+    cutoff = time.time() - max_age
+    for directory in (_jobs_dir(report_dir), _cache_dir(report_dir)):
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+# --- worker side (runs in the pool processes) ---
+
+def _app():
+    from app import get_app
+    return get_app()
+
+
+def _report_rows(user_id, filters):
+    from finance import export_rows
+
+    return export_rows(user_id, filters, 1000)
+
+
+def _render_csv(rows, path):
+    from finance import _csv_chunks
+
+    with open(path, "w", newline="") as f:
+        for chunk in _csv_chunks(rows):
+            f.write(chunk)
+
+
+def _render_pdf(rows, totals, path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    width, height = A4
+    pdf = canvas.Canvas(path, pagesize=A4)
+    columns = [("Date", 40), ("Month", 120), ("Category", 200), ("Type", 340), ("Amount", 420)]
+
+    def header(y):
+        pdf.setFont("Helvetica-Bold", 10)
+        for title, x in columns:
+            pdf.drawString(x, y, title)
+        pdf.setFont("Helvetica", 9)
+        return y - 16
+
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(40, height - 50, "Transaction History")
+    pdf.setFont("Helvetica", 12)
+    pdf.setFillColorRGB(0, 0.5, 0)
+    pdf.drawString(40, height - 75, f"Total Income: Ksh {totals['income']:.2f}")
+    pdf.setFillColorRGB(0.78, 0, 0)
+    pdf.drawString(40, height - 92, f"Total Expenses: Ksh {totals['expenses']:.2f}")
+    pdf.setFillColorRGB(0, 0, 0.78)
+    pdf.drawString(40, height - 109, f"Balance: Ksh {totals['balance']:.2f}")
+    pdf.setFillColorRGB(0, 0, 0)
+
+    y = header(height - 140)
+    for txn_date, category, txn_type, amount in rows:
+        if y < 50:
+            pdf.showPage()
+            y = header(height - 50)
+        cells = [
+            txn_date.isoformat() if txn_date else "-",
+            txn_date.strftime("%b/%Y") if txn_date else "-",
+            (category or "-")[:28],
+            txn_type or "-",
+            f"Ksh {amount:.2f}" if amount is not None else "-",
+        ]
+        for (_, x), text in zip(columns, cells):
+            pdf.drawString(x, y, text)
+        y -= 14
+    pdf.save()
+
+
+def run_job(report_dir, job_id):
+    """Render one job. Executed in a pool process."""
+    job = load_job(report_dir, job_id)
+    if job is None:
+        return
+    job["status"] = "running"
+    _save_job(report_dir, job)
+
+    try:
+        from finance import parse_filters
+        import data_version
+
+        with _app().app_context():
+            filters, error = parse_filters(job["filters"])
+            if error:
+                raise ValueError(error)
+
+            # the version is read before the rows: a write in between only makes this file
+            # fresher than its key, and the next request (at the newer version) re-renders
+            version = data_version.current(job["user_id"])
+            key = [job["user_id"], version, job["format"], job["filters"]]
+            digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode())
+            name = f"{digest.hexdigest()}.{job['format']}"
+            path = os.path.join(_cache_dir(report_dir), name)
+
+            if os.path.exists(path):
+                job["cached"] = True
+                os.utime(path)
+            else:
+                tmp = f"{path}.{os.getpid()}.tmp"
+                rows = _report_rows(job["user_id"], filters)
+                if job["format"] == "pdf":
+                    # the totals head the first page, so the (page-bound) PDF rows are read once
+                    # into memory; CSV streams straight through
+                    rows = list(rows)
+                    # summed in integer cents, like the column itself, so the totals stay exact
+                    cents = {"income": 0, "expenses": 0}
+                    for row in rows:
+                        cents["income" if row[2] == "income" else "expenses"] += round((row[3] or 0) * 100)
+                    cents["balance"] = cents["income"] - cents["expenses"]
+                    totals = {side: total / 100 for side, total in cents.items()}
+                    _render_pdf(rows, totals, tmp)
+                else:
+                    _render_csv(rows, tmp)
+                os.replace(tmp, path)
+
+        job["status"] = "done"
+        job["result"] = name
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+    job["finished_at"] = time.time()
+    _save_job(report_dir, job)
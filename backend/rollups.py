@@ -0,0 +1,156 @@
+"""Incrementally maintained monthly rollups.
+
+Every write to Transaction calls `record()` in the same session before the commit, so the
+rollup row for (user, year, month, type, category) moves together with the raw data.
+Archived transactions (see archive.py) stay counted, so rebuild/verify include them.
+`rebuild()` and `verify()` back the `python manage.py rollups` command.
+"""
+from sqlalchemy import func, extract, insert, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from models import MonthlyRollup, Transaction, Category
+import archive
+
+
+def rollup_key(txn_date, txn_type, category):
+    """Rollup columns for a transaction's date/type/category."""
+    if txn_date:
+        return txn_date.year, txn_date.month, txn_type, category or ""
+    return 0, 0, txn_type, category or ""
+
+
+def _upsert():
+    """INSERT ... ON CONFLICT adding to total/count, or None if the dialect lacks it."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        return None
+    table = MonthlyRollup.__table__
+    stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(table)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "year", "month", "type", "category"],
+        set_={"total": table.c.total + stmt.excluded.total, "count": table.c.count + stmt.excluded.count},
+    )
+
+
+def _apply(user_id, key, total, count):
+    """Atomically add total/count to one rollup row, dropping it once it is empty."""
+    year, month, txn_type, category = key
+    values = {
+        "user_id": user_id, "year": year, "month": month, "type": txn_type, "category": category,
+        "total": total, "count": count,
+    }
+    upsert = _upsert()
+
+    if upsert is not None:
+        db.session.execute(upsert.values(**values))
+    else:
+        row = MonthlyRollup.query.filter_by(
+            user_id=user_id, year=year, month=month, type=txn_type, category=category
+        ).with_for_update().first()
+        if row:
+            row.total += total
+            row.count += count
+        else:
+            db.session.add(MonthlyRollup(**values))
+        db.session.flush()
+
+    if count < 0:
+        MonthlyRollup.query.filter_by(
+            user_id=user_id, year=year, month=month, type=txn_type, category=category
+        ).filter(MonthlyRollup.count <= 0).delete(synchronize_session=False)
+
+
+def record(user_id, txn_date, txn_type, category, amount, sign=1):
+    """Add (sign=1) or remove (sign=-1) one transaction's contribution."""
+    _apply(user_id, rollup_key(txn_date, txn_type, category), amount * sign, sign)
+
+
+def record_many(user_id, deltas):
+    """Apply pre-aggregated {rollup_key: (total, count)} deltas.
+
+    One executemany upsert for all keys, plus one DELETE of the user's emptied rows if any
+    count went down; dialects without upserts fall back to a statement per key.
+    """
+    upsert = _upsert()
+    if upsert is None:
+        for key, (total, count) in deltas.items():
+            _apply(user_id, key, total, count)
+        return
+    if not deltas:
+        return
+    db.session.execute(upsert, [
+        {"user_id": user_id, "year": year, "month": month, "type": txn_type, "category": category,
+         "total": total, "count": count}
+        for (year, month, txn_type, category), (total, count) in deltas.items()
+    ])
+    if any(count < 0 for _, count in deltas.values()):
+        MonthlyRollup.query.filter(MonthlyRollup.user_id == user_id, MonthlyRollup.count <= 0).delete(
+            synchronize_session=False
+        )
+
+
+def record_transaction(txn, sign=1):
+    record(txn.user_id, txn.date, txn.type, txn.category, txn.amount, sign)
+
+
+def clear_user(user_id):
+    MonthlyRollup.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+
+def _raw_grouped(user_id=None):
+    """SELECT producing rollup rows straight from the transaction table."""
+    year = func.coalesce(extract("year", Transaction.date), 0)
+    month = func.coalesce(extract("month", Transaction.date), 0)
+    category = func.coalesce(Category.name, literal(""))
+    query = db.select(
+        Transaction.user_id, year, month, Transaction.type, category,
+        func.sum(Transaction.amount), func.count(Transaction.id),
+    ).select_from(Transaction).outerjoin(Category, Category.id == Transaction.category_id).group_by(
+        Transaction.user_id, year, month, Transaction.type, category
+    )
+    if user_id is not None:
+        query = query.where(Transaction.user_id == user_id)
+    return query
+
+
+def rebuild(user_id=None):
+    """Recompute rollups from the raw table (all users, or one). Caller commits."""
+    delete = MonthlyRollup.query
+    if user_id is not None:
+        delete = delete.filter_by(user_id=user_id)
+    delete.delete(synchronize_session=False)
+
+    table = MonthlyRollup.__table__
+    db.session.execute(insert(table).from_select(
+        ["user_id", "year", "month", "type", "category", "total", "count"], _raw_grouped(user_id)
+    ))
+    for uid, deltas in archive.rollup_deltas(user_id).items():
+        record_many(uid, deltas)
+
+
+def verify(user_id=None, tolerance=1e-6):
+    """Compare rollups with the raw table. Returns a list of (key, expected, actual) mismatches."""
+    expected = {
+        (u, int(y), int(m), t, c): (total, count)
+        for u, y, m, t, c, total, count in db.session.execute(_raw_grouped(user_id))
+    }
+    # archived rows still count towards the rollups
+    for uid, deltas in archive.rollup_deltas(user_id).items():
+        for (y, m, t, c), (total, count) in deltas.items():
+            exp_total, exp_count = expected.get((uid, y, m, t, c), (0.0, 0))
+            expected[(uid, y, m, t, c)] = (round(exp_total + total, 2), exp_count + count)
+    query = MonthlyRollup.query
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    actual = {
+        (r.user_id, r.year, r.month, r.type, r.category): (r.total, r.count)
+        for r in query
+    }
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        exp = expected.get(key, (0.0, 0))
+        act = actual.get(key, (0.0, 0))
+        if exp[1] != act[1] or abs((exp[0] or 0.0) - (act[0] or 0.0)) > tolerance:
+            mismatches.append((key, exp, act))
+    return sorted(mismatches)
@@ -0,0 +1,42 @@
+"""Startup timing, so worker boot and restart times can be measured and kept down.
+
+app.py times its module-level imports and every phase of create_app() (config, each
+extension, each blueprint import and registration) with a StartupTimer. The result is kept
+in app.extensions["startup"], logged once per process when STARTUP_REPORT is on, and printed
+by `python manage.py startup-report`.
+"""
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases = []  # (name, milliseconds)
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - started) * 1000))
+
+    def extend(self, other):
+        self.phases.extend(other.phases)
+
+    def report(self):
+        return {
+            "phases": [{"name": name, "ms": round(ms, 2)} for name, ms in self.phases],
+            "total_ms": round(sum(ms for _, ms in self.phases), 2),
+        }
+
+    def format(self):
+        return format_report(self.report())
+
+
+def format_report(report):
+    """A StartupTimer.report() as an aligned table."""
+    width = max([len(p["name"]) for p in report["phases"]] + [5])
+    lines = [f"{p['name']:<{width}}  {p['ms']:>8.1f} ms" for p in report["phases"]]
+    lines.append(f"{'total':<{width}}  {report['total_ms']:>8.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,119 @@
+"""Delta sync: what changed in a user's transactions since a cursor.
+
+The cursor is the user's data_version. Every write bumps it (data_version.bump, which locks
+the user row until the commit) and stamps what it wrote with the new value: added and edited
+rows carry it in Transaction.version, deleted ones leave a TransactionTombstone with it. A
+client that loaded its copy at cursor C asks for `version > C` and gets only the rows written
+and deleted since, then continues from the cursor in the answer.
+
+Tombstones are pruned after TOMBSTONE_RETENTION_DAYS (`python manage.py prune-tombstones`).
+Pruning, and archiving rows that changed recently (archive.archive_user), raise the user's
+sync_floor; a cursor below it can no longer be answered exactly, and the client reloads.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert
+from app import db
+from models import Transaction, TransactionTombstone, User
+
+
+class CursorExpired(Exception):
+    """The cursor is older than the user's sync_floor; the client must reload everything."""
+
+    def __init__(self, current):
+        super().__init__("cursor expired")
+        self.current = current
+
+
+def record_delete(user_id, transaction_id, version):
+    db.session.add(TransactionTombstone(user_id=user_id, transaction_id=transaction_id, version=version))
+
+
+def record_deletes(user_id, transaction_ids, version):
+    """Tombstones for many deleted rows in one bulk INSERT."""
+    db.session.execute(insert(TransactionTombstone.__table__), [
+        {"user_id": user_id, "transaction_id": transaction_id, "version": version} for transaction_id in transaction_ids
+    ])
+
+
+def raise_floor(user_id, version):
+    """Make cursors below `version` expire (e.g. after the changes up to it are forgotten)."""
+    User.query.filter(User.id == user_id, User.sync_floor < version).update(
+        {User.sync_floor: version}, synchronize_session=False
+    )
+
+
+def changes(user_id, since, limit):
+    """Changes after cursor `since`, oldest first, in pages of whole versions.
+
+    Returns a dict with the changed rows (Transaction.to_dict() plus "version"), the ids of
+    deleted rows, the cursor to continue from, and whether more changes remain. Raises
+    CursorExpired for cursors older than the user's sync_floor, LookupError for unknown users.
+    """
+    state = db.session.query(User.data_version, User.sync_floor).filter(User.id == user_id).first()
+    if state is None:
+        raise LookupError(user_id)
+    current, floor = state
+    if since < floor or since > current:
+        raise CursorExpired(current)
+
+    # rows committed after `current` was read are left for the next call
+    rows = (
+        Transaction.query
+        .filter(Transaction.user_id == user_id, Transaction.version > since, Transaction.version <= current)
+        .order_by(Transaction.version, Transaction.id)
+        .limit(limit + 1)
+        .all()
+    )
+    upto, more = current, len(rows) > limit
+    if more:
+        # a page ends on a version boundary, so every version it covers is complete
+        upto = rows[limit].version - 1
+        if rows[0].version > upto:
+            # a single write (e.g. an import batch) larger than the page: send it whole
+            upto = rows[0].version
+            rows = Transaction.query.filter_by(user_id=user_id, version=upto).order_by(Transaction.id).all()
+            more = upto < current
+        else:
+            rows = [t for t in rows if t.version <= upto]
+
+    live = {t.id: t.version for t in rows}
+    deleted = [
+        transaction_id for transaction_id, version in
+        db.session.query(TransactionTombstone.transaction_id, TransactionTombstone.version)
+        .filter(TransactionTombstone.user_id == user_id, TransactionTombstone.version > since,
+                TransactionTombstone.version <= upto)
+        .order_by(TransactionTombstone.version, TransactionTombstone.id)
+        # an id reused by a later insert is alive again
+        if live.get(transaction_id, -1) < version
+    ]
+    return {
+        "changed": [{**t.to_dict(), "version": t.version} for t in rows],
+        "deleted": deleted,
+        "cursor": upto,
+        "more": more,
+    }
+
+
+def prune_tombstones(older_than_days):
+    """Delete tombstones older than `older_than_days` and raise each affected user's sync_floor.
+
+    Returns the number of tombstones deleted.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    floors = (
+        db.session.query(TransactionTombstone.user_id, func.max(TransactionTombstone.version))
+        .filter(TransactionTombstone.deleted_at < cutoff)
+        .group_by(TransactionTombstone.user_id)
+        .all()
+    )
+    for user_id, version in floors:
+        raise_floor(user_id, version)
+    pruned = TransactionTombstone.query.filter(TransactionTombstone.deleted_at < cutoff).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    return pruned
+
+
+def delete_user(user_id):
+    TransactionTombstone.query.filter_by(user_id=user_id).delete(synchronize_session=False)
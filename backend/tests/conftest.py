@@ -0,0 +1,53 @@
+"""Fixtures: one app on a throwaway SQLite database, tables recreated for every test.
+
+The config reads the environment at import, so it is set before anything imports the app.
+Routes use user 1, which every test gets.
+"""
+import os
+import tempfile
+
+import pytest
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'test.db')}"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ["CACHE_BACKEND"] = "none"
+os.environ["MAIL_OUTBOX_WORKER"] = "False"
+os.environ["QUERY_BUDGET_ENFORCE"] = "raise"
+os.environ["JWT_SECRET_KEY"] = "test-secret-key-of-at-least-32-bytes"
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+
+    return create_app()
+
+
+@pytest.fixture(autouse=True)
+def db(app):
+    from app import db
+    from models import User
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(User(id=1, name="Test", username="test", email="test@example.com", password_hash="x"))
+        db.session.commit()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def add(client):
+    """POST /add and return the created transaction dict."""
+    def _add(**fields):
+        response = client.post("/api/finance/add", json=fields)
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()["transaction"]
+    return _add
@@ -0,0 +1,44 @@
+import pytest
+
+from finance import MAX_AMOUNT, parse_amount
+from models import Cents, Transaction
+
+NON_FINITE = ["nan", "NaN", "inf", "-Infinity", "1e400"]
+
+
+@pytest.mark.parametrize("value", NON_FINITE + ["abc", None, MAX_AMOUNT * 10])
+def test_parse_amount_rejects(value):
+    with pytest.raises(ValueError):
+        parse_amount(value)
+
+
+@pytest.mark.parametrize("value, expected", [("12.50", 12.5), (3, 3.0), ("-0.01", -0.01), (MAX_AMOUNT, MAX_AMOUNT)])
+def test_parse_amount_accepts(value, expected):
+    assert parse_amount(value) == expected
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "1e400", "1e999999", "abc"])
+def test_cents_raises_value_error(value):
+    with pytest.raises(ValueError):
+        Cents().process_bind_param(value, None)
+
+
+def test_cents_rounds_half_up():
+    assert Cents().process_bind_param("12.345", None) == 1235
+    assert Cents().process_bind_param(-0.005, None) == -1
+
+
+@pytest.mark.parametrize("value", NON_FINITE)
+def test_add_rejects_non_finite_amount(client, value):
+    response = client.post("/api/finance/add", json={"amount": value})
+    assert response.status_code == 400
+    assert "amount" in response.get_json()["msg"]
+    assert Transaction.query.count() == 0
+
+
+@pytest.mark.parametrize("value", NON_FINITE)
+def test_update_rejects_non_finite_amount(client, add, db, value):
+    txn = add(amount=5, category="Food", date="2025-01-02")
+    response = client.put(f"/api/finance/{txn['id']}", json={"amount": value})
+    assert response.status_code == 400
+    assert db.session.get(Transaction, txn["id"]).amount == 5.0
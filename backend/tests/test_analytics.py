@@ -0,0 +1,102 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+import analytics
+import archive
+from models import Transaction, User
+
+
+@pytest.fixture
+def seeded(add, db):
+    add(amount=1000, type="income", category="Salary", date="2025-01-05")
+    add(amount=100, category="Food", date="2025-01-10")
+    add(amount=300, category="Rent", date="2025-01-11")
+    # no transactions in February
+    add(amount=1200, type="income", category="Salary", date="2025-03-05")
+    add(amount=200.5, category="Food", date="2025-03-20")
+    db.session.add(Transaction(user_id=1, amount=7, type="expenses"))  # undated rows are left out
+    db.session.commit()
+
+
+def test_compute_monthly_series_and_changes(seeded):
+    result = analytics.compute(analytics.load(1), months=12, window=2, horizon=2)
+    assert result["as_of"] == "2025-03-20"
+    assert [(m["key"], m["month"], m["count"]) for m in result["months"]] == [
+        ("2025-01", "Jan/2025", 3), ("2025-02", "Feb/2025", 0), ("2025-03", "Mar/2025", 2),
+    ]
+    assert [m["income"] for m in result["months"]] == [1000, 0, 1200]
+    assert [m["expenses"] for m in result["months"]] == [400, 0, 200.5]
+    assert [m["net"] for m in result["months"]] == [600, 0, 999.5]
+    assert [m["expenses_avg"] for m in result["months"]] == [None, 200, 100.25]
+    assert [m["expenses_change"] for m in result["months"]] == [None, -400, 200.5]
+    assert [m["expenses_change_pct"] for m in result["months"]] == [None, -100, None]  # nothing to compare to
+
+
+def test_compute_categories_burn_rate_and_forecast(seeded):
+    result = analytics.compute(analytics.load(1), months=12, window=3, horizon=2)
+    assert result["categories"] == [
+        {"category": "Food", "total": 300.5, "share": 50.04},
+        {"category": "Rent", "total": 300, "share": 49.96},
+    ]
+    # 2025-03-20 minus 90 days: every row from 2024-12-21 on
+    assert result["burn_rate"] == {"days": 90, "daily": round(600.5 / 90, 2),
+                                   "monthly": round(600.5 / 90 * 365.25 / 12, 2),
+                                   "net_daily": round((600.5 - 2200) / 90, 2)}
+    # incomes 1000, 0, 1200 fit the line 633.33 + 100x
+    assert [(f["key"], f["income"]) for f in result["forecast"]] == [("2025-04", 933.33), ("2025-05", 1033.33)]
+
+
+def test_months_limits_the_shown_range_not_the_rolling_window(seeded):
+    result = analytics.compute(analytics.load(1), months=1, window=3, horizon=0)
+    assert [m["key"] for m in result["months"]] == ["2025-03"]
+    assert result["months"][0]["income_avg"] == round(2200 / 3, 2)
+    assert [c["category"] for c in result["categories"]] == ["Food"]
+    assert result["forecast"] == []
+
+
+def test_archived_rows_are_loaded_with_the_hot_ones(add):
+    add(amount=50, category="Food", date="2023-06-01")
+    add(amount=20, category="Food", date="2025-01-01")
+    add(amount=5, category=None, date="2025-01-02")
+    before = analytics.load(1)
+    archive.archive_user(1, date(2024, 12, 31))
+    after = analytics.load(1)
+    order = np.argsort(before.day)
+    assert sorted(after.day.tolist()) == before.day[order].tolist()
+    assert sorted(after.cents.tolist()) == [500, 2000, 5000]
+    assert analytics.compute(after) == analytics.compute(before)
+
+
+def test_load_many_matches_load(add, db):
+    db.session.add(User(id=2, name="Two", username="two", email="two@example.com", password_hash="x"))
+    db.session.commit()
+    add(amount=5, category="Food", date="2025-01-02")
+    loaded = analytics.load_many([2, 1])
+    assert loaded[2].day.size == 0 and loaded[2].names == []
+    assert loaded[1].cents.tolist() == analytics.load(1).cents.tolist() == [500]
+
+
+def test_empty_history(client):
+    body = client.get("/api/finance/analytics").get_json()
+    assert body == {"as_of": None, "params": {"months": 12, "window": 3, "horizon": 3}, "months": [],
+                    "categories": [], "burn_rate": None, "forecast": []}
+
+
+def test_endpoint_parameters(client, seeded):
+    body = client.get("/api/finance/analytics?months=2&window=1&horizon=1").get_json()
+    assert body["params"] == {"months": 2, "window": 1, "horizon": 1}
+    assert len(body["months"]) == 2 and len(body["forecast"]) == 1
+    for query, message in [("months=x", "months must be an integer"),
+                           ("window=0", "window must be between 1 and 12"),
+                           ("horizon=25", "horizon must be between 0 and 24")]:
+        response = client.get(f"/api/finance/analytics?{query}")
+        assert (response.status_code, response.get_json()["msg"]) == (400, message)
+
+
+def test_rolling_mean_and_forecast_helpers():
+    assert np.isnan(analytics.rolling_mean(np.array([1.0]), 2)).all()
+    assert analytics.rolling_mean(np.array([1.0, 3.0, 5.0]), 2)[1:].tolist() == [2.0, 4.0]
+    assert analytics.linear_forecast(np.array([5.0]), 2).tolist() == [5.0, 5.0]
+    assert analytics.linear_forecast(np.array([30.0, 20.0, 10.0]), 3).tolist() == [0.0, 0.0, 0.0]
@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+
+import archive
+import rollups
+from models import ArchiveSegment, Transaction
+
+
+def history(client, **filters):
+    """Every history row for `filters`, following the cursor through pages of 3."""
+    rows, cursor = [], None
+    while True:
+        query = dict(filters, limit=3, **({"cursor": cursor} if cursor else {}))
+        body = client.get("/api/finance/history", query_string=query).get_json()
+        rows += body["transactions"]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return rows
+
+
+def test_history_and_summary_read_through_the_archive(client, add, db):
+    start = date(2024, 1, 5)
+    for i in range(20):
+        add(amount=i + 1, type="income" if i % 4 == 0 else "expenses",
+            category="Food" if i % 2 else "Rent", date=(start + timedelta(days=20 * i)).isoformat())
+    filters = [{}, {"type": "income"}, {"category": "food"}, {"start_date": "2024-03-01", "end_date": "2024-09-30"}]
+    before = [history(client, **f) for f in filters]
+    summary = client.get("/api/finance/summary").get_json()
+
+    # several runs leave several segments per year
+    for cutoff in (date(2024, 4, 1), date(2024, 9, 1), date(2025, 3, 1)):
+        archive.archive_user(1, cutoff)
+        db.session.commit()
+    assert ArchiveSegment.query.count() >= 3
+    assert Transaction.query.count() < 20
+
+    after = [history(client, **f) for f in filters]
+    hot = {t.id for t in Transaction.query}
+    for rows in after:
+        for row in rows:
+            assert row.pop("archived", False) == (row["id"] not in hot)
+    assert after == before
+    assert client.get("/api/finance/summary").get_json() == summary
+
+
+def test_archived_rows_are_flagged_in_both_formats(client, add, db):
+    old = add(amount=5, type="expenses", category="Food", date="2020-01-01")
+    new = add(amount=7, type="expenses", category="Food", date=date.today().isoformat())
+    archive.archive_user(1, date(2021, 1, 1))
+    db.session.commit()
+
+    rows = client.get("/api/finance/history").get_json()["transactions"]
+    assert [(row["id"], row.get("archived", False)) for row in rows] == [(new["id"], False), (old["id"], True)]
+    columns = client.get("/api/finance/history", query_string={"format": "columns"}).get_json()["columns"]
+    assert columns["archived"] == [False, True]
+    # a page without archived rows has no archived column
+    recent = client.get("/api/finance/history", query_string={"format": "columns", "limit": 1}).get_json()
+    assert "archived" not in recent["columns"]
+    # archived rows are read-only
+    assert client.put(f"/api/finance/{old['id']}", json={"amount": 1}).status_code == 404
+    assert client.delete(f"/api/finance/{old['id']}").status_code == 404
+
+
+def test_compaction_keeps_the_rows_and_totals(client, add, db):
+    for month in range(1, 7):
+        add(amount=month, type="income" if month == 1 else "expenses", category="Food", date=f"2023-0{month}-10")
+    for cutoff in (date(2023, 3, 1), date(2023, 5, 1), date(2024, 1, 1)):
+        archive.archive_user(1, cutoff)
+    before = history(client)
+    assert [y["segments"] for y in client.get("/api/finance/archive").get_json()["years"]] == [3]
+
+    assert archive.compact_user(1) == 1
+    assert archive.compact_user(1) == 0
+    assert history(client) == before
+    (year,) = client.get("/api/finance/archive").get_json()["years"]
+    assert (year["year"], year["segments"], year["count"], year["income"], year["expenses"]) == (2023, 1, 6, 1.0, 20.0)
+    assert (year["first_date"], year["last_date"]) == ("2023-01-10", "2023-06-10")
+    assert rollups.verify(1) == []
+
+
+def test_a_page_decodes_only_the_segments_it_needs(client, add, db, monkeypatch):
+    for year in range(2015, 2020):
+        add(amount=year, category="Food", date=f"{year}-06-01")
+        archive.archive_user(1, date(year + 1, 1, 1))
+    decoded = []
+    real_decode = archive.decode
+    monkeypatch.setattr(archive, "decode", lambda payload: decoded.append(1) or real_decode(payload))
+
+    rows = archive.rows(1, {}, limit=2)
+    assert [row[1].year for row in rows] == [2019, 2018]
+    assert len(decoded) == 2  # 2019 and 2018 fill the page; 2017 ends before its last row, unread
+    assert len(archive.rows(1, {})) == 5
+
+
+def test_undated_rows_are_never_archived(client, add, db):
+    txn = add(amount=1, category="Food", date="2020-01-01")
+    db.session.get(Transaction, txn["id"]).date = None
+    db.session.commit()
+    assert archive.archive_user(1, date(2030, 1, 1)) == 0
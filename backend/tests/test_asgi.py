@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+import asgi
+
+
+@pytest.fixture
+def asgi_app():
+    """A fresh ASGI app (its Flask app is the get_app() singleton on the test database)."""
+    application = asgi.AsyncFinanceApp()
+    yield application
+    asyncio.run(application._shutdown())
+
+
+def call(application, method, path, body=b"", headers=(), chunk=None):
+    """One request through the ASGI interface; returns (status, headers, body)."""
+    query = b""
+    if "?" in path:
+        path, query = path.split("?", 1)
+        query = query.encode()
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "http_version": "1.1",
+             "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+             "server": ("testserver", 80), "client": ("127.0.0.1", 5000)}
+    parts = [body[i:i + chunk] for i in range(0, len(body), chunk)] if chunk and body else [body]
+    incoming = [{"type": "http.request", "body": part, "more_body": i < len(parts) - 1}
+                for i, part in enumerate(parts)]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    assert start["type"] == "http.response.start"
+    return (start["status"], {k.decode(): v.decode() for k, v in start["headers"]},
+            b"".join(m.get("body", b"") for m in sent[1:]))
+
+
+def test_finance_routes_run_on_the_async_engine(asgi_app):
+    body = json.dumps({"amount": 5, "category": "Food", "date": "2025-01-02"}).encode()
+    status, _, created = call(asgi_app, "POST", "/api/finance/add", body,
+                              [("Content-Type", "application/json")], chunk=7)
+    assert status == 201
+    assert json.loads(created)["transaction"]["amount"] == 5
+    assert asgi_app.engines[None].url.drivername == "sqlite+aiosqlite"
+
+    status, headers, history = call(asgi_app, "GET", "/api/finance/history?limit=10")
+    assert status == 200 and headers["etag"]
+    assert [t["category"] for t in json.loads(history)["transactions"]] == ["Food"]
+    assert call(asgi_app, "GET", "/api/finance/history?limit=10", headers=[("If-None-Match", headers["etag"])])[0] == 304
+
+    # a streamed body runs its SQL between chunks
+    status, _, csv = call(asgi_app, "GET", "/api/finance/export.csv")
+    assert status == 200 and b"Food" in csv
+
+
+def test_other_routes_run_on_the_wsgi_app(asgi_app):
+    assert call(asgi_app, "GET", "/healthz")[0] == 200
+    assert call(asgi_app, "GET", "/api/auth/me")[0] == 401
+
+
+def test_lifespan_starts_and_stops_the_engines(asgi_app):
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(asgi_app({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert set(asgi_app.binds) == {None}
+
+
+def test_async_url_and_engine_options():
+    assert str(asgi.async_url("sqlite:////tmp/finance.db")) == "sqlite+aiosqlite:////tmp/finance.db"
+    url = asgi.async_url("postgresql://u:p@db/finance?sslmode=require")
+    assert (url.drivername, dict(url.query)) == ("postgresql+asyncpg", {"ssl": "require"})
+    with pytest.raises(ValueError, match="No async driver for mysql"):
+        asgi.async_url("mysql://db/finance")
+
+    options = asgi.async_engine_options({
+        "pool_size": 5,
+        "connect_args": {"options": "-c statement_timeout=5000 -c lock_timeout=1000", "connect_timeout": 3},
+    })
+    assert options == {"pool_size": 5, "connect_args": {
+        "connect_timeout": 3, "server_settings": {"statement_timeout": "5000", "lock_timeout": "1000"},
+    }}
+
+
+def test_wsgi_environ():
+    scope = {"method": "GET", "path": "/app/api/finance/history", "root_path": "/app", "query_string": b"limit=2",
+             "headers": [(b"content-type", b"application/json"), (b"accept", b"a"), (b"accept", b"b")]}
+    environ = asgi.wsgi_environ(scope, None)
+    assert (environ["SCRIPT_NAME"], environ["PATH_INFO"], environ["QUERY_STRING"]) == (
+        "/app", "/api/finance/history", "limit=2"
+    )
+    assert (environ["CONTENT_TYPE"], environ["HTTP_ACCEPT"]) == ("application/json", "a,b")
+    assert (environ["SERVER_NAME"], environ["SERVER_PORT"]) == ("localhost", "80")
@@ -0,0 +1,118 @@
+from sqlalchemy import event
+
+import data_version
+import rollups
+from models import Transaction, TransactionTombstone, User
+
+
+def post_batch(client, *operations):
+    return client.post("/api/finance/batch", json={"operations": list(operations)})
+
+
+def test_batch_applies_all_operations(client, add):
+    keep = add(amount=10, category="Food", date="2025-01-02")
+    gone = add(amount=20, category="Rent", date="2025-01-03")
+    response = post_batch(
+        client,
+        {"op": "add", "amount": 7, "category": "Fuel", "date": "2025-02-01"},
+        {"op": "update", "id": keep["id"], "amount": 11, "category": "Groceries"},
+        {"op": "delete", "id": gone["id"]},
+    )
+    assert response.status_code == 200, response.get_json()
+    statuses = [r["status"] for r in response.get_json()["results"]]
+    assert statuses == ["created", "updated", "deleted"]
+    # SQLite may hand the deleted id to the added row, so compare contents
+    assert sorted((t.category, t.amount) for t in Transaction.query) == [("Fuel", 7.0), ("Groceries", 11.0)]
+    assert TransactionTombstone.query.filter_by(transaction_id=gone["id"]).count() == 1
+    assert rollups.verify(1) == []
+
+
+def test_non_finite_amount_rejects_whole_batch(client, add, db):
+    txn = add(amount=10, category="Food", date="2025-01-02")
+    version = data_version.current(1)
+    response = post_batch(
+        client,
+        {"op": "add", "amount": 5},
+        {"op": "add", "amount": "NaN"},
+        {"op": "update", "id": txn["id"], "amount": "inf"},
+    )
+    assert response.status_code == 400
+    results = response.get_json()["results"]
+    assert results[0]["status"] == "skipped"
+    assert [(r["status"], r["index"]) for r in results[1:]] == [("error", 1), ("error", 2)]
+    assert Transaction.query.count() == 1
+    assert db.session.get(Transaction, txn["id"]).amount == 10.0
+    assert data_version.current(1) == version
+
+
+def test_unknown_id_rejects_whole_batch(client, add):
+    add(amount=10, date="2025-01-02")
+    response = post_batch(client, {"op": "add", "amount": 1}, {"op": "delete", "id": 999})
+    assert response.status_code == 400
+    assert response.get_json()["results"][1] == {
+        "op": "delete", "index": 1, "id": 999, "status": "error", "msg": "Transaction not found",
+    }
+    assert Transaction.query.count() == 1
+    assert rollups.verify(1) == []
+
+
+def test_results_keep_operation_order_and_added_ids(client, add):
+    txn = add(amount=10, category="Food", date="2025-01-02")
+    results = post_batch(
+        client,
+        {"op": "add", "amount": 1, "category": "A"},
+        {"op": "update", "id": txn["id"], "date": None},
+        {"op": "add", "amount": 2, "category": None, "type": "income"},
+    ).get_json()["results"]
+    assert [r["status"] for r in results] == ["created", "updated", "created"]
+    assert results[1]["transaction"]["date"] is None
+    added = {t.id: (t.amount, t.category) for t in Transaction.query if t.id != txn["id"]}
+    assert added == {results[0]["id"]: (1.0, "A"), results[2]["id"]: (2.0, None)}
+    assert rollups.verify(1) == []
+
+
+def test_a_row_is_changed_by_at_most_one_operation(client, add):
+    txn = add(amount=10, date="2025-01-02")
+    results = post_batch(client, {"op": "update", "id": txn["id"], "amount": 1},
+                         {"op": "delete", "id": txn["id"]}).get_json()["results"]
+    assert results[1]["msg"] == "transaction %d is already changed by operation 0" % txn["id"]
+
+
+def test_another_users_row_is_not_found(client, db):
+    db.session.add(User(id=2, name="Two", username="two", email="two@example.com", password_hash="x"))
+    db.session.add(Transaction(id=50, user_id=2, amount=5, type="expenses"))
+    db.session.commit()
+    response = post_batch(client, {"op": "delete", "id": 50})
+    assert response.get_json()["results"][0]["msg"] == "Transaction not found"
+    assert db.session.get(Transaction, 50) is not None
+
+
+def test_one_update_statement_per_distinct_change(client, add, app, db):
+    ids = [add(amount=n, category="Food", date="2025-01-02")["id"] for n in range(1, 31)]
+    updates = []
+
+    def count(conn, cursor, statement, *args):
+        if statement.startswith(('UPDATE "transaction" ', "UPDATE transaction ")):
+            updates.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        response = post_batch(client, *[{"op": "update", "id": i, "category": "Groceries"} for i in ids[:-1]],
+                              {"op": "update", "id": ids[-1], "category": "Rent"})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+    assert response.status_code == 200
+    assert len(updates) == 2
+    assert rollups.verify(1) == []
+
+
+def test_batch_shape_and_size(client, app, monkeypatch):
+    assert client.post("/api/finance/batch", json={"operations": []}).status_code == 400
+    assert client.post("/api/finance/batch", json={"operations": {"op": "add"}}).status_code == 400
+    response = post_batch(client, "add", {"op": "merge"}, {"op": "update", "id": "1"})
+    assert [r["msg"] for r in response.get_json()["results"]] == [
+        "operation must be an object", "op must be add, update or delete", "id must be an integer",
+    ]
+    monkeypatch.setitem(app.config, "BATCH_MAX_OPERATIONS", 2)
+    response = post_batch(client, *[{"op": "add", "amount": 1}] * 3)
+    assert (response.status_code, response.get_json()["msg"]) == (413, "A batch holds at most 2 operations")
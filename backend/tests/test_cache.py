@@ -0,0 +1,93 @@
+import gzip
+
+import pytest
+
+from cache import DictClient, LRUBackend, SharedBackend, response_cache
+
+
+@pytest.fixture(params=["memory", "shared"])
+def backend(request, app, monkeypatch):
+    backend = LRUBackend() if request.param == "memory" else SharedBackend(DictClient())
+    monkeypatch.setitem(app.extensions, "response_cache", backend)
+    return backend
+
+
+def test_reads_are_served_from_the_cache_until_a_write(client, add, backend):
+    add(amount=5, category="Food", date="2025-01-02")
+    first = client.get("/api/finance/history")
+    assert backend.stats.as_dict()["sets"] == 1
+    assert client.get("/api/finance/history").get_data() == first.get_data()
+    assert backend.stats.hits == 1
+
+    # each query string and encoding is its own entry
+    client.get("/api/finance/history?limit=1")
+    zipped = client.get("/api/finance/history", headers={"Accept-Encoding": "gzip"})
+    assert gzip.decompress(zipped.get_data()) == first.get_data()
+    assert backend.stats.sets == 3
+
+    add(amount=6, category="Food", date="2025-01-03")
+    after = client.get("/api/finance/history").get_json()
+    assert len(after["transactions"]) == 2
+    assert backend.stats.hits == 1
+
+
+def test_a_write_drops_only_that_users_entries(client, add, backend):
+    other = response_cache.key(10, 1, "history", b"")
+    backend.set(other, b"{}", 60)
+    client.get("/api/finance/summary")
+    client.get("/api/finance/categories")
+
+    add(amount=5, category="Food", date="2025-01-02")
+    if isinstance(backend, LRUBackend):
+        assert backend.stats.invalidations == 2
+        assert backend.info()["entries"] == 1
+    assert backend.get(other) == b"{}"
+
+
+def test_lru_invalidation_is_per_user_not_per_prefix():
+    backend = LRUBackend()
+    for user_id in (1, 10, 11):
+        backend.set(response_cache.key(user_id, 1, "summary"), b"x", 60)
+    backend.invalidate_user(1)
+    assert backend.get(response_cache.key(1, 1, "summary")) is None
+    assert backend.get(response_cache.key(10, 1, "summary")) == b"x"
+    assert backend.get(response_cache.key(11, 1, "summary")) == b"x"
+
+
+def test_lru_bounds_and_ttl(monkeypatch):
+    backend = LRUBackend(max_entries=2, max_bytes=10)
+    backend.set("u1:a", b"1234", 60)
+    backend.set("u1:b", b"1234", 60)
+    backend.get("u1:a")  # a is now the most recently used
+    backend.set("u1:c", b"1234", 60)
+    assert (backend.get("u1:a"), backend.get("u1:b")) == (b"1234", None)
+    backend.set("u1:d", b"123456", 60)  # over max_bytes: the least recently used (c) goes
+    assert backend.get("u1:c") is None
+    assert backend.info()["bytes"] == 10
+    backend.set("u1:big", b"x" * 11, 60)
+    assert backend.get("u1:big") is None
+
+    now = [1000.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+    backend.set("u1:e", b"1", 5)
+    now[0] += 6
+    assert backend.get("u1:e") is None
+    assert backend.stats.evictions >= 3
+
+
+def test_dict_client_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+    client = DictClient()
+    client.set("a", b"1", ex=5)
+    client.set("b", b"2")
+    now[0] += 6
+    assert (client.get("a"), client.get("b")) == (None, b"2")
+    assert client.delete("a", "b") == 1
+
+
+def test_cache_stats_endpoint(client, backend):
+    client.get("/api/finance/summary")
+    client.get("/api/finance/summary")
+    stats = client.get("/api/finance/cache-stats").get_json()
+    assert (stats["hits"], stats["misses"], stats["sets"]) == (1, 1, 1)
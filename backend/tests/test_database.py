@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import create_engine, insert
+
+import database
+from config import engine_options, replica_binds
+from models import Transaction, User
+
+
+@pytest.fixture
+def replica(db, tmp_path):
+    """A second SQLite database registered as the "replica" bind, holding different rows."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__).values(
+            id=1, name="Test", username="test", email="test@example.com", password_hash="x", data_version=1
+        ))
+    db.engines["replica"] = engine
+    yield engine
+    del db.engines["replica"]
+    engine.dispose()
+
+
+def test_replica_serves_marked_reads_and_the_primary_takes_writes(client, add, db, replica):
+    with replica.begin() as conn:
+        conn.execute(insert(Transaction.__table__).values(id=99, user_id=1, amount=42, type="expenses", version=1))
+
+    # writes and unmarked reads (PUT looks the row up first) go to the primary
+    txn = add(amount=5, category="Food", date="2025-01-02")
+    assert client.put(f"/api/finance/{txn['id']}", json={"amount": 6}).status_code == 200
+
+    # last: test requests share the fixture's app context, so g.use_replica outlives this one
+    history = client.get("/api/finance/history").get_json()["transactions"]
+    assert [(row["id"], row["amount"]) for row in history] == [(99, 42.0)]
+
+
+def test_without_a_replica_marked_reads_use_the_primary(client, add):
+    add(amount=5, category="Food", date="2025-01-02")
+    assert len(client.get("/api/finance/history").get_json()["transactions"]) == 1
+
+
+def test_fork_hook_is_registered_once(app, db, monkeypatch):
+    registered = []
+    monkeypatch.setattr(database.os, "register_at_fork", lambda **hooks: registered.append(hooks))
+    monkeypatch.setattr(database, "_fork_hook_registered", False)
+    database.dispose_engines_after_fork(app, db)
+    database.dispose_engines_after_fork(app, db)
+    assert registered == [{"after_in_child": database._dispose_after_fork}]
+    assert set(db.engines.values()) <= set(database._fork_engines)
+
+
+def test_fork_hook_drops_inherited_connections(app, db):
+    db.session.execute(db.text("SELECT 1"))
+    db.session.commit()
+    db.session.close()
+    assert db.engine.pool.checkedin() == 1
+    database._dispose_after_fork()
+    assert db.engine.pool.checkedin() == 0
+
+
+def test_engine_options():
+    assert replica_binds(None) == {}
+    assert "pool_size" not in engine_options("sqlite:///:memory:")
+    assert "pool_size" in engine_options("sqlite:////tmp/finance.db")
+    assert replica_binds("postgresql://replica/db")["replica"]["url"] == "postgresql://replica/db"
@@ -0,0 +1,62 @@
+import pytest
+
+READS = ["/api/finance/history", "/api/finance/summary", "/api/finance/categories", "/api/finance/analytics",
+         "/api/finance/facets", "/api/finance/archive", "/api/finance/export.csv"]
+
+
+@pytest.mark.parametrize("path", READS)
+def test_unchanged_data_is_304_and_a_write_invalidates(client, add, path):
+    add(amount=5, category="Food", date="2025-01-02")
+    first = client.get(path)
+    assert first.status_code == 200
+    assert first.get_data()
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    again = client.get(path, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert again.headers["ETag"] == etag
+
+    add(amount=6, category="Food", date="2025-01-03")
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.get_data()
+    assert changed.headers["ETag"] != etag
+
+
+def test_update_and_delete_move_the_version(client, add):
+    txn = add(amount=5, category="Food", date="2025-01-02")
+    tags = [client.get("/api/finance/summary").headers["ETag"]]
+    client.put(f"/api/finance/{txn['id']}", json={"amount": 7})
+    tags.append(client.get("/api/finance/summary").headers["ETag"])
+    client.delete(f"/api/finance/{txn['id']}")
+    tags.append(client.get("/api/finance/summary").headers["ETag"])
+    assert len(set(tags)) == 3
+
+
+@pytest.mark.parametrize("path", [
+    "/api/finance/history?cursor=zzz",
+    "/api/finance/history?format=xml",
+    "/api/finance/search?q=food&limit=x",
+    "/api/finance/summary?month=13",
+    "/api/finance/analytics?months=0",
+    "/api/finance/export.csv?start_date=soon",
+])
+def test_malformed_query_is_400_even_with_a_matching_etag(client, path):
+    valid = client.get(path.split("?")[0] + ("?q=food" if "/search" in path else ""))
+    valid.get_data()
+    etag = valid.headers["ETag"]
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 400
+
+
+def test_cors_exposes_the_etag(client):
+    response = client.get("/api/finance/history", headers={"Origin": "http://localhost:5173"})
+    assert "ETag" in response.headers["Access-Control-Expose-Headers"]
+    preflight = client.options("/api/finance/history", headers={
+        "Origin": "http://localhost:5173",
+        "Access-Control-Request-Method": "GET",
+        "Access-Control-Request-Headers": "If-None-Match",
+    })
+    assert "If-None-Match" in preflight.headers["Access-Control-Allow-Headers"]
@@ -0,0 +1,53 @@
+import csv
+import gzip
+import io
+
+from finance import _csv_chunks
+
+
+def read_csv(text):
+    return list(csv.reader(io.StringIO(text)))
+
+
+def test_export_rows_newest_first_with_filters(client, add):
+    add(amount=12.5, type="expenses", category="Food", date="2025-01-05")
+    add(amount=100, type="income", category="Pay", date="2025-02-01")
+
+    response = client.get("/api/finance/export.csv")
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert response.headers["Content-Disposition"] == "attachment; filename=transactions.csv"
+    assert read_csv(response.get_data(as_text=True)) == [
+        ["Date", "Month", "Category", "Type", "Amount"],
+        ["2025-02-01", "Feb/2025", "Pay", "income", "100.0"],
+        ["2025-01-05", "Jan/2025", "Food", "expenses", "12.5"],
+    ]
+    filtered = client.get("/api/finance/export.csv?type=expenses").get_data(as_text=True)
+    assert [row[2] for row in read_csv(filtered)[1:]] == ["Food"]
+    assert client.get("/api/finance/export.csv?month=2025").status_code == 400
+
+
+def test_export_is_gzipped_when_accepted(client, add, app):
+    add(amount=1, category="Food", date="2025-01-05")
+    plain = client.get("/api/finance/export.csv").get_data()
+    response = client.get("/api/finance/export.csv", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.get_data()) == plain
+    # each representation has its own ETag
+    assert response.headers["ETag"] != client.get("/api/finance/export.csv").headers["ETag"]
+
+    app.config["EXPORT_GZIP"] = False
+    try:
+        response = client.get("/api/finance/export.csv", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+    finally:
+        app.config["EXPORT_GZIP"] = True
+
+
+def test_csv_chunks_flush_by_size():
+    rows = [(None, None, "expenses", float(i)) for i in range(100)]
+    chunks = list(_csv_chunks(iter(rows), flush_bytes=200))
+    assert len(chunks) > 5
+    assert all(len(chunk) < 200 + 40 for chunk in chunks)
+    assert read_csv("".join(chunks))[1] == ["-", "-", "-", "expenses", "0.0"]
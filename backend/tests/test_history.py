@@ -0,0 +1,103 @@
+from datetime import date
+
+import pytest
+
+from finance import decode_cursor, encode_cursor
+from models import Category, Transaction, User
+
+
+def pages(client, **query):
+    """Every history page for `query`, following next_cursor."""
+    out, cursor = [], None
+    while True:
+        params = dict(query, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/api/finance/history", query_string=params)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        out.append(body["transactions"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return out
+
+
+def test_pages_follow_date_then_id_order_with_undated_last(client, add, db):
+    for day in (3, 1, 2, 2, 3):
+        add(amount=day, category="Food", date=f"2025-01-0{day}")
+    undated = Transaction(user_id=1, amount=9, type="expenses")
+    db.session.add(undated)
+    db.session.commit()
+
+    result = pages(client, limit=2)
+    assert [len(page) for page in result] == [2, 2, 2]
+    rows = [row for page in result for row in page]
+    assert [row["date"] for row in rows] == [
+        "2025-01-03", "2025-01-03", "2025-01-02", "2025-01-02", "2025-01-01", None
+    ]
+    dated = [(row["date"], row["id"]) for row in rows[:-1]]
+    assert dated == sorted(dated, reverse=True)
+    assert rows[-1]["id"] == undated.id
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+    assert decode_cursor(encode_cursor(date(2025, 1, 2), 7)) == (date(2025, 1, 2), 7)
+
+
+@pytest.mark.parametrize("query, message", [
+    ({"cursor": "zzz"}, "Invalid cursor"),
+    ({"cursor": "bm8tc2VwYXJhdG9y"}, "Invalid cursor"),  # "no-separator"
+    ({"limit": "ten"}, "limit must be an integer"),
+    ({"month": "2025-13"}, "Invalid date filter"),
+    ({"start_date": "yesterday"}, "Invalid date filter"),
+    ({"type": "refund"}, "type must be"),
+    ({"format": "xml"}, "format must be one of"),
+])
+def test_bad_query_is_400(client, query, message):
+    response = client.get("/api/finance/history", query_string=query)
+    assert response.status_code == 400
+    assert message in response.get_json()["msg"]
+
+
+def test_limit_is_clamped(client, add, app):
+    for day in range(1, 4):
+        add(amount=day, date=f"2025-01-0{day}")
+    assert len(client.get("/api/finance/history?limit=0").get_json()["transactions"]) == 1
+    app.config["HISTORY_MAX_PAGE_SIZE"], old = 2, app.config["HISTORY_MAX_PAGE_SIZE"]
+    try:
+        assert len(client.get("/api/finance/history?limit=100").get_json()["transactions"]) == 2
+    finally:
+        app.config["HISTORY_MAX_PAGE_SIZE"] = old
+
+
+def test_filters(client, add):
+    add(amount=1, type="income", category="Salary", date="2025-01-31")
+    add(amount=2, type="expenses", category="Food", date="2025-02-01")
+    add(amount=3, type="expenses", category="Fast food", date="2025-02-15")
+    add(amount=4, type="expenses", category="Rent", date="2025-03-01")
+
+    def amounts(**query):
+        return sorted(row["amount"] for page in pages(client, **query) for row in page)
+
+    assert amounts(type="income") == [1]
+    assert amounts(category="FOOD") == [2, 3]
+    assert amounts(month="2025-02") == [2, 3]
+    assert amounts(start_date="2025-02-01", end_date="2025-02-28") == [2, 3]
+    assert amounts(type="expenses", category="food", start_date="2025-02-02") == [3]
+
+
+def test_category_filter_is_literal_and_scoped_to_the_user(client, add, db):
+    add(amount=1, category="100% fun", date="2025-01-01")
+    add(amount=2, category="Food", date="2025-01-02")
+    add(amount=3, category="a_b", date="2025-01-03")
+    add(amount=4, category="axb", date="2025-01-04")
+    # only the user's own categories are matched
+    db.session.add(User(id=2, name="Other", username="other", email="other@example.com", password_hash="x"))
+    db.session.add(Category(user_id=2, name="Food and drink"))
+    db.session.commit()
+
+    def amounts(category):
+        return sorted(row["amount"] for page in pages(client, category=category) for row in page)
+
+    assert amounts("%") == [1]
+    assert amounts("_") == [3]
+    assert amounts("and drink") == []
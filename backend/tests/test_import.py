@@ -0,0 +1,87 @@
+import io
+
+import importer
+import rollups
+from models import Transaction
+
+
+def run_import(text, batch_size=1):
+    return importer.import_csv(1, io.StringIO(text), batch_size=batch_size)
+
+
+def test_non_finite_amounts_are_row_errors():
+    report = run_import(
+        "date,amount,type,category\n"
+        "2025-01-01,5,expenses,Food\n"
+        "2025-01-02,nan,expenses,Food\n"
+        "2025-01-03,inf,expenses,Food\n"
+        "2025-01-04,infinity,income,Pay\n"
+        "2025-01-05,1e400,income,Pay\n"
+        "2025-01-06,7,income,Pay\n"
+    )
+    assert report["imported"] == 2
+    assert report["failed"] == 4
+    assert [e["line"] for e in report["errors"]] == [3, 4, 5, 6]
+    assert Transaction.query.count() == 2
+    assert rollups.verify(1) == []
+
+
+def test_invalid_rows_are_reported_and_skipped():
+    report = run_import("date,amount,type\nnot-a-date,1,expenses\n2025-01-01,,expenses\n2025-01-01,1,gift\n")
+    assert report["imported"] == 0
+    assert [e["msg"] for e in report["errors"]] == [
+        "Invalid date format. Use YYYY-MM-DD.", "amount is required", "type must be 'income' or 'expenses'",
+    ]
+
+
+def test_export_imports_back_unchanged(client, add, db):
+    add(amount=3, category="Food", date="2025-03-01")
+    txn = add(amount=4.5, category="Rent", date="2025-03-02")
+    undated = db.session.get(Transaction, txn["id"])
+    undated.date = None
+    undated.category_id = None
+    db.session.commit()
+    rollups.rebuild(1)
+    db.session.commit()
+
+    def rows():
+        return sorted((str(t.date), t.category, t.type, t.amount) for t in Transaction.query.filter_by(user_id=1))
+
+    exported = client.get("/api/finance/export.csv").get_data(as_text=True)
+    before = rows()
+    Transaction.query.delete()
+    rollups.clear_user(1)
+    db.session.commit()
+
+    report = run_import(exported, batch_size=100)
+    assert report["failed"] == 0
+    assert rows() == before
+    assert rollups.verify(1) == []
+
+
+def test_import_endpoint_takes_a_file_or_a_raw_body(client):
+    csv_text = "Date,Category,Type,Amount\n2025-04-01,Food,expenses,12.5\n2025-04-02,Pay,income,100\n"
+    upload = {"file": (io.BytesIO(("\ufeff" + csv_text).encode("utf-8")), "transactions.csv")}
+    response = client.post("/api/finance/import?batch_size=1", data=upload, content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert (response.get_json()["imported"], response.get_json()["failed"]) == (2, 0)
+
+    response = client.post("/api/finance/import", data=csv_text, content_type="text/csv")
+    assert response.get_json()["imported"] == 2
+    assert client.get("/api/finance/summary").get_json()["totals"] == {"income": 200.0, "expenses": 25.0, "balance": 175.0}
+
+
+def test_import_endpoint_rejects_bad_input(client):
+    assert client.post("/api/finance/import", data="", content_type="text/csv").status_code == 400
+    response = client.post("/api/finance/import", data="date,category\n2025-01-01,Food\n", content_type="text/csv")
+    assert response.status_code == 400
+    assert "'amount' column" in response.get_json()["msg"]
+    response = client.post("/api/finance/import?batch_size=big", data="amount\n1\n", content_type="text/csv")
+    assert response.get_json()["msg"] == "batch_size must be an integer"
+    assert Transaction.query.count() == 0
+
+
+def test_max_errors_stops_collecting_messages():
+    report = importer.import_csv(1, io.StringIO("amount\n" + "x\n" * 5 + "1\n"), max_errors=2)
+    assert (report["imported"], report["failed"], len(report["errors"])) == (1, 5, 2)
+    assert report["errors_truncated"]
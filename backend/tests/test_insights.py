@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+import analytics
+import insights
+from models import InsightRun, User, UserInsight
+
+
+@pytest.fixture
+def users(db):
+    db.session.add_all([User(id=i, name=f"U{i}", username=f"u{i}", email=f"u{i}@example.com", password_hash="x")
+                        for i in (2, 3, 4)])
+    db.session.commit()
+
+
+def columns(rows, names=("Food", "Rent")):
+    """Columns from (ISO date, cents, income, category code) tuples."""
+    day, cents, income, category = zip(*rows)
+    return analytics.Columns(np.array(day, "datetime64[D]").astype(np.int64), np.array(cents, np.int64),
+                             np.array(income, bool), np.array(category, np.int64), list(names))
+
+
+def test_run_computes_missing_and_stale_users_only(add, users):
+    add(amount=5, category="Food", date="2025-01-02")
+    report = insights.run(workers=1, chunk_size=3)
+    assert (report["users"], report["chunks"], report["resumed"]) == (4, 2, False)
+    assert UserInsight.query.count() == 4
+    assert insights.run(workers=1, chunk_size=3)["users"] == 0
+
+    add(amount=6, category="Food", date="2025-01-03")
+    assert insights.run(workers=1, chunk_size=3)["users"] == 1
+    assert insights.run(workers=1, chunk_size=3, force=True)["users"] == 4
+
+
+def test_an_interrupted_run_is_resumed(users, monkeypatch):
+    real, calls = insights.compute_chunk, []
+
+    def crash_on_second_chunk(run_id, user_ids):
+        calls.append(user_ids)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return real(run_id, user_ids)
+
+    monkeypatch.setattr(insights, "compute_chunk", crash_on_second_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        insights.run(workers=1, chunk_size=2)
+    job = InsightRun.query.one()
+    assert (job.users_total, job.users_done, job.finished_at) == (4, 2, None)
+
+    report = insights.run(workers=1, chunk_size=2)
+    assert (report["run_id"], report["resumed"], report["users"]) == (job.id, True, 2)
+    assert calls[2:] == [[3, 4]]
+    assert insights.run(workers=1, chunk_size=2, restart=True)["run_id"] != job.id
+
+
+def test_process_pool(add, users):
+    add(amount=5, category="Food", date="2025-01-02")
+    report = insights.run(workers=2, chunk_size=2)
+    assert (report["users"], report["workers"]) == (4, 2)
+    assert UserInsight.query.count() == 4
+
+
+def test_endpoint_serves_the_stored_payload(client, add):
+    assert client.get("/api/finance/insights").status_code == 404
+    add(amount=5, category="Food", date="2025-01-02")
+    insights.run(workers=1, chunk_size=10)
+
+    response = client.get("/api/finance/insights")
+    body = response.get_json()
+    assert body["stale"] is False and body["computed_at"]
+    assert body["insights"]["months"][0]["expenses"] == 5
+    assert body["insights"]["top_categories"] == [{"category": "Food", "total": 5, "share": 100}]
+    etag = response.headers["ETag"]
+    assert client.get("/api/finance/insights", headers={"If-None-Match": etag}).status_code == 304
+
+    add(amount=6, category="Food", date="2025-01-03")
+    response = client.get("/api/finance/insights")
+    assert response.get_json()["stale"] is True and response.headers["ETag"] != etag
+
+
+def by_kind(flags):
+    return {flag.pop("kind"): flag for flag in flags}
+
+
+def test_spending_and_category_spikes():
+    # Food 100.00 a month for six months, rent 500.00; then Food 400.00 in July
+    rows = [(f"2025-{m:02d}-05", 10000, False, 0) for m in range(1, 7)]
+    rows += [(f"2025-{m:02d}-01", 50000, False, 1) for m in range(1, 8)]
+    rows += [("2025-07-06", 1000, True, -1)]
+    assert insights.anomalies(columns(rows + [("2025-07-05", 15000, False, 0)])) == []
+
+    flags = by_kind(insights.anomalies(columns(rows + [("2025-07-05", 40000, False, 0)])))
+    assert flags == {
+        "spending_spike": {"month": "2025-07", "amount": 900, "usual": 600},
+        "category_spike": {"month": "2025-07", "category": "Food", "amount": 400, "usual": 100},
+    }
+
+
+def test_large_expense_needs_enough_history():
+    rows = [(f"2025-0{1 + i % 6}-{10 + i}", 1000 + i, False, 0) for i in range(10)]
+    outlier = ("2025-07-20", 9000, False, 0)
+    flags = by_kind(insights.anomalies(columns(rows + [outlier])))
+    assert flags["large_expense"] == {"date": "2025-07-20", "category": "Food", "amount": 90,
+                                      "usual": round((sum(1000 + i for i in range(10)) + 9000) / 11 / 100, 2)}
+    assert "large_expense" not in by_kind(insights.anomalies(columns(rows[:8] + [outlier])))
@@ -0,0 +1,80 @@
+import json
+import re
+
+import pytest
+
+from metrics import Registry, merge, metrics, render
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh = Registry()
+    monkeypatch.setattr(metrics, "registry", fresh)
+    return fresh
+
+
+def sample(text, name, **labels):
+    """Value of one series in Prometheus text output."""
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf"^{name}\{{{re.escape(wanted)}\}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_requests_and_sql_are_counted_per_route(client, add, registry):
+    txn = add(amount=5, category="Food", date="2025-01-02")
+    client.get("/api/finance/categories")
+    client.get("/api/finance/categories")
+    client.delete(f"/api/finance/{txn['id']}")
+    client.delete(f"/api/finance/{txn['id']}")
+
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    route = "/api/finance/categories"
+    assert sample(text, "http_requests_total", method="GET", route=route, status="200") == 2
+    assert sample(text, "http_requests_total", method="DELETE", route="/api/finance/<int:tx_id>", status="404") == 1
+    assert sample(text, "db_statements_total", route=route) == 4  # /categories runs 2 per request
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route=route) == 2
+    assert sample(text, "http_request_db_statements_bucket", route=route, le="2") == 2
+    assert "# TYPE http_response_size_bytes histogram" in text
+
+
+def test_metrics_token(client, app, registry, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_snapshots_from_several_workers_are_summed(client, app, registry, tmp_path, monkeypatch):
+    other = Registry()
+    other.inc("http_requests_total", (("method", "GET"), ("route", "/x"), ("status", "200")), 3)
+    other.observe("http_request_duration_seconds", (("method", "GET"), ("route", "/x")), 0.2)
+    (tmp_path / "worker-1-0.json").write_text(json.dumps(other.snapshot()))
+    monkeypatch.setitem(app.config, "METRICS_DIR", str(tmp_path))
+
+    client.get("/api/finance/categories")
+    text = client.get("/metrics").get_data(as_text=True)
+    assert sample(text, "http_requests_total", method="GET", route="/x", status="200") == 3
+    assert sample(text, "http_requests_total", method="GET", route="/api/finance/categories", status="200") == 1
+    assert len(list(tmp_path.glob("*.json"))) == 2  # this worker flushed its own snapshot
+
+
+def test_render_histogram_is_cumulative():
+    registry = Registry()
+    labels = (("route", "/x"),)
+    for value in (0, 2, 4, 1000):
+        registry.observe("http_request_db_statements", labels, value)
+    merged = merge([registry.snapshot(), registry.snapshot()])
+    text = render(merged)
+    assert sample(text, "http_request_db_statements_bucket", route="/x", le="0") == 2
+    assert sample(text, "http_request_db_statements_bucket", route="/x", le="5") == 6
+    assert sample(text, "http_request_db_statements_bucket", route="/x", le="+Inf") == 8
+    assert sample(text, "http_request_db_statements_sum", route="/x") == 2012
+    assert 'route="a\\"b"' in render_label('a"b')
+
+
+def render_label(value):
+    registry = Registry()
+    registry.inc("http_requests_total", (("route", value),))
+    return render(registry)
@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+import outbox
+from models import OutboxMessage
+
+
+class FakeMail:
+    """Stands in for the Flask-Mail state: records sends, fails the recipients in `failing`."""
+
+    def __init__(self):
+        self.sent, self.failing, self.connect_error, self.connections = [], set(), None, 0
+
+    @contextmanager
+    def connect(self):
+        if self.connect_error:
+            raise self.connect_error
+        self.connections += 1
+        yield self
+
+    def send(self, message):
+        if message.recipients[0] in self.failing:
+            raise OSError("550 mailbox unavailable")
+        self.sent.append(message)
+
+
+@pytest.fixture
+def mail(monkeypatch):
+    pytest.importorskip("flask_mail")
+    fake = FakeMail()
+    monkeypatch.setattr(outbox, "_mail", lambda: fake)
+    return fake
+
+
+def enqueue(*recipients):
+    for recipient in recipients:
+        outbox.enqueue("Hello", recipient, "body", sender="app@example.com")
+    outbox.db.session.commit()
+
+
+def test_drain_sends_due_messages_over_one_connection(mail):
+    enqueue("a@example.com", "b@example.com", "c@example.com")
+    assert outbox.drain(limit=2) == 2
+    assert outbox.drain(limit=2) == 1
+    assert outbox.drain() == 0
+    assert [m.recipients for m in mail.sent] == [["a@example.com"], ["b@example.com"], ["c@example.com"]]
+    assert mail.connections == 2
+    assert {(m.status, m.attempts) for m in OutboxMessage.query} == {("sent", 1)}
+    assert outbox.pending_count() == 0
+
+
+def test_failed_message_backs_off_then_fails(mail, app, monkeypatch):
+    monkeypatch.setitem(app.config, "MAIL_MAX_ATTEMPTS", 2)
+    enqueue("bad@example.com", "good@example.com")
+    mail.failing.add("bad@example.com")
+    before = datetime.utcnow()
+    assert outbox.drain() == 1
+
+    bad = OutboxMessage.query.filter_by(recipient="bad@example.com").one()
+    assert (bad.status, bad.attempts, bad.last_error) == ("pending", 1, "550 mailbox unavailable")
+    assert bad.next_attempt_at >= before + timedelta(seconds=app.config["MAIL_RETRY_BASE"])
+    assert outbox.drain() == 0  # not due yet
+
+    bad.next_attempt_at = datetime.utcnow()
+    outbox.db.session.commit()
+    assert outbox.drain() == 0
+    assert (bad.status, bad.attempts) == ("failed", 2)
+
+
+def test_connection_failure_reschedules_every_claimed_message(mail):
+    enqueue("a@example.com", "b@example.com")
+    mail.connect_error = ConnectionRefusedError("no SMTP server")
+    assert outbox.drain() == 0
+    assert {(m.status, m.attempts) for m in OutboxMessage.query} == {("pending", 1)}
+
+
+def test_expired_claim_is_picked_up_again(mail):
+    enqueue("a@example.com")
+    message = OutboxMessage.query.one()
+    message.status, message.next_attempt_at = "sending", datetime.utcnow() + timedelta(minutes=5)
+    outbox.db.session.commit()
+    assert outbox.drain() == 0  # another worker holds the lease
+
+    message.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    outbox.db.session.commit()
+    assert outbox.drain() == 1
+
+
+def test_prune_keeps_pending_and_recent_messages(db):
+    old = datetime.utcnow() - timedelta(hours=48)
+    for status, created_at in [("sent", old), ("failed", old), ("pending", old), ("sent", datetime.utcnow())]:
+        db.session.add(OutboxMessage(subject="s", recipient="r@example.com", body="b", status=status,
+                                     created_at=created_at))
+    db.session.commit()
+    assert outbox.prune(24) == 2
+    assert sorted(m.status for m in OutboxMessage.query) == ["pending", "sent"]
+
+
+def test_reset_password_queues_the_email(client, app, mail, monkeypatch):
+    monkeypatch.setitem(app.config, "MAIL_SERVER", "localhost")
+    monkeypatch.setitem(app.config, "MAIL_DEFAULT_SENDER", "app@example.com")
+    response = client.post("/api/auth/reset-password", json={"email": "test@example.com"})
+    assert response.status_code == 200
+    message = OutboxMessage.query.one()
+    assert (message.recipient, message.status) == ("test@example.com", "pending")
+    assert "/reset-password?token=" in message.body
+    assert outbox.drain() == 1
+    assert mail.sent[0].sender == "app@example.com"
@@ -0,0 +1,131 @@
+from concurrent.futures import Future
+from datetime import date
+
+import pytest
+
+import archive
+import config
+import insights
+import reports
+from database import QueryBudgetExceeded, query_budget
+from models import User
+
+
+@pytest.fixture
+def profiled(monkeypatch, tmp_path):
+    """A second app built with PROFILE_TOKEN set (the profiler only installs itself then)."""
+    from app import create_app
+
+    monkeypatch.setattr(config.Config, "PROFILE_TOKEN", "tok3n")
+    monkeypatch.setattr(config.Config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(config.Config, "PROFILE_MAX_FILES", 2)
+    return create_app().test_client()
+
+
+def test_token_gates_profiling_and_the_profile_endpoints(profiled, add):
+    add(amount=5, category="Food", date="2025-01-02")
+    assert "X-Profile-Id" not in profiled.get("/api/finance/summary").headers
+    assert "X-Profile-Id" not in profiled.get("/api/finance/summary", headers={"X-Profile": "wrong"}).headers
+
+    response = profiled.get("/api/finance/summary?type=expenses", headers={"X-Profile": "tok3n"})
+    profile_id = response.headers["X-Profile-Id"]
+    record = profiled.get(f"/profiles/{profile_id}", headers={"X-Profile": "tok3n"}).get_json()
+    assert (record["path"], record["query_string"], record["status"], record["requested"]) == (
+        "/api/finance/summary", "type=expenses", 200, True
+    )
+    assert record["sql_count"] == len(record["sql"]) > 0
+    assert "parameters" not in record["sql"][0]
+    pstats = profiled.get(f"/profiles/{profile_id}/pstats", headers={"X-Profile": "tok3n"})
+    assert pstats.mimetype == "application/octet-stream" and pstats.get_data()
+
+    for path in ("/profiles", f"/profiles/{profile_id}", f"/profiles/{profile_id}/pstats"):
+        assert profiled.get(path).status_code == 404
+        assert profiled.get(path, headers={"X-Profile": "tok3n!"}).status_code == 404
+    assert profiled.get("/profiles/../../etc/passwd", headers={"X-Profile": "tok3n"}).status_code == 404
+
+
+def test_only_the_newest_profiles_are_kept(profiled):
+    ids = [profiled.get("/api/finance/categories", headers={"X-Profile": "tok3n"}).headers["X-Profile-Id"]
+           for _ in range(3)]
+    listed = profiled.get("/profiles", headers={"X-Profile": "tok3n"}).get_json()["profiles"]
+    assert len(listed) == 2 and ids[0] not in {p["id"] for p in listed}
+
+
+def test_query_budget_raises_and_warns(app, monkeypatch, caplog):
+    from flask import g
+
+    @query_budget(1)
+    def view():
+        g.sql_statements = g.get("sql_statements", 0) + 2
+        return "ok"
+
+    assert view.query_budget == 1
+    with app.test_request_context("/x"):
+        with pytest.raises(QueryBudgetExceeded, match="ran 2 SQL statements, budget is 1"):
+            view()
+    monkeypatch.setitem(app.config, "QUERY_BUDGET_ENFORCE", "warn")
+    with app.test_request_context("/x"):
+        assert view() == "ok"
+    assert "budget is 1" in caplog.text
+
+
+def test_every_budgeted_route_stays_within_its_budget(app, client, add, db, monkeypatch):
+    """Each view with @query_budget, called once over data that takes its widest path."""
+    monkeypatch.setitem(app.config, "PROPAGATE_EXCEPTIONS", True)  # QueryBudgetExceeded fails the test
+    monkeypatch.setitem(app.config, "MAIL_SERVER", "localhost")
+    monkeypatch.setattr(reports, "_get_executor", lambda max_workers: type("Idle", (), {"submit": lambda *a: Future()})())
+    assert app.config["QUERY_BUDGET_ENFORCE"] is True
+
+    # hot and archived rows, rollups, a computed insight and a second user with a password
+    for i, day in enumerate(["2023-03-01", "2024-05-01", "2025-01-02", "2025-02-03"]):
+        add(amount=i + 1, type="income" if i % 2 else "expenses", category=["Food", "Rent"][i % 2], date=day)
+    archive.archive_user(1, date(2024, 12, 31))
+    insights.run(workers=1, chunk_size=10)
+    txn = add(amount=9, category="Food", date="2025-03-01")
+    assert client.post("/api/auth/register", json={"username": "ann", "email": "ann@example.com",
+                                                   "password": "pw"}).status_code == 201
+    token = client.post("/api/auth/login", json={"username": "ann", "password": "pw"}).get_json()["token"]
+    bearer = {"Authorization": f"Bearer {token}"}
+    cursor = client.get("/api/finance/history?limit=1").get_json()["next_cursor"]
+    job = client.post("/api/finance/reports", json={"format": "csv"}).get_json()["job"]
+    client.post("/api/auth/reset-password", json={"email": "ann@example.com"})
+    reset_token = User.query.filter_by(username="ann").one().reset_token
+    since = db.session.get(User, 1).sync_floor  # archiving forgets the changes before it
+
+    calls = {
+        "auth.register": ("POST", "/api/auth/register", {"json": {"username": "bo", "email": "bo@x.io", "password": "p"}}),
+        "auth.login": ("POST", "/api/auth/login", {"json": {"username": "ann", "password": "pw"}}),
+        "auth.me": ("GET", "/api/auth/me", {"headers": bearer}),
+        # the token first: requesting a new reset replaces it
+        "auth.reset_password_token": ("POST", f"/api/auth/reset-password/{reset_token}", {"json": {"password": "pw"}}),
+        "auth.reset_password": ("POST", "/api/auth/reset-password", {"json": {"email": "ann@example.com"}}),
+        "auth.delete_account": ("DELETE", "/api/auth/delete-account", {"headers": bearer, "json": {"password": "pw"}}),
+        "finance.add_transaction": ("POST", "/api/finance/add", {"json": {"amount": 1, "category": "New"}}),
+        "finance.get_history": ("GET", f"/api/finance/history?limit=2&category=o&cursor={cursor}", {}),
+        "finance.search_transactions": ("GET", "/api/finance/search?q=food&start_date=2000-01-01", {}),
+        "finance.export_csv": ("GET", "/api/finance/export.csv?type=expenses", {}),
+        "finance.submit_report": ("POST", "/api/finance/reports", {"json": {"format": "pdf"}}),
+        "finance.report_status": ("GET", f"/api/finance/reports/{job['id']}", {}),
+        "finance.download_report": ("GET", f"/api/finance/reports/{job['id']}/download", {}),
+        "finance.get_summary": ("GET", "/api/finance/summary?start_date=2000-01-01", {}),
+        "finance.get_categories": ("GET", "/api/finance/categories", {}),
+        "finance.get_analytics": ("GET", "/api/finance/analytics", {}),
+        "finance.get_insights": ("GET", "/api/finance/insights", {}),
+        "finance.get_facets": ("GET", "/api/finance/facets?prefix=fo", {}),
+        "finance.get_changes": ("GET", f"/api/finance/changes?since={since}", {}),
+        "finance.get_archive": ("GET", "/api/finance/archive", {}),
+        "finance.cache_stats": ("GET", "/api/finance/cache-stats", {}),
+        "finance.update_transaction": ("PUT", f"/api/finance/{txn['id']}",
+                                       {"json": {"amount": 2, "type": "income", "category": "Other", "date": "2024-01-01"}}),
+        "finance.delete_transaction": ("DELETE", f"/api/finance/{txn['id']}", {}),
+        "health.healthz": ("GET", "/healthz", {}),
+        "health.readyz": ("GET", "/readyz", {}),
+    }
+    budgeted = {rule.endpoint for rule in app.url_map.iter_rules()
+                if hasattr(app.view_functions[rule.endpoint], "query_budget")}
+    assert budgeted == calls.keys()
+
+    for endpoint, (method, url, kwargs) in calls.items():
+        response = client.open(url, method=method, **kwargs)
+        response.get_data()
+        assert response.status_code < 400 or endpoint == "finance.download_report", (endpoint, response.get_json())
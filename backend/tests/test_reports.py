@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import Future
+
+import pytest
+
+import reports
+
+
+class InlineExecutor:
+    """Runs report jobs in the test process instead of the spawn pool."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture
+def report_dir(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(reports, "_get_executor", lambda max_workers: InlineExecutor())
+    return str(tmp_path)
+
+
+def submit(client, **body):
+    response = client.post("/api/finance/reports", json=body)
+    assert response.status_code == 202, response.get_json()
+    return client.get(f"/api/finance/reports/{response.get_json()['job']['id']}").get_json()["job"]
+
+
+def test_csv_report_is_rendered_then_served_from_the_cache(client, add, report_dir, monkeypatch):
+    add(amount=12.5, category="Food", date="2025-01-05")
+    job = submit(client, format="csv", filters={"category": "food"})
+    assert (job["status"], job["cached"], job["error"]) == ("done", False, None)
+    download = client.get(f"/api/finance/reports/{job['id']}/download")
+    assert download.mimetype == "text/csv"
+    assert download.get_data(as_text=True).splitlines()[1] == "2025-01-05,Jan/2025,Food,expenses,12.5"
+
+    # same request over unchanged data: no transaction is read
+    report_rows = reports._report_rows
+
+    def no_scan(*args):
+        raise AssertionError("cached report re-read the transactions")
+    monkeypatch.setattr(reports, "_report_rows", no_scan)
+    assert submit(client, format="csv", filters={"category": "food"})["cached"] is True
+    assert len(os.listdir(os.path.join(report_dir, "cache"))) == 1
+
+    # a write moves the data_version, so the next request renders a new file
+    monkeypatch.setattr(reports, "_report_rows", report_rows)
+    add(amount=1, category="Food", date="2025-01-06")
+    assert submit(client, format="csv", filters={"category": "food"})["cached"] is False
+    assert len(os.listdir(os.path.join(report_dir, "cache"))) == 2
+
+
+def test_pdf_totals_are_exact_and_formatted(client, add, report_dir, monkeypatch):
+    rl_config = pytest.importorskip("reportlab.rl_config")
+    monkeypatch.setattr(rl_config, "pageCompression", 0)  # keep the page text searchable
+    for _ in range(3):
+        add(amount=0.1, type="income", category="Tips", date="2025-01-05")
+    add(amount=0.2, type="expenses", category="Food", date="2025-01-06")
+    job = submit(client, format="pdf")
+    assert job["status"] == "done", job["error"]
+    pdf = client.get(f"/api/finance/reports/{job['id']}/download").get_data()
+    assert pdf.startswith(b"%PDF")
+    for text in (b"Total Income: Ksh 0.30", b"Total Expenses: Ksh 0.20", b"Balance: Ksh 0.10", b"Ksh 0.10"):
+        assert text in pdf
+
+
+def test_bad_requests(client, report_dir):
+    assert client.post("/api/finance/reports", json={"format": "docx"}).status_code == 400
+    assert client.post("/api/finance/reports", json={"filters": {"month": "May"}}).status_code == 400
+    assert client.get("/api/finance/reports/nope").status_code == 404
+    assert client.get("/api/finance/reports/nope/download").status_code == 404
+
+
+def test_unfinished_job_cannot_be_downloaded(client, report_dir, monkeypatch):
+    queued = Future()
+    monkeypatch.setattr(reports, "_get_executor", lambda max_workers: type("Idle", (), {"submit": lambda *a: queued})())
+    job = client.post("/api/finance/reports", json={"format": "csv"}).get_json()["job"]
+    response = client.get(f"/api/finance/reports/{job['id']}/download")
+    assert response.status_code == 409
+    assert response.get_json()["job"]["status"] == "queued"
+    queued.cancel()  # releases its slot in the pending count
+
+
+def test_queue_is_bounded(client, report_dir, monkeypatch):
+    monkeypatch.setitem(client.application.config, "REPORT_MAX_PENDING", 0)
+    response = client.post("/api/finance/reports", json={"format": "csv"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,51 @@
+import rollups
+from models import MonthlyRollup
+
+
+def rollup_rows():
+    return sorted(
+        (r.year, r.month, r.type, r.category, r.total, r.count) for r in MonthlyRollup.query.filter_by(user_id=1)
+    )
+
+
+def test_rollups_follow_add_update_and_delete(client, add, db):
+    first = add(amount=10, type="expenses", category="Food", date="2025-01-05")
+    second = add(amount=2.5, type="expenses", category="Food", date="2025-01-20")
+    add(amount=100, type="income", category="Salary", date="2025-02-01")
+    assert rollups.verify(1) == []
+    assert rollup_rows() == [
+        (2025, 1, "expenses", "Food", 12.5, 2),
+        (2025, 2, "income", "Salary", 100.0, 1),
+    ]
+
+    # an edit moves the row's contribution from its old key to its new one
+    client.put(f"/api/finance/{first['id']}", json={"amount": 4, "category": "Rent", "date": "2025-02-10"})
+    assert rollups.verify(1) == []
+    assert rollup_rows() == [
+        (2025, 1, "expenses", "Food", 2.5, 1),
+        (2025, 2, "expenses", "Rent", 4.0, 1),
+        (2025, 2, "income", "Salary", 100.0, 1),
+    ]
+
+    # emptied rows are dropped rather than left at zero
+    assert client.delete(f"/api/finance/{second['id']}").status_code == 200
+    assert rollups.verify(1) == []
+    assert (2025, 1, "expenses", "Food") not in {row[:4] for row in rollup_rows()}
+
+
+def test_rebuild_matches_incremental(client, add, db):
+    for day in range(1, 10):
+        add(amount=day * 1.1, type="income" if day % 3 == 0 else "expenses",
+            category=["Food", "Rent", None][day % 3], date=f"2025-0{day}-01")
+    incremental = rollup_rows()
+    rollups.rebuild(1)
+    db.session.commit()
+    assert rollup_rows() == incremental
+    assert rollups.verify() == []
+
+
+def test_verify_reports_drift(client, add, db):
+    add(amount=5, category="Food", date="2025-03-03")
+    MonthlyRollup.query.update({MonthlyRollup.total: 6})
+    db.session.commit()
+    assert rollups.verify(1) == [((1, 2025, 3, "expenses", "Food"), (5.0, 1), (6.0, 1))]
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import text
+
+from models import Category, Transaction, TransactionType
+
+
+def test_amount_is_stored_as_integer_cents(client, add, db):
+    txn = add(amount="12.34", type="income", category="Salary", date="2025-01-02")
+    assert txn["amount"] == 12.34
+    raw = db.session.execute(text("SELECT amount, type FROM \"transaction\" WHERE id = :id"), {"id": txn["id"]}).one()
+    assert raw == (1234, TransactionType.CODES["income"])
+
+
+def test_amounts_sum_exactly(client, add):
+    for _ in range(10):
+        add(amount=0.1, type="expenses", category="Food", date="2025-01-02")
+    assert client.get("/api/finance/summary").get_json()["totals"]["expenses"] == 1.0
+
+
+def test_unknown_type_is_rejected(client):
+    response = client.post("/api/finance/add", json={"amount": 1, "type": "refund"})
+    assert response.status_code == 400
+    assert Transaction.query.count() == 0
+    with pytest.raises(ValueError):
+        TransactionType().process_bind_param("refund", None)
+
+
+def test_categories_are_shared_per_user(client, add, db):
+    first = add(amount=1, category="Food", date="2025-01-02")
+    second = add(amount=2, category="Food", date="2025-01-03")
+    add(amount=3, category="Rent", date="2025-01-04")
+    assert sorted(name for (name,) in db.session.query(Category.name)) == ["Food", "Rent"]
+    rows = {t.id: t for t in Transaction.query}
+    assert rows[first["id"]].category_id == rows[second["id"]].category_id
+    assert Category.ids_for(1, ["Food", "Travel", ""]).keys() == {"Food", "Travel"}
+
+
+def test_update_moves_the_category_and_clears_it(client, add, db):
+    txn = add(amount=1, category="Food", date="2025-01-02")
+    client.put(f"/api/finance/{txn['id']}", json={"category": "Groceries"})
+    assert db.session.get(Transaction, txn["id"]).category == "Groceries"
+    client.put(f"/api/finance/{txn['id']}", json={"category": ""})
+    stored = db.session.get(Transaction, txn["id"])
+    assert stored.category is None and stored.category_id is None
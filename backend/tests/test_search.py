@@ -0,0 +1,85 @@
+from datetime import date
+
+import pytest
+
+from finance import like_prefix, parse_search
+
+
+def search(client, q, **query):
+    response = client.get("/api/finance/search", query_string=dict(query, q=q))
+    assert response.status_code == 200, response.get_json()
+    return sorted(row["amount"] for row in response.get_json()["transactions"])
+
+
+@pytest.fixture
+def seeded(add):
+    add(amount=10, category="Food", date="2025-09-03")
+    add(amount=20, category="Fuel", date="2024-09-10")
+    add(amount=1500.5, type="income", category="Salary", date="2025-08-01")
+    add(amount=30, category="Sea food", date="2025-07-04")
+    add(amount=40, category="100%_real", date="2025-07-05")
+    add(amount=50, category="100 real", date="2025-07-06")
+
+
+def test_parse_search():
+    assert parse_search(" INC ") == {"text": "inc", "types": ["income"]}
+    assert parse_search("1,500.50")["amount"] == 1500.5
+    assert parse_search("2025-09")["month"] == (date(2025, 9, 1), date(2025, 10, 1))
+    assert parse_search("Sep/2025")["month"] == (date(2025, 9, 1), date(2025, 10, 1))
+    assert parse_search("sept")["month_of_year"] == 9
+    assert "month" not in parse_search("2025-13")
+    assert "amount" not in parse_search("1e400") and "amount" not in parse_search("nan")
+    assert like_prefix("a%b_c\\") == "a\\%b\\_c\\\\%"
+
+
+def test_search_matches_category_prefix_type_amount_and_month(client, seeded):
+    assert search(client, "f") == [10, 20]  # a prefix, not a substring ("Sea food")
+    assert search(client, "FOO") == [10]
+    assert search(client, "inc") == [1500.5]
+    assert search(client, "1500.50") == [1500.5]
+    assert search(client, "Sep/2025") == [10]
+    assert search(client, "sep") == [10, 20]
+    assert search(client, "sep", start_date="2025-01-01") == [10]
+
+
+def test_search_treats_like_wildcards_literally(client, seeded):
+    assert search(client, "100%") == [40]
+    assert search(client, "100%_") == [40]
+    assert search(client, "100_") == []  # not "any one character"
+    assert search(client, "100") == [40, 50]
+
+
+def test_search_requires_q(client):
+    assert client.get("/api/finance/search").status_code == 400
+    assert client.get("/api/finance/search?q=%20").status_code == 400
+    assert client.get("/api/finance/search?q=x&month=nope").status_code == 400
+
+
+def test_facets_count_categories_months_and_types(client, seeded):
+    facets = client.get("/api/finance/facets").get_json()
+    assert facets["categories"][0] == {"name": "100 real", "count": 1, "income": 0, "expenses": 1}
+    assert {c["name"]: c["count"] for c in facets["categories"]}["Salary"] == 1
+    assert [(m["key"], m["label"], m["count"]) for m in facets["months"]] == [
+        ("2025-09", "Sep/2025", 1), ("2025-08", "Aug/2025", 1), ("2025-07", "Jul/2025", 3), ("2024-09", "Sep/2024", 1),
+    ]
+    assert facets["types"] == {"income": 1, "expenses": 5}
+
+
+def test_facets_prefix_narrows_only_the_categories(client, seeded):
+    facets = client.get("/api/finance/facets?prefix=F").get_json()
+    assert [c["name"] for c in facets["categories"]] == ["Food", "Fuel"]
+    assert len(facets["months"]) == 4
+    assert [c["name"] for c in client.get("/api/finance/facets?prefix=100%25").get_json()["categories"]] == ["100%_real"]
+    assert client.get("/api/finance/facets?prefix=100_").get_json()["categories"] == []
+
+
+def test_facets_follow_edits_and_deletes(client, add):
+    txn = add(amount=5, category="Food", date="2025-01-02")
+    client.put(f"/api/finance/{txn['id']}", json={"category": "Rent", "date": "2025-02-02"})
+    facets = client.get("/api/finance/facets").get_json()
+    assert [c["name"] for c in facets["categories"]] == ["Rent"]
+    assert [m["key"] for m in facets["months"]] == ["2025-02"]
+    client.delete(f"/api/finance/{txn['id']}")
+    assert client.get("/api/finance/facets").get_json() == {
+        "categories": [], "months": [], "types": {"income": 0, "expenses": 0},
+    }
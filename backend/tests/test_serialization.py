@@ -0,0 +1,82 @@
+import gzip
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import serialization
+from models import Transaction
+
+
+ROWS = [(3, date(2025, 9, 2), "Food", "expenses", 12.5), (2, date(2025, 9, 2), None, "income", 100.0),
+        (1, None, "Rent", "expenses", 0.1)]
+
+
+def test_rows_match_to_dict(add, db):
+    txn = add(amount=12.5, category="Food", date="2025-09-02")
+    row = (txn["id"], date(2025, 9, 2), "Food", "expenses", 12.5)
+    assert serialization.transaction_rows(1, [row]) == [db.session.get(Transaction, txn["id"]).to_dict()]
+
+
+def test_rows_and_columns_formats():
+    rows = serialization.transaction_rows(1, ROWS, archived={1})
+    assert rows[0] == {"id": 3, "user_id": 1, "amount": 12.5, "type": "expenses", "category": "Food",
+                       "date": "2025-09-02", "month": "Sep/2025"}
+    assert (rows[2]["date"], rows[2]["month"], rows[2]["archived"]) == (None, None, True)
+    assert "archived" not in rows[0]
+
+    assert serialization.transaction_columns(ROWS) == {
+        "id": (3, 2, 1), "date": ["2025-09-02", "2025-09-02", None], "category": ("Food", None, "Rent"),
+        "type": ("expenses", "income", "expenses"), "amount": (12.5, 100.0, 0.1),
+    }
+    assert serialization.transaction_columns(ROWS, archived={1})["archived"] == [False, False, True]
+    assert "archived" not in serialization.transaction_columns(ROWS, archived={99})
+    assert serialization.transaction_columns([]) == {"id": (), "date": [], "category": (), "type": (), "amount": ()}
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_dumps_with_and_without_orjson(monkeypatch, fast):
+    if fast:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    payload = {"a": [1, 2.5, None, "Ksh é"], "d": date(2025, 1, 2), "n": Decimal("1.10")}
+    body = serialization.dumps(payload)
+    assert isinstance(body, bytes) and b" " not in body.replace(b"Ksh ", b"")
+    assert json.loads(body) == {"a": [1, 2.5, None, "Ksh é"], "d": "2025-01-02", "n": 1.1}
+    with pytest.raises(TypeError):
+        serialization.dumps({"x": object()})
+
+
+def test_history_columns_format(client, add):
+    add(amount=5, category="Food", date="2025-01-02")
+    add(amount=6, category="Rent", date="2025-01-03")
+    rows = client.get("/api/finance/history").get_json()
+    columns = client.get("/api/finance/history?format=columns").get_json()
+    assert columns["columns"]["id"] == [row["id"] for row in rows["transactions"]]
+    assert columns["columns"]["amount"] == [6, 5]
+    assert client.get("/api/finance/history?format=xml").status_code == 400
+
+
+def test_negotiated_compression(client, add, app, monkeypatch):
+    add(amount=5, category="Food", date="2025-01-02")
+    plain = client.get("/api/finance/history")
+    assert "Content-Encoding" not in plain.headers and "Accept-Encoding" in plain.headers["Vary"]
+
+    zipped = client.get("/api/finance/history", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(zipped.get_data()) == plain.get_data()
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+
+    brotli = pytest.importorskip("brotli")
+    both = client.get("/api/finance/history", headers={"Accept-Encoding": "gzip, br"})
+    assert both.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(both.get_data()) == plain.get_data()
+
+    monkeypatch.setitem(app.config, "RESPONSE_ENCODINGS", ["gzip"])
+    assert client.get("/api/finance/history", headers={"Accept-Encoding": "br"}).headers.get("Content-Encoding") is None
+    monkeypatch.setattr(serialization, "brotli", None)
+    monkeypatch.setitem(app.config, "RESPONSE_ENCODINGS", ["br", "gzip"])
+    assert client.get("/api/finance/history", headers={"Accept-Encoding": "br, gzip"}).headers["Content-Encoding"] == "gzip"
+    assert client.get("/api/finance/history", headers={"Accept-Encoding": "gzip;q=0"}).headers.get("Content-Encoding") is None
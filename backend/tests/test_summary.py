@@ -0,0 +1,47 @@
+def summary(client, **query):
+    response = client.get("/api/finance/summary", query_string=query)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def seed(add):
+    add(amount=1000, type="income", category="Salary", date="2025-01-31")
+    add(amount=12.5, type="expenses", category="Food", date="2025-01-05")
+    add(amount=7.25, type="expenses", category="Food", date="2025-02-01")
+    add(amount=300, type="expenses", category="Rent", date="2025-02-03")
+
+
+def test_months_totals_and_categories(client, add):
+    seed(add)
+    body = summary(client)
+    assert body["months"] == [
+        {"key": "2025-01", "month": "Jan/2025", "income": 1000.0, "expenses": 12.5},
+        {"key": "2025-02", "month": "Feb/2025", "income": 0.0, "expenses": 307.25},
+    ]
+    assert body["totals"] == {"income": 1000.0, "expenses": 319.75, "balance": 680.25}
+    assert body["categories"] == [
+        {"type": "income", "category": "Salary", "total": 1000.0, "count": 1},
+        {"type": "expenses", "category": "Rent", "total": 300.0, "count": 1},
+        {"type": "expenses", "category": "Food", "total": 19.75, "count": 2},
+    ]
+
+
+def test_filters(client, add):
+    seed(add)
+    assert summary(client, type="income")["totals"] == {"income": 1000.0, "expenses": 0.0, "balance": 1000.0}
+    assert summary(client, category="foo")["totals"]["expenses"] == 19.75
+    assert [m["key"] for m in summary(client, month="2025-02")["months"]] == ["2025-02"]
+    assert summary(client, start_date="2025-02-02")["totals"]["expenses"] == 300.0
+
+
+def test_rollup_and_transaction_paths_agree(client, add):
+    # a date range is grouped from the transactions, everything else from the rollups
+    seed(add)
+    assert summary(client, start_date="2000-01-01") == summary(client)
+    assert summary(client, category="food", end_date="2100-01-01") == summary(client, category="food")
+
+
+def test_bad_filter_is_400(client):
+    response = client.get("/api/finance/summary?month=January")
+    assert response.status_code == 400
+    assert "Invalid date filter" in response.get_json()["msg"]
@@ -0,0 +1,75 @@
+from datetime import date
+
+import archive
+import sync
+
+
+def changes(client, since):
+    return client.get("/api/finance/changes", query_string={"since": since})
+
+
+def test_changes_report_edits_and_deletes(client, add):
+    cursor = client.get("/api/finance/changes").get_json()["cursor"]
+    kept = add(amount=1, date="2025-01-01")
+    gone = add(amount=2, date="2025-01-02")
+    client.delete(f"/api/finance/{gone['id']}")
+
+    body = changes(client, cursor).get_json()
+    assert [t["id"] for t in body["changed"]] == [kept["id"]]
+    assert body["deleted"] == [gone["id"]]
+    assert body["more"] is False
+    assert changes(client, body["cursor"]).get_json()["changed"] == []
+
+
+def test_pruned_tombstones_expire_older_cursors(client, add):
+    cursor = client.get("/api/finance/changes").get_json()["cursor"]
+    txn = add(amount=1, date="2025-01-01")
+    client.delete(f"/api/finance/{txn['id']}")
+    assert sync.prune_tombstones(-1) == 1
+
+    response = changes(client, cursor)
+    assert response.status_code == 410
+    assert changes(client, response.get_json()["cursor"]).status_code == 200
+
+
+def test_pages_end_on_version_boundaries(client, add):
+    cursor = client.get("/api/finance/changes").get_json()["cursor"]
+    first, second = add(amount=1, date="2025-01-01"), add(amount=2, date="2025-01-02")
+    # three rows written by one batch share a version
+    client.post("/api/finance/batch", json={"operations": [{"op": "add", "amount": n} for n in (3, 4, 5)]})
+    add(amount=6, date="2025-01-06")
+
+    body = client.get("/api/finance/changes", query_string={"since": cursor, "limit": 2}).get_json()
+    assert ([t["id"] for t in body["changed"]], body["more"]) == ([first["id"], second["id"]], True)
+    # a single write larger than the page comes whole
+    body = client.get("/api/finance/changes", query_string={"since": body["cursor"], "limit": 2}).get_json()
+    assert ([t["amount"] for t in body["changed"]], body["more"]) == ([3, 4, 5], True)
+    assert len({t["version"] for t in body["changed"]}) == 1
+    body = client.get("/api/finance/changes", query_string={"since": body["cursor"], "limit": 2}).get_json()
+    assert ([t["amount"] for t in body["changed"]], body["more"]) == ([6], False)
+
+
+def test_edit_moves_a_row_to_its_new_version(client, add):
+    txn = add(amount=1, date="2025-01-01")
+    cursor = client.get("/api/finance/changes").get_json()["cursor"]
+    client.put(f"/api/finance/{txn['id']}", json={"amount": 9})
+    [changed] = changes(client, cursor).get_json()["changed"]
+    assert (changed["id"], changed["amount"], changed["version"]) == (txn["id"], 9, cursor + 1)
+
+
+def test_bad_cursors(client):
+    assert changes(client, "x").status_code == 400
+    current = client.get("/api/finance/changes").get_json()["cursor"]
+    response = changes(client, current + 1)  # from the future, e.g. a restored database
+    assert (response.status_code, response.get_json()["cursor"]) == (410, current)
+
+
+def test_archiving_expires_cursors_older_than_the_archived_rows(client, add):
+    add(amount=1, date="2023-01-01")
+    before = client.get("/api/finance/changes").get_json()["cursor"]
+    add(amount=2, date="2025-01-01")
+    after = client.get("/api/finance/changes").get_json()["cursor"]
+    archive.archive_user(1, date(2024, 12, 31))
+    assert changes(client, before - 1).status_code == 410  # has not seen the archived row
+    assert changes(client, before).status_code == 200
+    assert changes(client, after).status_code == 200
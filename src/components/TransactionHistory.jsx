@@ -1,13 +1,26 @@
-import React, { useState } from "react";
-import jsPDF from "jspdf";
-import autoTable from "jspdf-autotable";
+import React, { useState, useEffect, useCallback, useRef } from "react";
 import { FileDown, FileSpreadsheet, Filter, XCircle, Trash2 } from "lucide-react";
 import { motion, AnimatePresence } from "framer-motion";
 import api from "../api";
 import EditTransactionModal from "./EditTransactionModal";
 
-function TransactionHistory({ transactions, onDelete, onUpdate }) {
+// history pages come as parallel arrays (format=columns, about half the bytes); rebuild row objects
+const rowsFromColumns = (columns) =>
+  columns.id.map((id, i) => ({
+    id,
+    date: columns.date[i],
+    category: columns.category[i],
+    type: columns.type[i],
+    amount: columns.amount[i],
+    archived: columns.archived ? columns.archived[i] : false,
+  }));
+
+function TransactionHistory({ refreshKey, onDelete, onUpdate }) {
+  const [transactions, setTransactions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(false);
   const [search, setSearch] = useState("");
+  const [debouncedSearch, setDebouncedSearch] = useState("");
   const [filterMonth, setFilterMonth] = useState("");
   const [filterType, setFilterType] = useState("");
   const [filterCategory, setFilterCategory] = useState("");
@@ -33,6 +46,129 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
 
   const isFilterActive = search || filterMonth || filterType || filterCategory;
 
+  // search runs on the server, once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(search.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  // same order as the server's pages: newest date first, undated last, then newest id
+  const newestFirst = (a, b) => {
+    if (a.date !== b.date) {
+      if (!a.date) return 1;
+      if (!b.date) return -1;
+      return a.date < b.date ? 1 : -1;
+    }
+    return b.id - a.id;
+  };
+
+  // /finance/changes cursor matching the loaded rows; null until the first page is in
+  const syncCursor = useRef(null);
+
+  // 🔹 Search, type, category and month are filtered on the server; pages are fetched with a cursor
+  const fetchPage = useCallback(
+    async (cursor = null) => {
+      setLoading(true);
+      try {
+        if (!cursor) {
+          // read the sync cursor first: changes made while the page loads are synced again
+          const changes = await api.get("/finance/changes");
+          syncCursor.current = changes.data.cursor;
+        }
+        const params = { format: "columns" };
+        if (debouncedSearch) params.q = debouncedSearch;
+        if (filterType) params.type = filterType;
+        if (filterCategory) params.category = filterCategory;
+        if (filterMonth) params.month = filterMonth;
+        if (cursor) params.cursor = cursor;
+        const res = await api.get(debouncedSearch ? "/finance/search" : "/finance/history", { params });
+        const rows = rowsFromColumns(res.data.columns);
+        setTransactions((prev) => (cursor ? [...prev, ...rows] : rows));
+        setNextCursor(res.data.next_cursor);
+      } catch (err) {
+        console.error("Failed to load history:", err);
+      } finally {
+        setLoading(false);
+      }
+    },
+    [debouncedSearch, filterType, filterCategory, filterMonth]
+  );
+
+  useEffect(() => {
+    fetchPage();
+  }, [fetchPage]);
+
+  // 🔹 After edits here, in another tab or on another device, fetch only what changed since
+  // the cursor and merge it into the loaded rows
+  const syncChanges = useCallback(async () => {
+    if (syncCursor.current === null) return;
+    const changed = [];
+    const deleted = new Set();
+    try {
+      let since = syncCursor.current;
+      let more = true;
+      while (more) {
+        const res = await api.get("/finance/changes", { params: { since } });
+        for (const id of res.data.deleted) deleted.add(id);
+        for (const t of res.data.changed) {
+          deleted.delete(t.id);
+          changed.push(t);
+        }
+        since = res.data.cursor;
+        more = res.data.more;
+      }
+      syncCursor.current = since;
+    } catch (err) {
+      if (err.response?.status === 410) {
+        fetchPage(); // cursor too old: reload from the first page
+      } else {
+        console.error("Failed to sync transactions:", err);
+      }
+      return;
+    }
+    if (changed.length === 0 && deleted.size === 0) return;
+    if (debouncedSearch || filterType || filterCategory || filterMonth) {
+      // whether a changed row matches the filters is decided on the server
+      fetchPage();
+      return;
+    }
+    setTransactions((prev) => {
+      const byId = new Map(prev.map((t) => [t.id, t]));
+      for (const id of deleted) byId.delete(id);
+      for (const t of changed) byId.set(t.id, t);
+      const merged = [...byId.values()].sort(newestFirst);
+      // rows past the last loaded one arrive with the later pages
+      const last = prev[prev.length - 1];
+      return nextCursor && last ? merged.filter((t) => newestFirst(t, last) <= 0) : merged;
+    });
+  }, [fetchPage, nextCursor, debouncedSearch, filterType, filterCategory, filterMonth]);
+
+  // the effects below run the latest syncChanges without re-running when it changes
+  const syncRef = useRef(syncChanges);
+  syncRef.current = syncChanges;
+
+  useEffect(() => {
+    syncRef.current();
+  }, [refreshKey]);
+
+  // catch up on edits made elsewhere whenever this tab comes back into view
+  useEffect(() => {
+    const onVisible = () => {
+      if (document.visibilityState === "visible") syncRef.current();
+    };
+    document.addEventListener("visibilitychange", onVisible);
+    return () => document.removeEventListener("visibilitychange", onVisible);
+  }, []);
+
+  // month and category dropdown options with counts, precomputed on the server
+  const [facets, setFacets] = useState({ categories: [], months: [] });
+  useEffect(() => {
+    api
+      .get("/finance/facets")
+      .then((res) => setFacets(res.data))
+      .catch((err) => console.error("Failed to load filter options:", err));
+  }, [refreshKey]);
+
   const formatMonthYear = (t) => {
     if (t.date) {
       try {
@@ -57,103 +193,77 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
     }
   };
 
-  const filteredTransactions = transactions.filter((t) => {
-    const monthStr = formatMonthYear(t).toString();
-    const categoryStr = (t.category || "").toString();
-    const typeStr = (t.type || "").toString();
-    const amountStr = (t.amount !== undefined && t.amount !== null) ? t.amount.toString() : "";
-    const matchesSearch =
-      monthStr.toLowerCase().includes(search.toLowerCase()) ||
-      categoryStr.toLowerCase().includes(search.toLowerCase()) ||
-      typeStr.toLowerCase().includes(search.toLowerCase()) ||
-      amountStr.includes(search);
-
-    const matchesMonth = filterMonth ? monthStr === filterMonth : true;
-    const matchesType = filterType ? (t.type || "") === filterType : true;
-    const matchesCategory = filterCategory
-      ? (t.category || "").toLowerCase().includes(filterCategory.toLowerCase())
-      : true;
-
-    return (
-      matchesSearch &&
-      matchesMonth &&
-      matchesType &&
-      matchesCategory
-    );
-  });
-
-  // derive month/year filter options from transactions (formatMonthYear)
-  const monthOptions = Array.from(
-    new Set(
-      transactions.map((t) => formatMonthYear(t)).filter((m) => m && m.length > 0)
-    )
-  );
+  // same server-side filters as the history pages
+  const serverFilterParams = () => {
+    const params = {};
+    if (debouncedSearch) params.q = debouncedSearch;
+    if (filterType) params.type = filterType;
+    if (filterCategory) params.category = filterCategory;
+    if (filterMonth) params.month = filterMonth;
+    return params;
+  };
 
-  const handleExportCSV = () => {
-    if (filteredTransactions.length === 0) {
+  // 🔹 CSV is streamed by the backend; the browser only saves the file
+  const handleExportCSV = async () => {
+    if (transactions.length === 0) {
       alert("No transactions to export.");
       return;
     }
-    const header = ["Date", "Month", "Category", "Type", "Amount"];
-    const rows = filteredTransactions.map((t) => [
-      formatDateOnly(t),
-      formatMonthYear(t) || "-",
-      t.category || "-",
-      t.type || "-",
-      t.amount,
-    ]);
-    const csvContent =
-      "data:text/csv;charset=utf-8," +
-      [header, ...rows].map((e) => e.join(",")).join("\n");
-
-    const link = document.createElement("a");
-    link.href = encodeURI(csvContent);
-    link.download = "transactions.csv";
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
+    try {
+      const res = await api.get("/finance/export.csv", {
+        params: serverFilterParams(),
+        responseType: "blob",
+      });
+      const url = URL.createObjectURL(res.data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = "transactions.csv";
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      console.error("Failed to export CSV:", err);
+      alert("Export failed");
+    }
   };
 
-  const handleExportPDF = () => {
-    if (filteredTransactions.length === 0) {
+  // 🔹 PDF reports are rendered by a backend job: submit, poll until done, then download
+  const handleExportPDF = async () => {
+    if (transactions.length === 0) {
       alert("No transactions to export.");
       return;
     }
-    const doc = new jsPDF();
-    doc.setFontSize(16);
-    doc.text("Transaction History", 14, 20);
-
-    const totalIncome = filteredTransactions
-      .filter((t) => t.type === "income")
-      .reduce((sum, t) => sum + t.amount, 0);
-    const totalExpenses = filteredTransactions
-      .filter((t) => t.type === "expenses")
-      .reduce((sum, t) => sum + t.amount, 0);
-    const balance = totalIncome - totalExpenses;
-
-    doc.setFontSize(12);
-  doc.setTextColor(0, 128, 0);
-  doc.text(`Total Income: Ksh ${totalIncome}`, 14, 30);
-  doc.setTextColor(200, 0, 0);
-  doc.text(`Total Expenses: Ksh ${totalExpenses}`, 14, 37);
-  doc.setTextColor(0, 0, 200);
-  doc.text(`Balance: Ksh ${balance}`, 14, 44);
-    doc.setTextColor(0, 0, 0);
-
-    const tableColumn = ["Date", "Month", "Category", "Type", "Amount"];
-        const tableRows = filteredTransactions.map((t) => [
-      formatDateOnly(t),
-      formatMonthYear(t) || "-",
-      t.category || "-",
-      t.type || "-",
-          `Ksh ${t.amount}`,
-    ]);
-    autoTable(doc, {
-      head: [tableColumn],
-      body: tableRows,
-      startY: 50,
-    });
-    doc.save("transactions.pdf");
+    try {
+      const submitted = await api.post("/finance/reports", {
+        format: "pdf",
+        filters: serverFilterParams(),
+      });
+      let job = submitted.data.job;
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const res = await api.get(`/finance/reports/${job.id}`);
+        job = res.data.job;
+      }
+      if (job.status !== "done") {
+        alert(job.error || "Report failed");
+        return;
+      }
+      const res = await api.get(`/finance/reports/${job.id}/download`, {
+        responseType: "blob",
+      });
+      const url = URL.createObjectURL(res.data);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = "transactions.pdf";
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      console.error("Failed to export PDF:", err);
+      alert(err.response?.data?.msg || "Export failed");
+    }
   };
   // modal-driven delete
   const [confirmOpen, setConfirmOpen] = useState(false);
@@ -170,6 +280,7 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
     try {
       await api.delete(`/finance/${toDeleteId}`);
       setConfirmOpen(false);
+      setTransactions((prev) => prev.filter((t) => t.id !== toDeleteId));
       if (onDelete) onDelete(toDeleteId);
     } catch (err) {
       console.error("Failed to delete transaction:", err);
@@ -185,6 +296,9 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
   const handleSaveEdit = async (updated) => {
     try {
       await api.put(`/finance/${updated.id}`, updated);
+      setTransactions((prev) =>
+        prev.map((t) => (t.id === updated.id ? { ...t, ...updated } : t))
+      );
       if (onUpdate) onUpdate(updated);
     } catch (err) {
       console.error("Failed to update transaction:", err);
@@ -250,9 +364,9 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
                 className="px-3 py-2 border rounded-lg dark:bg-gray-700 dark:border-gray-600 dark:text-gray-100 w-full md:w-auto"
               >
                 <option value="">All Months</option>
-                {monthOptions.map((m) => (
-                  <option key={m} value={m}>
-                    {m}
+                {facets.months.map((m) => (
+                  <option key={m.key} value={m.key}>
+                    {m.label} ({m.count})
                   </option>
                 ))}
               </select>
@@ -270,10 +384,16 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
               <input
                 type="text"
                 placeholder="Filter by category"
+                list="category-options"
                 value={filterCategory}
                 onChange={(e) => setFilterCategory(e.target.value)}
                 className="px-3 py-2 border rounded-lg focus:ring focus:ring-blue-200 dark:bg-gray-700 dark:border-gray-600 dark:text-gray-100 dark:focus:ring-blue-500 w-full md:w-auto"
               />
+              <datalist id="category-options">
+                {facets.categories.map((c) => (
+                  <option key={c.name} value={c.name} />
+                ))}
+              </datalist>
               {/* date range filters removed as requested */}
               {isFilterActive && (
                 <button
@@ -290,7 +410,7 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
       </AnimatePresence>
 
       {/* Table */}
-      {filteredTransactions.length === 0 ? (
+      {transactions.length === 0 ? (
         <div className="flex justify-center items-center h-64">
           <p className="text-center text-gray-500 dark:text-gray-400">
             No transactions found.
@@ -311,7 +431,7 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
             </thead>
             <tbody>
               <AnimatePresence>
-                {filteredTransactions.map((t, idx) => (
+                {transactions.map((t, idx) => (
                   <motion.tr
                     key={t.id || idx}
                     initial={{ opacity: 0, y: 10 }}
@@ -333,24 +453,42 @@ function TransactionHistory({ transactions, onDelete, onUpdate }) {
                     </td>
                     <td className="px-4 py-2">Ksh {t.amount}</td>
                     <td className="px-4 py-2 text-center space-x-2">
-                      <button
-                        onClick={() => openEdit(t)}
-                        className="inline-flex items-center gap-1 px-3 py-1 bg-gray-200 text-gray-800 rounded-lg hover:bg-gray-300 transition"
-                      >
-                        Edit
-                      </button>
-                      <button
-                        onClick={() => showConfirm(t.id)}
-                        className="inline-flex items-center gap-1 px-3 py-1 bg-red-500 text-white rounded-lg hover:bg-red-600 transition"
-                      >
-                        <Trash2 className="w-4 h-4" /> Delete
-                      </button>
+                      {t.archived ? (
+                        // archived transactions are read-only on the server
+                        <span className="text-xs text-gray-500">Archived</span>
+                      ) : (
+                        <>
+                          <button
+                            onClick={() => openEdit(t)}
+                            className="inline-flex items-center gap-1 px-3 py-1 bg-gray-200 text-gray-800 rounded-lg hover:bg-gray-300 transition"
+                          >
+                            Edit
+                          </button>
+                          <button
+                            onClick={() => showConfirm(t.id)}
+                            className="inline-flex items-center gap-1 px-3 py-1 bg-red-500 text-white rounded-lg hover:bg-red-600 transition"
+                          >
+                            <Trash2 className="w-4 h-4" /> Delete
+                          </button>
+                        </>
+                      )}
                     </td>
                   </motion.tr>
                 ))}
               </AnimatePresence>
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="flex justify-center mt-4">
+              <button
+                onClick={() => fetchPage(nextCursor)}
+                disabled={loading}
+                className="px-4 py-2 bg-gray-200 rounded-lg hover:bg-gray-300 dark:bg-gray-700 dark:hover:bg-gray-600 dark:text-gray-100 transition disabled:opacity-50"
+              >
+                {loading ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       )}
 
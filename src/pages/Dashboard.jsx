@@ -17,71 +17,24 @@ import api from "../api"; // <-- import axios instance
 
 function Dashboard() {
   const [data, setData] = useState([]); // monthly summary
-  const [transactions, setTransactions] = useState([]); // full history
+  const [totals, setTotals] = useState({ income: 0, expenses: 0, balance: 0 });
+  const [historyVersion, setHistoryVersion] = useState(0); // bump to sync history with the server
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [showHistory, setShowHistory] = useState(false);
 
   // Load data on mount
   useEffect(() => {
-    fetchHistory();
+    fetchSummary();
   }, []);
 
-  // 🔹 Fetch all transactions from backend
-  const fetchHistory = async () => {
+  // 🔹 Fetch monthly buckets and totals (grouped by the backend, sorted chronologically)
+  const fetchSummary = async () => {
     try {
-      const res = await api.get("/finance/history");
-      const txs = res.data.transactions;
-
-      // group by month for chart
-      // Build grouped data keyed by Month/Year (e.g., Sep/2025)
-      const grouped = txs.reduce((acc, tx) => {
-        // prefer server-provided month (now stored as 'Mon/YYYY'), otherwise derive from date
-        let m = tx.month;
-        if (!m && tx.date) {
-          try {
-            const d = new Date(tx.date);
-            m = d.toLocaleString("en-US", { month: "short" }) + "/" + d.getFullYear();
-          } catch (e) {
-            m = "Unknown";
-          }
-        }
-        if (!m) m = "Unknown";
-        if (!acc[m]) {
-          acc[m] = { month: m, income: 0, expenses: 0 };
-        }
-        if (tx.type === "income") {
-          acc[m].income += tx.amount;
-        } else {
-          acc[m].expenses += tx.amount;
-        }
-        return acc;
-      }, {});
-
-      const groupedArray = Object.values(grouped);
-
-      // sort chronologically by year then month index
-      const monthNames = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"];
-      groupedArray.sort((a,b) => {
-        const parseMy = (s) => {
-          if (!s || s === 'Unknown') return { y: 0, m: -1 };
-          const parts = s.split('/');
-          if (parts.length === 2) {
-            const mon = parts[0];
-            const yr = parseInt(parts[1],10) || 0;
-            return { y: yr, m: monthNames.indexOf(mon) };
-          }
-          return { y: 0, m: monthNames.indexOf(s) };
-        };
-        const A = parseMy(a.month);
-        const B = parseMy(b.month);
-        if (A.y !== B.y) return A.y - B.y;
-        return A.m - B.m;
-      });
-
-      setTransactions(txs);
-      setData(groupedArray);
+      const res = await api.get("/finance/summary");
+      setData(res.data.months);
+      setTotals(res.data.totals);
     } catch (err) {
-      console.error("Failed to load history:", err);
+      console.error("Failed to load summary:", err);
     }
   };
 
@@ -94,96 +47,20 @@ function Dashboard() {
         date,
         category,
       });
-      fetchHistory(); // refresh after add
+      fetchSummary(); // refresh after add
+      setHistoryVersion((v) => v + 1); // history pulls only the new row via /finance/changes
     } catch (err) {
       console.error("Failed to add transaction:", err);
     }
   };
 
-  const handleDeleteLocal = (id) => {
-    // remove from transactions state
-    const remaining = transactions.filter((t) => t.id !== id);
-    setTransactions(remaining);
-
-    // recompute grouped data for charts
-    const grouped = remaining.reduce((acc, tx) => {
-      let m = tx.month;
-      if (!m && tx.date) {
-        try {
-          const d = new Date(tx.date);
-          m = d.toLocaleString("en-US", { month: "short" }) + "/" + d.getFullYear();
-        } catch (e) {
-          m = "Unknown";
-        }
-      }
-      if (!m) m = "Unknown";
-      if (!acc[m]) acc[m] = { month: m, income: 0, expenses: 0 };
-      if (tx.type === "income") acc[m].income += tx.amount;
-      else acc[m].expenses += tx.amount;
-      return acc;
-    }, {});
-    const groupedArray = Object.values(grouped);
-    const monthNames = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"];
-    groupedArray.sort((a,b) => {
-      const parseMy = (s) => {
-        if (!s || s === 'Unknown') return { y: 0, m: -1 };
-        const parts = s.split('/');
-        if (parts.length === 2) {
-          const mon = parts[0];
-          const yr = parseInt(parts[1],10) || 0;
-          return { y: yr, m: monthNames.indexOf(mon) };
-        }
-        return { y: 0, m: monthNames.indexOf(s) };
-      };
-      const A = parseMy(a.month);
-      const B = parseMy(b.month);
-      if (A.y !== B.y) return A.y - B.y;
-      return A.m - B.m;
-    });
-    setData(groupedArray);
+  // TransactionHistory keeps its own pages in sync; only the charts need refreshing
+  const handleDeleteLocal = () => {
+    fetchSummary();
   };
 
-  const handleUpdateLocal = (updated) => {
-    // update transactions state
-    const updatedList = transactions.map((t) => (t.id === updated.id ? { ...t, ...updated } : t));
-    setTransactions(updatedList);
-
-    // recompute grouped data
-    const grouped = updatedList.reduce((acc, tx) => {
-      let m = tx.month;
-      if (!m && tx.date) {
-        try {
-          const d = new Date(tx.date);
-          m = d.toLocaleString("en-US", { month: "short" }) + "/" + d.getFullYear();
-        } catch (e) {
-          m = "Unknown";
-        }
-      }
-      if (!m) m = "Unknown";
-      if (!acc[m]) acc[m] = { month: m, income: 0, expenses: 0 };
-      if (tx.type === "income") acc[m].income += tx.amount;
-      else acc[m].expenses += tx.amount;
-      return acc;
-    }, {});
-    const groupedArray = Object.values(grouped);
-    const monthNames = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"];
-    groupedArray.sort((a,b) => {
-      const parseMy = (s) => {
-        if (!s || s === 'Unknown') return { y: 0, m: -1 };
-        const parts = s.split('/');
-        if (parts.length === 2) {
-          const mon = parts[0];
-          const yr = parseInt(parts[1],10) || 0;
-          return { y: yr, m: monthNames.indexOf(mon) };
-        }
-        return { y: 0, m: monthNames.indexOf(s) };
-      };
-      const A = parseMy(a.month);
-      const B = parseMy(b.month);
-      if (A.y !== B.y) return A.y - B.y;
-      return A.m - B.m;
-    });
-    setData(groupedArray);
+  const handleUpdateLocal = () => {
+    fetchSummary();
   };
 
   return (
@@ -214,7 +91,7 @@ function Dashboard() {
 
       {/* Conditional rendering */}
       {showHistory ? (
-  <TransactionHistory transactions={transactions} onDelete={handleDeleteLocal} onUpdate={handleUpdateLocal} />
+  <TransactionHistory refreshKey={historyVersion} onDelete={handleDeleteLocal} onUpdate={handleUpdateLocal} />
       ) : (
         <>
           {/* Summary Cards */}
@@ -224,7 +101,7 @@ function Dashboard() {
                 Total Income
               </h2>
               <p className="text-2xl font-bold text-blue-600 dark:text-blue-400">
-                Ksh {data.reduce((acc, cur) => acc + cur.income, 0)}
+                Ksh {totals.income}
               </p>
             </div>
             <div className="bg-white dark:bg-gray-800 p-4 rounded-xl shadow text-center transition-colors duration-300">
@@ -232,7 +109,7 @@ function Dashboard() {
                 Total Expenses
               </h2>
               <p className="text-2xl font-bold text-red-600 dark:text-red-400">
-                Ksh {data.reduce((acc, cur) => acc + cur.expenses, 0)}
+                Ksh {totals.expenses}
               </p>
             </div>
           </div>